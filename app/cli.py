@@ -0,0 +1,259 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.config.database import async_session_maker, engine
+from app.config.settings import Settings
+from app.libs import PluggyAIClient, YNABClient
+from app.libs.lanes import BACKGROUND, lane
+from app.models import AccountReference
+from app.services.backfill_service import BackfillService
+from app.services.job_queue import JobQueue
+from app.services.payload_archive import PayloadArchive
+from app.services.quota_bucket import shared_ynab_limiter
+from app.services.refresh_orchestrator import RefreshOrchestrator
+from app.services.sync_cursor_service import SyncCursorService
+from app.services.transactions_service import SyncInProgress, TransactionsService
+from app.services.ynab_outbox_service import YNABOutboxService
+
+logger = logging.getLogger(__name__)
+
+
+def partition_by_budget(account_references: List[Tuple[int, str]], partitions: int) -> List[List[int]]:
+  """
+  Splits account references between processes, keeping the ones of a budget together so their YNAB writes are
+  batched by a single process. The largest budgets are placed first, each in the least loaded partition.
+
+  Args:
+      account_references (List[Tuple[int, str]]): The `(id, budget_id)` of every account reference.
+      partitions (int): Maximum number of partitions.
+
+  Returns:
+      List[List[int]]: The account reference IDs of every non-empty partition.
+  """
+  budgets: Dict[str, List[int]] = defaultdict(list)
+  for account_reference_id, budget_id in account_references:
+    budgets[budget_id].append(account_reference_id)
+
+  bins: List[List[int]] = [[] for _ in range(max(1, min(partitions, len(budgets))))]
+  for ids in sorted(budgets.values(), key=len, reverse=True):
+    min(bins, key=len).extend(ids)
+  return [ids for ids in bins if ids]
+
+
+async def select_account_references(
+  account_id: Optional[int] = None, user_id: Optional[int] = None
+) -> List[Tuple[int, str]]:
+  """
+  Returns the `(id, budget_id)` of one account reference, the ones of a user, or all of them.
+  """
+  statement = select(AccountReference.id, AccountReference.external_destination_budget_id).order_by(AccountReference.id)
+  if account_id is not None:
+    statement = statement.where(AccountReference.id == account_id)
+  if user_id is not None:
+    statement = statement.where(AccountReference.user_id == user_id)
+
+  async with async_session_maker() as session:
+    return [tuple(row) for row in await session.execute(statement)]
+
+
+def run_partition(command: str, account_reference_ids: List[int], options: Dict[str, Any]) -> Dict[str, Any]:
+  """
+  Runs the syncs or backfills of a partition in a process of the pool, in the background lane.
+  """
+  logging.basicConfig(level=logging.INFO)
+  with lane(BACKGROUND):
+    return asyncio.run(_run_partition(command, account_reference_ids, options))
+
+
+async def _run_partition(command: str, account_reference_ids: List[int], options: Dict[str, Any]) -> Dict[str, Any]:
+  started = time.monotonic()
+  archive = PayloadArchive(async_session_maker) if Settings.payload_archive else None
+  recorder = archive.record if archive else None
+  # Partitions share the hourly quota with each other and with the running workers
+  ynab = YNABClient(async_mode=True, recorder=recorder, limiter=shared_ynab_limiter(async_session_maker))
+  pluggy = PluggyAIClient(async_mode=True, recorder=recorder)
+
+  outbox = YNABOutboxService(ynab, async_session_maker)
+  transactions = TransactionsService(
+    ynab,
+    pluggy,
+    archive=archive,
+    cursors=SyncCursorService(async_session_maker),
+    outbox=outbox,
+    engine=engine,
+  )
+  backfills = BackfillService(transactions, async_session_maker)
+
+  summary = {"accounts": len(account_reference_ids), "created": 0, "skipped": 0, "failed": 0}
+  semaphore = asyncio.Semaphore(options["concurrency"])
+
+  async def run(account_reference_id: int):
+    async with semaphore:
+      async with async_session_maker() as session:
+        account_reference = await session.get(AccountReference, account_reference_id)
+
+      try:
+        if command == "sync":
+          summary["created"] += await transactions.sync(
+            account_reference, from_date=options["from_date"], to_date=options["to_date"], replay=options["replay"]
+          )
+        else:
+          summary["created"] += await backfills.backfill(account_reference, options["start"], options["end"])
+      except SyncInProgress as error:
+        logger.warning(str(error))
+        summary["skipped"] += 1
+      except Exception:
+        logger.exception(f"Failed to {command} account reference {account_reference_id}")
+        summary["failed"] += 1
+
+  outbox_flusher = asyncio.create_task(outbox.run())
+  try:
+    await asyncio.gather(*(run(account_reference_id) for account_reference_id in account_reference_ids))
+  finally:
+    outbox_flusher.cancel()
+    await asyncio.gather(outbox_flusher, return_exceptions=True)
+    await outbox.drain()
+    if archive:
+      await archive.flush()
+    await ynab.aclose()
+    await pluggy.async_close()
+    # Connections opened by this process's event loop are useless to the next partition run in it
+    await engine.dispose()
+
+  summary["seconds"] = time.monotonic() - started
+  return summary
+
+
+async def refresh_items(account_id: Optional[int], user_id: Optional[int], concurrency: int):
+  """
+  Refreshes the Pluggy items of the selected account references, enqueuing each sync as soon as its item is ready.
+  """
+  statement = select(AccountReference.external_source_id).distinct()
+  if account_id is not None:
+    statement = statement.where(AccountReference.id == account_id)
+  if user_id is not None:
+    statement = statement.where(AccountReference.user_id == user_id)
+
+  async with async_session_maker() as session:
+    item_ids = (await session.execute(statement)).scalars().all()
+
+  pluggy = PluggyAIClient(async_mode=True)
+  # No webhook reaches this process, items are polled until ready. `POST /refreshes` is woken by them instead.
+  refreshes = RefreshOrchestrator(
+    pluggy,
+    JobQueue(async_session_maker),
+    SyncCursorService(async_session_maker),
+    async_session_maker,
+    concurrency=concurrency,
+  )
+
+  started = time.monotonic()
+  try:
+    results = await refreshes.refresh(item_ids)
+  finally:
+    await pluggy.async_close()
+
+  for result in results:
+    outcome = result.error or f"{result.execution_status}, {result.syncs} syncs enqueued"
+    print(f"Item {result.item_id}: {outcome}")
+  print(f"Refreshed {len(results)} items in {time.monotonic() - started:.1f}s")
+
+
+def _parse_date(value: str) -> date:
+  return date.fromisoformat(value)
+
+
+def _parse_datetime(value: str) -> datetime:
+  return datetime.fromisoformat(value)
+
+
+def build_parser() -> argparse.ArgumentParser:
+  parser = argparse.ArgumentParser(
+    prog="python -m app.cli", description="Runs syncs, backfills and refreshes outside of the web workers."
+  )
+  commands = parser.add_subparsers(dest="command", required=True)
+
+  sync = commands.add_parser("sync", help="Imports the recent transactions")
+  sync.add_argument("--from", dest="from_date", type=_parse_datetime, help="Only transactions on or after this date")
+  sync.add_argument("--to", dest="to_date", type=_parse_datetime, help="Only transactions on or before this date")
+  sync.add_argument("--replay", action="store_true", help="Read Pluggy data from the payload archive")
+
+  backfill = commands.add_parser("backfill", help="Imports the history, one month window at a time")
+  backfill.add_argument("--start", type=_parse_date, required=True, help="First day of the history")
+  backfill.add_argument("--end", type=_parse_date, help="Last day of the history, defaults to today")
+
+  refresh = commands.add_parser("refresh", help="Refreshes the Pluggy items, then enqueues their syncs")
+  refresh.add_argument("--concurrency", type=int, default=5, help="Refreshes triggered at once")
+
+  for command in (sync, backfill, refresh):
+    target = command.add_mutually_exclusive_group(required=True)
+    target.add_argument("--account", type=int, help="Account reference ID")
+    target.add_argument("--user", type=int, help="User ID, for all of their account references")
+    target.add_argument("--all", action="store_true", help="Every account reference")
+
+  for command in (sync, backfill):
+    command.add_argument("--processes", type=int, default=os.cpu_count(), help="Processes, defaults to the cores")
+    command.add_argument(
+      "--concurrency", type=int, default=Settings.worker_concurrency, help="Account references run at once per process"
+    )
+
+  return parser
+
+
+def main(argv: Optional[List[str]] = None):
+  args = build_parser().parse_args(argv)
+  logging.basicConfig(level=logging.INFO)
+
+  if args.command == "refresh":
+    with lane(BACKGROUND):
+      asyncio.run(refresh_items(args.account, args.user, args.concurrency))
+    return
+
+  account_references = asyncio.run(select_account_references(args.account, args.user))
+  if not account_references:
+    print("No account references to run")
+    return
+
+  options = {"concurrency": args.concurrency}
+  if args.command == "sync":
+    options.update(from_date=args.from_date, to_date=args.to_date, replay=args.replay)
+  else:
+    options.update(start=args.start, end=args.end)
+
+  partitions = partition_by_budget(account_references, args.processes)
+  started = time.monotonic()
+  totals = {"accounts": 0, "created": 0, "skipped": 0, "failed": 0}
+
+  # Every process builds its own clients and connection pool, none are inherited
+  context = multiprocessing.get_context("spawn")
+  with ProcessPoolExecutor(max_workers=len(partitions), mp_context=context) as pool:
+    futures = {pool.submit(run_partition, args.command, ids, options): index for index, ids in enumerate(partitions)}
+    for future in as_completed(futures):
+      summary = future.result()
+      for key in totals:
+        totals[key] += summary[key]
+      print(
+        f"Partition {futures[future]}: {summary['accounts']} accounts, {summary['created']} transactions "
+        f"in {summary['seconds']:.1f}s ({summary['skipped']} skipped, {summary['failed']} failed)"
+      )
+
+  elapsed = time.monotonic() - started
+  print(
+    f"{args.command.capitalize()} of {totals['accounts']} accounts across {len(partitions)} processes: "
+    f"{totals['created']} transactions in {elapsed:.1f}s ({totals['created'] / elapsed:.1f}/s), "
+    f"{totals['skipped']} skipped, {totals['failed']} failed"
+  )
+
+
+if __name__ == "__main__":
+  main()
@@ -1,11 +1,17 @@
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config.database import async_session_maker
+from app.libs.offload import CpuExecutor
 from app.libs.pluggy.pluggy_client import PluggyAIClient
 from app.libs.ynab.ynab_client import YNABClient
+from app.services.budget_snapshot_service import BudgetSnapshotService
+from app.services.payload_archive import PayloadArchive
+from app.services.refresh_orchestrator import RefreshOrchestrator
+from app.services.webhook_service import WebhookService
+from app.services.ynab_outbox_service import YNABOutboxService
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
@@ -22,3 +28,27 @@ def get_ynab_client(request: Request) -> YNABClient:
 
 def get_pluggy_client(request: Request) -> PluggyAIClient:
   return request.app.state.pluggy_client
+
+
+def get_cpu_executor(request: Request) -> CpuExecutor:
+  return request.app.state.cpu_executor
+
+
+def get_budget_snapshots(request: Request) -> BudgetSnapshotService:
+  return request.app.state.budget_snapshots
+
+
+def get_payload_archive(request: Request) -> Optional[PayloadArchive]:
+  return request.app.state.payload_archive
+
+
+def get_ynab_outbox(request: Request) -> YNABOutboxService:
+  return request.app.state.ynab_outbox
+
+
+def get_webhook_service(request: Request) -> WebhookService:
+  return request.app.state.webhooks
+
+
+def get_refresh_orchestrator(request: Request) -> RefreshOrchestrator:
+  return request.app.state.refreshes
@@ -8,9 +8,28 @@ load_dotenv()
 class Settings:
   ynab_access_token: str = os.getenv("YNAB_ACCESS_TOKEN")
   ynab_async_mode: bool = os.getenv("YNAB_ASYNC_MODE", False)
+  ynab_cache_size: int = int(os.getenv("YNAB_CACHE_SIZE", 256))
+  ynab_hourly_quota: int = int(os.getenv("YNAB_HOURLY_QUOTA", 200))
   pluggy_client_id: str = os.getenv("PLUGGY_CLIENT_ID")
   pluggy_client_secret: str = os.getenv("PLUGGY_CLIENT_SECRET")
   pluggy_async_mode: bool = os.getenv("PLUGGY_ASYNC_MODE", False)
+  pluggy_cache_size: int = int(os.getenv("PLUGGY_CACHE_SIZE", 256))
+  pluggy_webhook_secret: str = os.getenv("PLUGGY_WEBHOOK_SECRET")
+  refresh_api_token: str = os.getenv("REFRESH_API_TOKEN")
+
+  upstream_max_connections: int = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", 10))
+  interactive_reserved_connections: int = int(os.getenv("INTERACTIVE_RESERVED_CONNECTIONS", 2))
+  interactive_reserved_quota: float = float(os.getenv("INTERACTIVE_RESERVED_QUOTA", 0.25))
+
+  offload_workers: int = int(os.getenv("OFFLOAD_WORKERS", 2))
+  offload_min_bytes: int = int(os.getenv("OFFLOAD_MIN_BYTES", 1_000_000))
+  offload_min_items: int = int(os.getenv("OFFLOAD_MIN_ITEMS", 5000))
+
+  worker_concurrency: int = int(os.getenv("WORKER_CONCURRENCY", 4))
+  job_visibility_timeout: int = int(os.getenv("JOB_VISIBILITY_TIMEOUT", 300))
+  sync_debounce_window: int = int(os.getenv("SYNC_DEBOUNCE_WINDOW", 30))
+
+  payload_archive: bool = os.getenv("PAYLOAD_ARCHIVE", "false").lower() == "true"
 
   debug: bool = os.getenv("DEBUG")
 
@@ -0,0 +1,134 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from pydantic import BaseModel
+
+
+def make_key(url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[str, Tuple]:
+  """
+  Builds a hashable cache key out of a request path and its query parameters.
+
+  Args:
+      url (str): The request path.
+      params (dict, optional): The query parameters.
+
+  Returns:
+      tuple: The cache key. The path is always the first element.
+  """
+  return url, tuple(sorted((params or {}).items()))
+
+
+class ResponseCache:
+  """
+  A size-bounded LRU cache with per-entry TTLs for slowly-changing API reads.
+
+  Keys are tuples whose first element is the request path (see `make_key`), which is what
+  `invalidate` matches against. Every hit is a deep copy, so callers mutating a result never alter the entry.
+  """
+
+  def __init__(self, max_size: int = 256, default_ttl: float = 60):
+    """
+    Initializes the cache.
+
+    Args:
+        max_size (int): Maximum number of entries kept; the least recently used one is evicted first.
+        default_ttl (float): Seconds an entry stays fresh when `set` is called without a TTL.
+    """
+    self.max_size = max_size
+    self.default_ttl = default_ttl
+    self.hits = 0
+    self.misses = 0
+
+    self._entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+    self._lock = threading.Lock()
+
+  def __len__(self) -> int:
+    return len(self._entries)
+
+  def get(self, key: Hashable) -> Optional[Any]:
+    """
+    Returns a copy of the fresh value stored under `key`, or None on a miss.
+    """
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None or entry[0] < time.monotonic():
+        if entry is not None:
+          del self._entries[key]
+        self.misses += 1
+        return None
+
+      self._entries.move_to_end(key)
+      self.hits += 1
+      value = entry[1]
+
+    return _copy(value)
+
+  def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+    """
+    Stores `value` under `key` for `ttl` seconds, evicting the least recently used entries if needed.
+    """
+    expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+
+    with self._lock:
+      self._entries[key] = (expires_at, value)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_size:
+        self._entries.popitem(last=False)
+
+  def discard(self, key: Hashable):
+    """
+    Drops the entry stored under `key`, if any.
+    """
+    with self._lock:
+      self._entries.pop(key, None)
+
+  def invalidate(self, path: str, descendants: bool = True) -> int:
+    """
+    Drops every entry cached for `path`, whatever its query parameters.
+
+    Args:
+        path (str): The request path to invalidate.
+        descendants (bool): Whether entries for sub-paths (`path/...`) are dropped as well.
+
+    Returns:
+        int: The number of entries dropped.
+    """
+    nested = f"{path.rstrip('/')}/"
+
+    with self._lock:
+      stale = [
+        key
+        for key in self._entries
+        if isinstance(key, tuple) and (key[0] == path or (descendants and key[0].startswith(nested)))
+      ]
+      for key in stale:
+        del self._entries[key]
+
+    return len(stale)
+
+  def clear(self):
+    """
+    Drops every entry and resets the counters.
+    """
+    with self._lock:
+      self._entries.clear()
+      self.hits = 0
+      self.misses = 0
+
+  @property
+  def stats(self) -> Dict[str, int]:
+    """
+    Hit/miss counters and the current size of the cache.
+    """
+    return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+def _copy(value: Any) -> Any:
+  if isinstance(value, BaseModel):
+    return value.model_copy(deep=True)
+  if isinstance(value, list):
+    return [_copy(item) for item in value]
+  return copy.deepcopy(value)
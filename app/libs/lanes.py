@@ -0,0 +1,241 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Deque, Iterator, Optional
+
+import httpx
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Lane of the upstream calls made from the current context. Tasks and threads inherit it when they start.
+current_lane: ContextVar[str] = ContextVar("current_lane", default=INTERACTIVE)
+
+# Takes a request of a quota shared with other processes, for an interactive call or not. Returns None once taken,
+# or the seconds to wait before trying again.
+SharedQuota = Callable[[bool], Awaitable[Optional[float]]]
+
+
+@contextmanager
+def lane(name: str) -> Iterator[None]:
+  """
+  Runs the block in a lane, e.g. `with lane(BACKGROUND):` around a sync.
+  """
+  if name not in (INTERACTIVE, BACKGROUND):
+    raise ValueError(f"Unknown lane: {name}")
+
+  token = current_lane.set(name)
+  try:
+    yield
+  finally:
+    current_lane.reset(token)
+
+
+class LaneLimiter:
+  """
+  Shares the connections and the rate limit of an upstream API between the interactive and background lanes.
+
+  Background calls never take the last `reserved_connections` connections, nor the last `reserved_quota` share of
+  the requests allowed per `period`. Interactive calls can use everything, so a user-facing call only ever waits
+  behind other interactive calls, whatever the sync load.
+
+  The quota is counted per process, unless a `shared_quota` counts it across every process using the API token,
+  e.g. a `QuotaBucket`. The shared quota is async, so a limiter with one only serves async calls: sync calls raise
+  rather than silently skip it.
+  """
+
+  # Seconds between two checks of a full lane
+  POLL_INTERVAL = 0.05
+
+  def __init__(
+    self,
+    max_connections: int,
+    reserved_connections: int,
+    quota: Optional[int] = None,
+    period: float = 3600,
+    reserved_quota: float = 0,
+    shared_quota: Optional[SharedQuota] = None,
+  ):
+    """
+    Args:
+        max_connections (int): Upstream requests in flight at once, over both lanes.
+        reserved_connections (int): Connections only interactive calls can use.
+        quota (int, optional): Requests allowed per period in this process, over both lanes. Unlimited if not set.
+        period (float): Seconds the quota is counted over.
+        reserved_quota (float): Share of the quota only interactive calls can use, between 0 and 1.
+        shared_quota (SharedQuota, optional): Quota shared with other processes, taken before every async call.
+    """
+    if not 0 <= reserved_connections < max_connections:
+      raise ValueError("The reserved connections must leave at least one for background calls")
+    if not 0 <= reserved_quota < 1:
+      raise ValueError("The reserved quota must leave a share for background calls")
+
+    self.max_connections = max_connections
+    self.reserved_connections = reserved_connections
+    self.quota = quota
+    self.period = period
+    self.reserved_quota = reserved_quota
+    self.shared_quota = shared_quota
+
+    self.in_flight = 0
+    self._sent: Deque[float] = deque()
+    self._lock = threading.Lock()
+
+  def acquire(self, name: Optional[str] = None):
+    """
+    Blocks until a request of the lane can be sent.
+
+    Raises:
+        RuntimeError: If the limiter takes a shared quota, which sync calls cannot wait on.
+    """
+    if self.shared_quota is not None:
+      raise RuntimeError("A limiter with a shared quota only serves async calls")
+
+    while (wait := self._try_acquire(name or current_lane.get())) is not None:
+      time.sleep(wait)
+
+  async def async_acquire(self, name: Optional[str] = None):
+    """
+    Waits until a request of the lane can be sent.
+    """
+    name = name or current_lane.get()
+    # The shared quota is taken first, so no connection is held while waiting on it
+    if self.shared_quota is not None:
+      while (wait := await self.shared_quota(name == INTERACTIVE)) is not None:
+        await asyncio.sleep(wait)
+
+    while (wait := self._try_acquire(name)) is not None:
+      await asyncio.sleep(wait)
+
+  def release(self):
+    with self._lock:
+      self.in_flight -= 1
+
+  def _try_acquire(self, name: str) -> Optional[float]:
+    # Takes a connection and a request of the quota, or returns the seconds to wait before trying again
+    interactive = name == INTERACTIVE
+    connections = self.max_connections if interactive else self.max_connections - self.reserved_connections
+
+    with self._lock:
+      now = time.monotonic()
+      while self._sent and self._sent[0] <= now - self.period:
+        self._sent.popleft()
+
+      if self.quota is not None:
+        quota = self.quota if interactive else int(self.quota * (1 - self.reserved_quota))
+        if len(self._sent) >= quota:
+          # Requests sent past the lane quota expire first, then one slot frees up
+          expires_at = self._sent[len(self._sent) - quota] + self.period
+          return max(expires_at - now, self.POLL_INTERVAL)
+
+      if self.in_flight >= connections:
+        return self.POLL_INTERVAL
+
+      self.in_flight += 1
+      if self.quota is not None:
+        self._sent.append(now)
+      return None
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+  # Response body that gives its connection back to the limiter once closed, whether read in full or streamed
+  def __init__(self, stream: httpx.AsyncByteStream, limiter: LaneLimiter):
+    self.stream = stream
+    self.limiter = limiter
+    self.released = False
+
+  async def __aiter__(self):
+    async for chunk in self.stream:
+      yield chunk
+
+  async def aclose(self):
+    try:
+      await self.stream.aclose()
+    finally:
+      if not self.released:
+        self.released = True
+        self.limiter.release()
+
+
+class _SyncReleasingStream(httpx.SyncByteStream):
+  # Sync counterpart of `_ReleasingStream`
+  def __init__(self, stream: httpx.SyncByteStream, limiter: LaneLimiter):
+    self.stream = stream
+    self.limiter = limiter
+    self.released = False
+
+  def __iter__(self):
+    yield from self.stream
+
+  def close(self):
+    try:
+      self.stream.close()
+    finally:
+      if not self.released:
+        self.released = True
+        self.limiter.release()
+
+
+class LaneTransport(httpx.AsyncBaseTransport):
+  """
+  Async httpx transport sending every request through a `LaneLimiter`, in the lane of the calling context.
+
+  The connection is held until the response is closed, which httpx does once the body is read, or when a
+  `client.stream(...)` block exits. Streamed bodies are never buffered.
+  """
+
+  def __init__(self, limiter: LaneLimiter, transport: Optional[httpx.AsyncBaseTransport] = None):
+    self.limiter = limiter
+    self.transport = transport or httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=limiter.max_connections))
+
+  async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+    await self.limiter.async_acquire()
+    try:
+      response = await self.transport.handle_async_request(request)
+    except BaseException:
+      self.limiter.release()
+      raise
+
+    if response.is_closed:
+      # The body came preloaded, nothing holds the connection
+      self.limiter.release()
+    else:
+      response.stream = _ReleasingStream(response.stream, self.limiter)
+    return response
+
+  async def aclose(self):
+    await self.transport.aclose()
+
+
+class SyncLaneTransport(httpx.BaseTransport):
+  """
+  Sync counterpart of `LaneTransport`. Refuses limiters taking a shared quota, which only async calls can wait on.
+  """
+
+  def __init__(self, limiter: LaneLimiter, transport: Optional[httpx.BaseTransport] = None):
+    if limiter.shared_quota is not None:
+      raise ValueError("A limiter with a shared quota only serves async clients, pass `async_mode=True`")
+
+    self.limiter = limiter
+    self.transport = transport or httpx.HTTPTransport(limits=httpx.Limits(max_connections=limiter.max_connections))
+
+  def handle_request(self, request: httpx.Request) -> httpx.Response:
+    self.limiter.acquire()
+    try:
+      response = self.transport.handle_request(request)
+    except BaseException:
+      self.limiter.release()
+      raise
+
+    if response.is_closed:
+      # The body came preloaded, nothing holds the connection
+      self.limiter.release()
+    else:
+      response.stream = _SyncReleasingStream(response.stream, self.limiter)
+    return response
+
+  def close(self):
+    self.transport.close()
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, TypeVar, Union
+
+from app.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CpuExecutor:
+  """
+  Runs CPU-bound stages, such as validating a whole budget or matching large batches, off the event loop.
+
+  Small inputs are processed inline, where a round trip to another process would cost more than the work itself.
+  Past a threshold they are sent to a process pool, so the event loop keeps serving requests meanwhile.
+
+  The event loop still pickles the inputs and unpickles the results, holding the GIL. Stages take raw bytes or
+  tuples of ints and short strings, and return plain dicts, arrays or counts. Never Pydantic models: rebuilding
+  them from a pickle takes longer than validating them inline.
+
+  A pool broken by a dying worker is replaced, and the stage retried in the new one.
+  """
+
+  # Times a stage is retried in a new pool after breaking one
+  RETRIES = 1
+
+  def __init__(
+    self, max_workers: Optional[int] = None, min_bytes: Optional[int] = None, min_items: Optional[int] = None
+  ):
+    """
+    Args:
+        max_workers (int, optional): Processes of the pool. Defaults to `Settings.offload_workers`.
+        min_bytes (int, optional): Smallest raw body parsed in the pool. Defaults to `Settings.offload_min_bytes`.
+        min_items (int, optional): Smallest batch processed in the pool. Defaults to `Settings.offload_min_items`.
+    """
+    self.max_workers = max_workers or Settings.offload_workers
+    self.min_bytes = Settings.offload_min_bytes if min_bytes is None else min_bytes
+    self.min_items = Settings.offload_min_items if min_items is None else min_items
+    self.pool: Optional[ProcessPoolExecutor] = None
+
+  async def parse(self, fn: Callable[..., T], content: Union[bytes, str], *args: Any) -> T:
+    """
+    Calls `fn(content, *args)` on a raw body, in the pool once the body reaches `min_bytes`.
+    """
+    if len(content) < self.min_bytes:
+      return fn(content, *args)
+    return await self._submit(fn, content, *args)
+
+  async def run(self, fn: Callable[..., T], *args: Any, items: int) -> T:
+    """
+    Calls `fn(*args)`, in the pool once the batch reaches `min_items`.
+
+    Args:
+        fn (Callable): A module-level function.
+        *args: Its arguments, compact and picklable.
+        items (int): The size of the batch, e.g. the number of transactions.
+    """
+    if items < self.min_items:
+      return fn(*args)
+    return await self._submit(fn, *args)
+
+  def shutdown(self):
+    """
+    Stops the pool, if it was started.
+    """
+    if self.pool is not None:
+      self.pool.shutdown(cancel_futures=True)
+      self.pool = None
+
+  async def _submit(self, fn: Callable[..., T], *args: Any) -> T:
+    for attempt in range(self.RETRIES + 1):
+      pool = self._pool()
+      try:
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+      except BrokenProcessPool:
+        # A worker died, e.g. killed for its memory, and took the pool down with it. The next call starts a new one.
+        if self.pool is pool:
+          pool.shutdown(wait=False, cancel_futures=True)
+          self.pool = None
+        if attempt == self.RETRIES:
+          raise
+        logger.warning(f"Process pool broke running {fn.__name__}, retrying in a new one")
+
+  def _pool(self) -> ProcessPoolExecutor:
+    if self.pool is None:
+      # Workers start from a clean interpreter instead of a copy of the web worker
+      self.pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+    return self.pool
@@ -0,0 +1,123 @@
+from typing import Optional
+
+from app.libs.cache import ResponseCache, make_key
+from app.libs.serialization import parse_json
+
+from ..models.account import Account, ListAccountsResponse
+from ..session_manager import SessionManager
+
+
+class AccountsClient:
+  """
+  Client for interacting with the Account endpoints of the Pluggy API.
+  """
+
+  # Seconds the accounts of an item are served from the cache.
+  ACCOUNTS_TTL = 300
+
+  def __init__(self, session: SessionManager, cache: Optional[ResponseCache] = None):
+    """
+    Initializes the AccountsClient.
+
+    Args:
+        session (SessionManager): An instance of SessionManager.
+        cache (ResponseCache, optional): Cache for the item accounts. Caching is disabled when omitted.
+    """
+    self.session = session
+    self.cache = cache
+
+  def list_accounts(self, item_id: str, type: Optional[str] = None) -> ListAccountsResponse:
+    """
+    Lists the accounts of an item, along with their balances and type.
+
+    Args:
+        item_id (str): Item primary identifier.
+        type (str, optional): Only return accounts of this type (`BANK` or `CREDIT`).
+
+    Returns:
+        ListAccountsResponse: The response containing the item accounts.
+
+    Raises:
+        httpx.HTTPStatusError: If the request fails.
+    """
+    url, params = self._list_request(item_id, type)
+    key = make_key(url, params)
+
+    accounts = self.cache.get(key) if self.cache is not None else None
+    if accounts is not None:
+      return accounts
+
+    response = self.session.request_sync("GET", url, params=params, record=True)
+    accounts = parse_json(response, ListAccountsResponse)
+
+    if self.cache is not None:
+      self.cache.set(key, accounts, ttl=self.ACCOUNTS_TTL)
+    return accounts
+
+  async def async_list_accounts(self, item_id: str, type: Optional[str] = None) -> ListAccountsResponse:
+    """
+    Asynchronously lists the accounts of an item, along with their balances and type.
+
+    Args:
+        item_id (str): Item primary identifier.
+        type (str, optional): Only return accounts of this type (`BANK` or `CREDIT`).
+
+    Returns:
+        ListAccountsResponse: The response containing the item accounts.
+
+    Raises:
+        httpx.HTTPStatusError: If the request fails.
+    """
+    url, params = self._list_request(item_id, type)
+    key = make_key(url, params)
+
+    accounts = self.cache.get(key) if self.cache is not None else None
+    if accounts is not None:
+      return accounts
+
+    response = await self.session.request_async("GET", url, params=params, record=True)
+    accounts = parse_json(response, ListAccountsResponse)
+
+    if self.cache is not None:
+      self.cache.set(key, accounts, ttl=self.ACCOUNTS_TTL)
+    return accounts
+
+  def get_account(self, account_id: str) -> Account:
+    """
+    Retrieves a specific account by its ID.
+
+    Args:
+        account_id (str): The ID of the account to retrieve.
+
+    Returns:
+        Account: The retrieved account.
+
+    Raises:
+        httpx.HTTPStatusError: If the request fails.
+    """
+    url = f"/accounts/{account_id}"
+    response = self.session.request_sync("GET", url)
+    return parse_json(response, Account)
+
+  async def async_get_account(self, account_id: str) -> Account:
+    """
+    Asynchronously retrieves a specific account by its ID.
+
+    Args:
+        account_id (str): The ID of the account to retrieve.
+
+    Returns:
+        Account: The retrieved account.
+
+    Raises:
+        httpx.HTTPStatusError: If the request fails.
+    """
+    url = f"/accounts/{account_id}"
+    response = await self.session.request_async("GET", url)
+    return parse_json(response, Account)
+
+  def _list_request(self, item_id: str, type: Optional[str]):
+    params = {"itemId": item_id}
+    if type:
+      params["type"] = type
+    return "/accounts", params
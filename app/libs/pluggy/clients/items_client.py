@@ -1,4 +1,9 @@
-from ..models.item import Item
+from typing import Any, Dict, Optional
+
+from app.libs.cache import ResponseCache, make_key
+from app.libs.serialization import parse_json
+
+from ..models.item import Item, ItemStatus
 from ..session_manager import SessionManager
 
 
@@ -7,14 +12,19 @@ class ItemsClient:
   Client for interacting with the Item endpoints of the Pluggy API.
   """
 
-  def __init__(self, session: SessionManager):
+  # Seconds a fetched item is served from the cache.
+  ITEM_TTL = 60
+
+  def __init__(self, session: SessionManager, cache: Optional[ResponseCache] = None):
     """
     Initializes the ItemClient.
 
     Args:
         session (SessionManager): An instance of BaseClient.
+        cache (ResponseCache, optional): Cache for item reads. Caching is disabled when omitted.
     """
     self.session = session
+    self.cache = cache
 
   def get_item(self, item_id: str) -> Item:
     """
@@ -30,9 +40,16 @@ class ItemsClient:
         httpx.HTTPStatusError: If the request fails.
     """
     url = f"/items/{item_id}"
+    item = self.cache.get(make_key(url)) if self.cache is not None else None
+    if item is not None:
+      return item
+
     response = self.session.request_sync("GET", url)
+    item = parse_json(response, Item)
 
-    return Item(**response)
+    if self.cache is not None:
+      self.cache.set(make_key(url), item, ttl=self.ITEM_TTL)
+    return item
 
   async def async_get_item(self, item_id: str) -> Item:
     """
@@ -44,10 +61,103 @@ class ItemsClient:
     Returns:
         Item: The retrieved item.
 
+    Raises:
+        httpx.HTTPStatusError: If the request fails.
+    """
+    url = f"/items/{item_id}"
+    item = self.cache.get(make_key(url)) if self.cache is not None else None
+    if item is not None:
+      return item
+
+    response = await self.session.request_async("GET", url)
+    item = parse_json(response, Item)
+
+    if self.cache is not None:
+      self.cache.set(make_key(url), item, ttl=self.ITEM_TTL)
+    return item
+
+  def get_item_status(self, item_id: str) -> ItemStatus:
+    """
+    Retrieves the sync status of an item, skipping the connector and the rest of the item payload.
+
+    Unlike `get_item`, the status is never served from the cache.
+
+    Args:
+        item_id (str): The ID of the item.
+
+    Returns:
+        ItemStatus: The item status.
+
+    Raises:
+        httpx.HTTPStatusError: If the request fails.
+    """
+    url = f"/items/{item_id}"
+    response = self.session.request_sync("GET", url)
+    return parse_json(response, ItemStatus)
+
+  async def async_get_item_status(self, item_id: str) -> ItemStatus:
+    """
+    Asynchronously retrieves the sync status of an item, skipping the connector and the rest of the item payload.
+
+    Unlike `async_get_item`, the status is never served from the cache.
+
+    Args:
+        item_id (str): The ID of the item.
+
+    Returns:
+        ItemStatus: The item status.
+
     Raises:
         httpx.HTTPStatusError: If the request fails.
     """
     url = f"/items/{item_id}"
     response = await self.session.request_async("GET", url)
+    return parse_json(response, ItemStatus)
+
+  def update_item(self, item_id: str, parameters: Optional[Dict[str, Any]] = None) -> Item:
+    """
+    Triggers a refresh of an item, whose data is then fetched again from the institution.
+
+    The item is `UPDATING` until the refresh finishes, see `get_item_status`.
+
+    Args:
+        item_id (str): The ID of the item to refresh.
+        parameters (dict, optional): New credentials, when the previous ones were rejected.
+
+    Returns:
+        Item: The item, with the refresh started.
+
+    Raises:
+        httpx.HTTPStatusError: If the request fails.
+    """
+    body = {"parameters": parameters} if parameters else {}
+    response = self.session.request_sync("PATCH", f"/items/{item_id}", json=body)
+    self._invalidate(item_id)
+    return parse_json(response, Item)
+
+  async def async_update_item(self, item_id: str, parameters: Optional[Dict[str, Any]] = None) -> Item:
+    """
+    Asynchronously triggers a refresh of an item, whose data is then fetched again from the institution.
+
+    The item is `UPDATING` until the refresh finishes, see `async_get_item_status`.
+
+    Args:
+        item_id (str): The ID of the item to refresh.
+        parameters (dict, optional): New credentials, when the previous ones were rejected.
+
+    Returns:
+        Item: The item, with the refresh started.
+
+    Raises:
+        httpx.HTTPStatusError: If the request fails.
+    """
+    body = {"parameters": parameters} if parameters else {}
+    response = await self.session.request_async("PATCH", f"/items/{item_id}", json=body)
+    self._invalidate(item_id)
+    return parse_json(response, Item)
 
-    return Item(**response)
+  def _invalidate(self, item_id: str):
+    # The cached item and accounts predate the refresh
+    if self.cache is not None:
+      self.cache.invalidate(f"/items/{item_id}")
+      self.cache.invalidate("/accounts")
@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Union
 
-from ..models.transaction import GetTransactionResponse, ListTransactionsResponse
+from app.libs.serialization import parse_json
+
+from ..models.transaction import GetTransactionResponse, LeanListTransactionsResponse, ListTransactionsResponse
 from ..session_manager import SessionManager
 
 
@@ -26,7 +28,8 @@ class TransactionClient:
     to_date: Optional[datetime] = None,
     page_size: Optional[int] = 20,
     page: Optional[int] = 1,
-  ) -> ListTransactionsResponse:
+    lean: bool = False,
+  ) -> Union[ListTransactionsResponse, LeanListTransactionsResponse]:
     """
     Lists all transactions for a specific account.
 
@@ -36,9 +39,11 @@ class TransactionClient:
         to_date (datetime, optional): Filter transactions up to this date (inclusive).
         page_size (int, optional): Number of transactions per page.
         page (int, optional): Page number.
+        lean (bool): Whether to parse the transactions into the lighter `LeanTransaction` projection.
 
     Returns:
-        ListTransactionsResponse: The response containing transactions and pagination details.
+        ListTransactionsResponse: The response containing transactions and pagination details,
+            or a `LeanListTransactionsResponse` when `lean` is set.
 
     Raises:
         httpx.HTTPStatusError: If the request fails.
@@ -54,8 +59,8 @@ class TransactionClient:
     if to_date:
       params["to"] = to_date.strftime("%Y-%m-%d")
 
-    response = self.session.request_sync("GET", url, params=params)
-    return ListTransactionsResponse(**response)
+    response = self.session.request_sync("GET", url, params=params, record=True)
+    return parse_json(response, LeanListTransactionsResponse if lean else ListTransactionsResponse)
 
   async def async_list_transactions(
     self,
@@ -64,7 +69,8 @@ class TransactionClient:
     to_date: Optional[datetime] = None,
     page_size: Optional[int] = 20,
     page: Optional[int] = 1,
-  ) -> ListTransactionsResponse:
+    lean: bool = False,
+  ) -> Union[ListTransactionsResponse, LeanListTransactionsResponse]:
     """
     Asynchronously lists all transactions for a specific account.
 
@@ -74,9 +80,11 @@ class TransactionClient:
         to_date (datetime, optional): Filter transactions up to this date (inclusive).
         page_size (int, optional): Number of transactions per page.
         page (int, optional): Page number.
+        lean (bool): Whether to parse the transactions into the lighter `LeanTransaction` projection.
 
     Returns:
-        ListTransactionsResponse: The response containing transactions and pagination details.
+        ListTransactionsResponse: The response containing transactions and pagination details,
+            or a `LeanListTransactionsResponse` when `lean` is set.
 
     Raises:
         httpx.HTTPStatusError: If the request fails.
@@ -92,8 +100,8 @@ class TransactionClient:
     if to_date:
       params["to"] = to_date.strftime("%Y-%m-%d")
 
-    response = await self.session.request_async("GET", url, params=params)
-    return ListTransactionsResponse(**response)
+    response = await self.session.request_async("GET", url, params=params, record=True)
+    return parse_json(response, LeanListTransactionsResponse if lean else ListTransactionsResponse)
 
   def get_transaction(self, transaction_id: str) -> GetTransactionResponse:
     """
@@ -110,7 +118,7 @@ class TransactionClient:
     """
     url = f"/transactions/{transaction_id}"
     response = self.session.request_sync("GET", url)
-    return GetTransactionResponse(**response)
+    return parse_json(response, GetTransactionResponse)
 
   async def async_get_transaction(self, transaction_id: str) -> GetTransactionResponse:
     """
@@ -127,4 +135,4 @@ class TransactionClient:
     """
     url = f"/transactions/{transaction_id}"
     response = await self.session.request_async("GET", url)
-    return GetTransactionResponse(**response)
+    return parse_json(response, GetTransactionResponse)
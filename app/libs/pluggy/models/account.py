@@ -0,0 +1,45 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class BankData(BaseModel):
+  transferNumber: Optional[str]
+  closingBalance: Optional[float]
+  automaticallyInvestedBalance: Optional[float]
+
+
+class CreditData(BaseModel):
+  level: Optional[str]
+  brand: Optional[str]
+  balanceCloseDate: Optional[str]
+  balanceDueDate: Optional[str]
+  availableCreditLimit: Optional[float]
+  balanceForeignCurrency: Optional[float]
+  minimumPayment: Optional[float]
+  creditLimit: Optional[float]
+  status: Optional[str]
+  holderType: Optional[str]
+
+
+class Account(BaseModel):
+  id: str
+  type: str
+  subtype: str
+  number: str
+  name: str
+  marketingName: Optional[str]
+  balance: float
+  itemId: str
+  taxNumber: Optional[str]
+  owner: Optional[str]
+  currencyCode: str
+  bankData: Optional[BankData]
+  creditData: Optional[CreditData]
+
+
+class ListAccountsResponse(BaseModel):
+  total: int
+  totalPages: int
+  page: int
+  results: List[Account]
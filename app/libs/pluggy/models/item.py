@@ -1,6 +1,11 @@
-from typing import List, Optional
+from typing import Any, List, Optional
 
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, HttpUrl, ValidatorFunctionWrapHandler, field_validator
+
+from app.libs.cache import ResponseCache
+
+# Connectors barely change, so they are validated once and reused across items, keyed by `Connector.id`
+connector_cache = ResponseCache(max_size=512, default_ttl=6 * 60 * 60)
 
 
 class Credential(BaseModel):
@@ -80,3 +85,32 @@ class Item(BaseModel):
   consentExpiresAt: Optional[str]
   products: List[str]
   oauthRedirectUri: Optional[HttpUrl]
+
+  @field_validator("connector", mode="wrap")
+  @classmethod
+  def reuse_cached_connector(cls, value: Any, handler: ValidatorFunctionWrapHandler) -> Connector:
+    if isinstance(value, dict):
+      cached = connector_cache.get(value.get("id"))
+      if cached is not None and cached.updatedAt == value.get("updatedAt"):
+        return cached
+
+    connector = handler(value)
+    connector_cache.set(connector.id, connector)
+    return connector
+
+
+class ItemStatusDetail(BaseModel):
+  transactions: Optional[StatusDetailSub] = None
+
+
+class ItemStatus(BaseModel):
+  """
+  Lean view of an Item, holding only what sync scheduling needs.
+  """
+
+  id: str
+  status: str
+  executionStatus: str
+  lastUpdatedAt: Optional[str] = None
+  nextAutoSyncAt: Optional[str] = None
+  statusDetail: Optional[ItemStatusDetail] = None
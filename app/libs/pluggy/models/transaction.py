@@ -60,6 +60,22 @@ class Transaction(BaseModel):
   updatedAt: datetime
 
 
+class LeanTransaction(BaseModel):
+  """
+  Lean projection of a transaction for hot paths, skipping payment data and the other nested objects.
+  """
+
+  id: str
+  description: str
+  currencyCode: str
+  amount: float
+  amountInAccountCurrency: Optional[float] = None
+  date: datetime
+  accountId: str
+  status: str
+  type: str
+
+
 class ListTransactionsResponse(BaseModel):
   total: int
   totalPages: int
@@ -67,5 +83,12 @@ class ListTransactionsResponse(BaseModel):
   results: List[Transaction]
 
 
+class LeanListTransactionsResponse(BaseModel):
+  total: int
+  totalPages: int
+  page: int
+  results: List[LeanTransaction]
+
+
 class GetTransactionResponse(Transaction):
   pass
@@ -0,0 +1,18 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class WebhookEvent(BaseModel):
+  """
+  Notification Pluggy posts to the `webhookUrl` of an item or connect token.
+  """
+
+  event: str
+  eventId: Optional[str] = None
+  itemId: Optional[str] = None
+  accountId: Optional[str] = None
+  triggeredBy: Optional[str] = None
+  clientUserId: Optional[str] = None
+  # Only set on `transactions/*` events: when Pluggy created the transactions, not their date
+  transactionsCreatedAtFrom: Optional[str] = None
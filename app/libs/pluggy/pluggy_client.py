@@ -1,5 +1,11 @@
 from typing import Optional
 
+from app.config.settings import Settings
+from app.libs.cache import ResponseCache
+from app.libs.lanes import LaneLimiter
+from app.libs.recorder import PayloadRecorder
+
+from .clients.accounts_client import AccountsClient
 from .clients.items_client import ItemsClient
 from .clients.transactions_client import TransactionClient
 from .session_manager import SessionManager
@@ -15,6 +21,9 @@ class PluggyAIClient:
     client_id: Optional[str] = None,
     client_secret: Optional[str] = None,
     async_mode: bool = False,
+    cache_size: Optional[int] = None,
+    recorder: Optional[PayloadRecorder] = None,
+    limiter: Optional[LaneLimiter] = None,
   ):
     """
     Initializes the PluggyAIClient with client credentials and a list of item IDs.
@@ -23,14 +32,23 @@ class PluggyAIClient:
         client_id (str, optional): Pluggy API client ID.
         client_secret (str, optional): Pluggy API client secret.
         async_mode (bool): If True, uses an asynchronous HTTP client.
+        cache_size (int, optional): Maximum number of cached reads. 0 disables the response cache.
+        recorder (PayloadRecorder, optional): Receives the raw transactions and accounts pages, e.g. to archive them.
+        limiter (LaneLimiter, optional): Shares the connections between interactive and background calls.
     """
     self.session = SessionManager(
       client_id=client_id,
       client_secret=client_secret,
       async_mode=async_mode,
+      recorder=recorder,
+      limiter=limiter,
     )
 
-    self.items = ItemsClient(self.session)
+    cache_size = Settings.pluggy_cache_size if cache_size is None else cache_size
+    self.cache = ResponseCache(max_size=cache_size) if cache_size else None
+
+    self.items = ItemsClient(self.session, cache=self.cache)
+    self.accounts = AccountsClient(self.session, cache=self.cache)
     self.transactions = TransactionClient(self.session)
 
   def close(self):
@@ -4,6 +4,10 @@ from typing import Any, Dict, Optional
 import httpx
 
 from app.config.settings import Settings
+from app.libs.lanes import LaneLimiter, LaneTransport, SyncLaneTransport
+from app.libs.recorder import PayloadRecorder
+from app.libs.serialization import parse_json
+from app.libs.single_flight import SingleFlight, request_key
 
 from .models.auth import AuthRequest, AuthResponse
 
@@ -20,6 +24,8 @@ class SessionManager:
     client_id: Optional[str] = None,
     client_secret: Optional[str] = None,
     async_mode: bool = False,
+    recorder: Optional[PayloadRecorder] = None,
+    limiter: Optional[LaneLimiter] = None,
   ):
     """
     Initializes a Session with client credentials.
@@ -28,6 +34,9 @@ class SessionManager:
         client_id (str, optional): Pluggy API client ID.
         client_secret (str, optional): Pluggy API client secret.
         async_mode (bool): If True, uses an asynchronous HTTP client.
+        recorder (PayloadRecorder, optional): Receives the raw body of the requests made with `record=True`.
+        limiter (LaneLimiter, optional): Shares the connections between interactive and background calls.
+            Defaults to one reserving `Settings.interactive_reserved_connections` for interactive calls.
     """
     self.client_id = client_id or Settings.pluggy_client_id
     self.client_secret = client_secret or Settings.pluggy_client_secret
@@ -41,21 +50,24 @@ class SessionManager:
     self.api_key: Optional[str] = None
     self.api_key_expires_at: float = 0
 
-    self.session = httpx.Client(
-      base_url=self.BASE_URL,
-      headers={"Content-Type": "application/json"},
-    )
+    self.single_flight = SingleFlight()
+    self.recorder = recorder
+
+    # Pluggy publishes no request quota, only the connections are shared
+    self.limiter = limiter or LaneLimiter(Settings.upstream_max_connections, Settings.interactive_reserved_connections)
 
-    # if self.async_mode:
-    #   self.session = httpx.AsyncClient(
-    #     base_url=self.BASE_URL,
-    #     headers={"Content-Type": "application/json"},
-    #   )
-    # else:
-    #   self.session = httpx.Client(
-    #     base_url=self.BASE_URL,
-    #     headers={"Content-Type": "application/json"},
-    #   )
+    if self.async_mode:
+      self.session = httpx.AsyncClient(
+        base_url=self.BASE_URL,
+        headers={"Content-Type": "application/json"},
+        transport=LaneTransport(self.limiter),
+      )
+    else:
+      self.session = httpx.Client(
+        base_url=self.BASE_URL,
+        headers={"Content-Type": "application/json"},
+        transport=SyncLaneTransport(self.limiter),
+      )
 
   def close(self):
     """
@@ -76,11 +88,11 @@ class SessionManager:
     Authenticates with the Pluggy API to obtain an API key.
     """
     auth_url = "/auth"
-    auth_payload = AuthRequest(clientId=self.client_id, clientSecret=self.client_secret).model_dump()
+    auth_payload = AuthRequest(clientId=self.client_id, clientSecret=self.client_secret).model_dump_json()
 
-    response = self.session.post(auth_url, json=auth_payload)
+    response = self.session.post(auth_url, content=auth_payload)
     if response.status_code == 200:
-      auth_response = AuthResponse(**response.json())
+      auth_response = parse_json(response.content, AuthResponse)
       self.api_key = auth_response.apiKey
 
       # Set expiration time based on API specifications (e.g., 24 hours)
@@ -93,11 +105,11 @@ class SessionManager:
     Asynchronously authenticates with the Pluggy API to obtain an API key.
     """
     auth_url = "/auth"
-    auth_payload = AuthRequest(clientId=self.client_id, clientSecret=self.client_secret).model_dump()
+    auth_payload = AuthRequest(clientId=self.client_id, clientSecret=self.client_secret).model_dump_json()
 
-    response = await self.session.post(auth_url, json=auth_payload)
+    response = await self.session.post(auth_url, content=auth_payload)
     if response.status_code == 200:
-      auth_response = AuthResponse(**response.json())
+      auth_response = parse_json(response.content, AuthResponse)
       self.api_key = auth_response.apiKey
       self.api_key_expires_at = time.time() + 24 * 60 * 60
     else:
@@ -185,50 +197,78 @@ class SessionManager:
     self,
     method: str,
     url: str,
+    record: bool = False,
     **kwargs: Any,
-  ) -> Any:
+  ) -> bytes:
     """
     A generic method to make HTTP requests synchronously.
 
+    Identical GET requests already in flight on other threads are joined instead of being sent again.
+
     Args:
         method (str): HTTP method (GET, POST, etc.).
         url (str): Endpoint URL.
+        record (bool): Whether to hand the response body to the recorder, e.g. to archive it.
         **kwargs: Additional arguments for the request.
 
     Returns:
-        Any: The parsed JSON response.
+        bytes: The raw JSON response body, to be validated by the caller in a single pass.
 
     Raises:
         httpx.HTTPStatusError: If the response contains an HTTP error status.
     """
+    if method.upper() == "GET":
+      key = request_key(method, url, kwargs.get("params"))
+      return self.single_flight.do_sync(key, lambda: self._send_sync(method, url, record, **kwargs))
+    return self._send_sync(method, url, record, **kwargs)
+
+  def _send_sync(self, method: str, url: str, record: bool, **kwargs: Any) -> bytes:
     headers = self.get_headers()
     response = self.session.request(method, url, headers=headers, **kwargs)
     if response.status_code >= 400:
       self.handle_error(response)
-    return response.json()
+    if record:
+      self._record(url, kwargs.get("params"), response.content)
+    return response.content
 
   async def request_async(
     self,
     method: str,
     url: str,
+    record: bool = False,
     **kwargs: Any,
-  ) -> Any:
+  ) -> bytes:
     """
     A generic method to make HTTP requests asynchronously.
 
+    Identical GET requests already in flight are joined instead of being sent again.
+
     Args:
         method (str): HTTP method (GET, POST, etc.).
         url (str): Endpoint URL.
+        record (bool): Whether to hand the response body to the recorder, e.g. to archive it.
         **kwargs: Additional arguments for the request.
 
     Returns:
-        Any: The parsed JSON response.
+        bytes: The raw JSON response body, to be validated by the caller in a single pass.
 
     Raises:
         httpx.HTTPStatusError: If the response contains an HTTP error status.
     """
+    if method.upper() == "GET":
+      key = request_key(method, url, kwargs.get("params"))
+      return await self.single_flight.do(key, lambda: self._send_async(method, url, record, **kwargs))
+    return await self._send_async(method, url, record, **kwargs)
+
+  async def _send_async(self, method: str, url: str, record: bool, **kwargs: Any) -> bytes:
     headers = await self.async_get_headers()
     response = await self.session.request(method, url, headers=headers, **kwargs)
     if response.status_code >= 400:
       await self.async_handle_error(response)
-    return response.json()
+    if record:
+      self._record(url, kwargs.get("params"), response.content)
+    return response.content
+
+  def _record(self, url: str, params: Optional[Dict[str, Any]], content: bytes):
+    if self.recorder is not None:
+      self.recorder("pluggy", url, params, content)
@@ -0,0 +1,5 @@
+from typing import Any, Callable, Dict, Optional
+
+# Receives `(source, url, params, body)` for every raw response body a client is asked to record.
+# It runs on the request path, so it should only buffer the body and return.
+PayloadRecorder = Callable[[str, str, Optional[Dict[str, Any]], bytes], None]
@@ -0,0 +1,47 @@
+from functools import cache
+from typing import Any, Type, TypeVar
+
+from pydantic import TypeAdapter
+
+T = TypeVar("T")
+
+_any_adapter = TypeAdapter(Any)
+
+
+@cache
+def validator_for(model: Type[T]) -> TypeAdapter[T]:
+  """
+  Returns the validator of `model`, built once and reused for every response.
+  """
+  return TypeAdapter(model)
+
+
+def parse_json(content: bytes, model: Type[T]) -> T:
+  """
+  Validates a raw JSON body against `model` in a single pass, without decoding it into Python objects first.
+
+  Args:
+      content (bytes): The raw response body.
+      model (type): The Pydantic model (or any type Pydantic can validate) describing the body.
+
+  Returns:
+      The validated data.
+
+  Raises:
+      pydantic.ValidationError: If the body is not valid JSON or does not match the model.
+  """
+  return validator_for(model).validate_json(content)
+
+
+def dump_json(payload: Any, **kwargs: Any) -> bytes:
+  """
+  Serialises a payload, which may nest Pydantic models, straight to JSON bytes.
+
+  Args:
+      payload (Any): The payload to serialise, e.g. `{"transaction": CreateTransaction(...)}`.
+      **kwargs: Serialisation options forwarded to Pydantic, such as `exclude_unset`.
+
+  Returns:
+      bytes: The JSON body.
+  """
+  return _any_adapter.dump_json(payload, **kwargs)
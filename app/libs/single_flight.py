@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from app.libs.lanes import current_lane
+
+T = TypeVar("T")
+
+
+def request_key(method: str, url: str, params: Optional[Dict[str, Any]] = None) -> Tuple:
+  """
+  Builds the key identical in-flight requests are coalesced on.
+
+  The key includes the lane of the calling context. An interactive call never joins a background one, which would
+  make it wait behind the connections and quota reserved away from background calls.
+  """
+  return method.upper(), url, tuple(sorted((params or {}).items())), current_lane.get()
+
+
+class _Call:
+  """
+  A call in flight, and the number of callers awaiting it.
+  """
+
+  def __init__(self, task: asyncio.Task):
+    self.task = task
+    self.waiters = 0
+
+
+class SingleFlight:
+  """
+  Collapses identical concurrent calls into a single execution whose result is shared by every caller.
+
+  Unlike a cache, nothing is kept once the call finishes: a call made after the leader returns runs again.
+  """
+
+  def __init__(self):
+    # In-flight calls of every event loop, as a task cannot be awaited from another loop
+    self._calls: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, _Call]] = (
+      weakref.WeakKeyDictionary()
+    )
+    self._sync_calls: Dict[Hashable, Future] = {}
+    self._lock = threading.Lock()
+
+  def __len__(self) -> int:
+    return sum(len(calls) for calls in self._calls.values()) + len(self._sync_calls)
+
+  async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+    """
+    Awaits `fn()`, or joins the in-flight call registered under the same key.
+
+    The call runs in its own task, so a cancelled caller leaves the others waiting on it. It is only cancelled once
+    every caller is, and a caller arriving while it is being cancelled starts a new call.
+
+    Args:
+        key (Hashable): Identifies calls that can share a result.
+        fn (Callable): Coroutine factory, only invoked by the first caller.
+
+    Returns:
+        The result of the shared call. Errors are raised to every waiter.
+    """
+    calls = self._calls.setdefault(asyncio.get_running_loop(), {})
+    call = calls.get(key)
+    # A call cancelled by its last caller is only unregistered once it unwinds, it is never joined meanwhile
+    if call is None or call.task.cancelling() or call.task.cancelled():
+      call = calls[key] = _Call(asyncio.ensure_future(fn()))
+      call.task.add_done_callback(lambda task: self._done(calls, key, call))
+
+    call.waiters += 1
+    try:
+      return await asyncio.shield(call.task)
+    except asyncio.CancelledError:
+      if call.waiters == 1 and not call.task.done():
+        call.task.cancel()
+      raise
+    finally:
+      call.waiters -= 1
+
+  @staticmethod
+  def _done(calls: Dict[Hashable, "_Call"], key: Hashable, call: "_Call"):
+    if calls.get(key) is call:
+      del calls[key]
+    # Marks the exception as retrieved, every waiter may have been cancelled
+    if not call.task.cancelled():
+      call.task.exception()
+
+  def do_sync(self, key: Hashable, fn: Callable[[], T]) -> T:
+    """
+    Calls `fn()`, or blocks on the in-flight call registered under the same key by another thread.
+
+    Args:
+        key (Hashable): Identifies calls that can share a result.
+        fn (Callable): Function only invoked by the first caller.
+
+    Returns:
+        The result of the shared call. Errors are raised to every waiter.
+    """
+    with self._lock:
+      future = self._sync_calls.get(key)
+      leader = future is None
+      if leader:
+        future = self._sync_calls[key] = Future()
+
+    if not leader:
+      return future.result()
+
+    try:
+      result = fn()
+    except BaseException as e:
+      future.set_exception(e)
+      raise
+    else:
+      future.set_result(result)
+      return result
+    finally:
+      with self._lock:
+        del self._sync_calls[key]
@@ -1,17 +1,22 @@
 from typing import List
 
+from app.libs.serialization import dump_json
+
 from ..models.account import Account, AccountResponse, AccountsResponse, CreateAccount
 from ..utils import parse_response
+from .base_client import BaseClient
 
 
-class AccountsClient:
+class AccountsClient(BaseClient):
   """
   API methods related to Accounts.
   """
 
-  def __init__(self, client, async_mode: bool = False):
-    self.client = client
-    self.async_mode = async_mode
+  # Balances change with every write, including those of other processes which never invalidate this cache
+  CACHE_TTLS = {
+    "get_accounts": 15,
+    "get_account": 15,
+  }
 
   # --------------------
   # Asynchronous methods
@@ -31,8 +36,7 @@ class AccountsClient:
       raise RuntimeError("Client is not in async mode; use 'get_accounts_sync' instead")
 
     url = f"/budgets/{budget_id}/accounts"
-    response = await self.client.get(url)
-    data = parse_response(response, AccountsResponse)
+    data = await self._get("get_accounts", url, AccountsResponse)
     return data.accounts
 
   async def get_account(self, budget_id: str, account_id: str) -> Account:
@@ -50,8 +54,7 @@ class AccountsClient:
       raise RuntimeError("Client is not in async mode; use 'get_account_sync' instead")
 
     url = f"/budgets/{budget_id}/accounts/{account_id}"
-    response = await self.client.get(url)
-    data = parse_response(response, AccountResponse)
+    data = await self._get("get_account", url, AccountResponse)
     return data.account
 
   async def create_account(self, budget_id: str, account: CreateAccount) -> Account:
@@ -69,9 +72,10 @@ class AccountsClient:
       raise RuntimeError("Client is not in async mode; use 'create_account_sync' instead")
 
     url = f"/budgets/{budget_id}/accounts"
-    payload = {"account": account.dict(exclude_unset=True)}
-    response = await self.client.post(url, json=payload)
+    payload = dump_json({"account": account}, exclude_unset=True)
+    response = await self.client.post(url, content=payload)
     data = parse_response(response, AccountResponse)
+    self._invalidate_budget(budget_id)
     return data.account
 
   # --------------------
@@ -92,8 +96,7 @@ class AccountsClient:
       raise RuntimeError("Client is in async mode; use 'get_accounts' instead")
 
     url = f"/budgets/{budget_id}/accounts"
-    response = self.client.get(url)
-    data = parse_response(response, AccountsResponse)
+    data = self._get_sync("get_accounts", url, AccountsResponse)
     return data.accounts
 
   def get_account_sync(self, budget_id: str, account_id: str) -> Account:
@@ -111,8 +114,7 @@ class AccountsClient:
       raise RuntimeError("Client is in async mode; use 'get_account' instead")
 
     url = f"/budgets/{budget_id}/accounts/{account_id}"
-    response = self.client.get(url)
-    data = parse_response(response, AccountResponse)
+    data = self._get_sync("get_account", url, AccountResponse)
     return data.account
 
   def create_account_sync(self, budget_id: str, account: CreateAccount) -> Account:
@@ -130,7 +132,8 @@ class AccountsClient:
       raise RuntimeError("Client is in async mode; use 'create_account' instead")
 
     url = f"/budgets/{budget_id}/accounts"
-    payload = {"account": account.dict(exclude_unset=True)}
-    response = self.client.post(url, json=payload)
+    payload = dump_json({"account": account}, exclude_unset=True)
+    response = self.client.post(url, content=payload)
     data = parse_response(response, AccountResponse)
+    self._invalidate_budget(budget_id)
     return data.account
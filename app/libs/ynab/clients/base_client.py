@@ -0,0 +1,133 @@
+from typing import Any, Dict, Optional
+
+from app.libs.cache import ResponseCache, make_key
+from app.libs.recorder import PayloadRecorder
+from app.libs.single_flight import SingleFlight, request_key
+
+from ..utils import parse_response, raise_for_status
+
+
+class BaseClient:
+  """
+  Request helpers shared by the YNAB API contexts.
+  """
+
+  # Seconds a read stays cached, keyed by endpoint name. Endpoints missing here are never cached.
+  CACHE_TTLS: Dict[str, float] = {}
+
+  def __init__(
+    self,
+    client,
+    async_mode: bool = False,
+    cache: Optional[ResponseCache] = None,
+    single_flight: Optional[SingleFlight] = None,
+    recorder: Optional[PayloadRecorder] = None,
+  ):
+    self.client = client
+    self.async_mode = async_mode
+    self.cache = cache
+    self.single_flight = single_flight or SingleFlight()
+    self.recorder = recorder
+
+  def _cached(self, endpoint: str, url: str, params: Optional[Dict[str, Any]], model) -> Optional[Any]:
+    if self.cache is None or endpoint not in self.CACHE_TTLS:
+      return None
+    return self.cache.get(make_key(url, params) + (model,))
+
+  def _store(self, endpoint: str, url: str, params: Optional[Dict[str, Any]], model, data: Any):
+    if self.cache is not None and endpoint in self.CACHE_TTLS:
+      self.cache.set(make_key(url, params) + (model,), data, ttl=self.CACHE_TTLS[endpoint])
+
+  async def _get(self, endpoint: str, url: str, model, params: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Performs a GET request, serving it from the cache when the endpoint is cacheable.
+
+    Identical requests already in flight are joined instead of being sent again. Cache and in-flight entries
+    are keyed on the model too, so full and lean reads of the same URL never share a result. Bodies actually
+    received are handed to the recorder, when there is one.
+
+    Args:
+        endpoint (str): The endpoint name, used to look up its TTL in `CACHE_TTLS`.
+        url (str): The request path.
+        model (BaseModel): The Pydantic model to parse the response data.
+        params (dict, optional): The query parameters.
+
+    Returns:
+        The parsed response data.
+    """
+    data = self._cached(endpoint, url, params, model)
+    if data is not None:
+      return data
+
+    async def fetch():
+      response = await self.client.get(url, params=params)
+      data = parse_response(response, model)
+      self._record(url, params, response.content)
+      return data
+
+    data = await self.single_flight.do(request_key("GET", url, params) + (model,), fetch)
+    self._store(endpoint, url, params, model, data)
+    return data
+
+  async def _get_content(self, url: str, params: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Performs a GET request and returns the raw body, unvalidated and never cached, e.g. to parse it elsewhere.
+
+    Identical requests in flight are joined, and the body is handed to the recorder, like with `_get`.
+
+    Raises:
+        YNABClientError: For HTTP errors, see `raise_for_status`.
+    """
+
+    async def fetch():
+      response = await self.client.get(url, params=params)
+      raise_for_status(response)
+      self._record(url, params, response.content)
+      return response.content
+
+    return await self.single_flight.do(request_key("GET", url, params) + (bytes,), fetch)
+
+  def _get_sync(self, endpoint: str, url: str, model, params: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Performs a GET request, serving it from the cache when the endpoint is cacheable.
+
+    Identical requests already in flight are joined instead of being sent again. Cache and in-flight entries
+    are keyed on the model too, so full and lean reads of the same URL never share a result. Bodies actually
+    received are handed to the recorder, when there is one.
+
+    Args:
+        endpoint (str): The endpoint name, used to look up its TTL in `CACHE_TTLS`.
+        url (str): The request path.
+        model (BaseModel): The Pydantic model to parse the response data.
+        params (dict, optional): The query parameters.
+
+    Returns:
+        The parsed response data.
+    """
+    data = self._cached(endpoint, url, params, model)
+    if data is not None:
+      return data
+
+    def fetch():
+      response = self.client.get(url, params=params)
+      data = parse_response(response, model)
+      self._record(url, params, response.content)
+      return data
+
+    data = self.single_flight.do_sync(request_key("GET", url, params) + (model,), fetch)
+    self._store(endpoint, url, params, model, data)
+    return data
+
+  def _record(self, url: str, params: Optional[Dict[str, Any]], content: bytes):
+    if self.recorder is not None:
+      self.recorder("ynab", url, params, content)
+
+  def _invalidate_budget(self, budget_id: str):
+    """
+    Drops every cached read of a budget after a write to it.
+
+    The budget list is dropped as well, since it may embed the budget accounts.
+    """
+    if self.cache is not None:
+      self.cache.invalidate("/budgets", descendants=False)
+      self.cache.invalidate(f"/budgets/{budget_id}")
@@ -1,24 +1,33 @@
-from typing import List, Optional
+from typing import AsyncIterator, Callable, List, Optional, Tuple, Union
 
+from pydantic import BaseModel, ValidationError
+
+from ..exceptions import YNABClientError
 from ..models.budget import (
   BudgetDetail,
   BudgetResponse,
+  BudgetResponseData,
   BudgetSettings,
   BudgetSettingsResponse,
   BudgetsResponse,
   BudgetSummary,
+  LeanBudgetDetail,
+  LeanBudgetResponse,
 )
-from ..utils import parse_response
+from ..streaming import BudgetStreamParser, parse_entity
+from ..utils import raise_for_status
+from .base_client import BaseClient
 
 
-class BudgetsClient:
+class BudgetsClient(BaseClient):
   """
   API methods related to Budgets.
   """
 
-  def __init__(self, client, async_mode: bool = False):
-    self.client = client
-    self.async_mode = async_mode
+  CACHE_TTLS = {
+    "get_budgets": 600,
+    "get_budget_settings": 3600,
+  }
 
   # --------------------
   # Asynchronous methods
@@ -38,20 +47,22 @@ class BudgetsClient:
       raise RuntimeError("Client is not in async mode; use 'get_budgets_sync' instead")
 
     params = {"include_accounts": str(include_accounts).lower()}
-    response = await self.client.get("/budgets", params=params)
-    data = parse_response(response, BudgetsResponse)
+    data = await self._get("get_budgets", "/budgets", BudgetsResponse, params=params)
     return data.budgets
 
-  async def get_budget(self, budget_id: str, last_knowledge_of_server: Optional[int] = None) -> BudgetDetail:
+  async def get_budget(
+    self, budget_id: str, last_knowledge_of_server: Optional[int] = None, lean: bool = False
+  ) -> Union[BudgetDetail, LeanBudgetDetail]:
     """
     Asynchronously retrieves a single budget by ID.
 
     Args:
         budget_id (str): The ID of the budget.
         last_knowledge_of_server (Optional[int]): The starting server knowledge.
+        lean (bool): Whether to parse the budget into the lighter `LeanBudgetDetail` projection.
 
     Returns:
-        BudgetDetail: Detailed budget information.
+        BudgetDetail: Detailed budget information, or a `LeanBudgetDetail` when `lean` is set.
     """
     if not self.async_mode:
       raise RuntimeError("Client is not in async mode; use 'get_budget_sync' instead")
@@ -60,10 +71,91 @@ class BudgetsClient:
     if last_knowledge_of_server is not None:
       params["last_knowledge_of_server"] = last_knowledge_of_server
 
-    response = await self.client.get(f"/budgets/{budget_id}", params=params)
-    data = parse_response(response, BudgetResponse)
+    model = LeanBudgetResponse if lean else BudgetResponse
+    data = await self._get("get_budget", f"/budgets/{budget_id}", model, params=params)
     return data.budget
 
+  async def get_budget_delta(
+    self, budget_id: str, last_knowledge_of_server: Optional[int] = None
+  ) -> BudgetResponseData:
+    """
+    Asynchronously retrieves the entities of a budget that changed since a server knowledge.
+
+    Args:
+        budget_id (str): The ID of the budget.
+        last_knowledge_of_server (Optional[int]): The starting server knowledge. The full budget is returned when omitted.
+
+    Returns:
+        BudgetResponseData: The changed budget entities along with the current server knowledge.
+    """
+    if not self.async_mode:
+      raise RuntimeError("Client is not in async mode; use 'get_budget_delta_sync' instead")
+
+    params = {}
+    if last_knowledge_of_server is not None:
+      params["last_knowledge_of_server"] = last_knowledge_of_server
+
+    return await self._get("get_budget", f"/budgets/{budget_id}", BudgetResponse, params=params)
+
+  async def get_budget_delta_content(self, budget_id: str, last_knowledge_of_server: Optional[int] = None) -> bytes:
+    """
+    Asynchronously retrieves the raw body of `get_budget_delta`, unvalidated.
+
+    Lets a large budget be validated elsewhere, e.g. in a `CpuExecutor` process, see `parse_content`.
+
+    Args:
+        budget_id (str): The ID of the budget.
+        last_knowledge_of_server (Optional[int]): The starting server knowledge. The full budget is returned when omitted.
+
+    Returns:
+        bytes: The JSON body of a `BudgetResponse`.
+    """
+    if not self.async_mode:
+      raise RuntimeError("Client is not in async mode; use 'get_budget_delta_sync' instead")
+
+    params = {}
+    if last_knowledge_of_server is not None:
+      params["last_knowledge_of_server"] = last_knowledge_of_server
+
+    return await self._get_content(f"/budgets/{budget_id}", params=params)
+
+  async def stream_budget(
+    self, budget_id: str, last_knowledge_of_server: Optional[int] = None, lean: bool = False
+  ) -> AsyncIterator[Tuple[str, BaseModel]]:
+    """
+    Asynchronously streams a budget, yielding its entities by collection as the response is parsed.
+
+    Unlike `get_budget`, the whole budget is never held in memory at once.
+
+    Args:
+        budget_id (str): The ID of the budget.
+        last_knowledge_of_server (Optional[int]): The starting server knowledge.
+        lean (bool): Whether to parse entities into the lean projections, for the collections that have one.
+
+    Yields:
+        Tuple[str, BaseModel]: `(collection, entity)` pairs, e.g. `("transactions", TransactionDetail(...))`,
+            followed by a last `("server_knowledge", int)` pair.
+    """
+    if not self.async_mode:
+      raise RuntimeError("Client is not in async mode; use 'stream_budget_sync' instead")
+
+    params = {}
+    if last_knowledge_of_server is not None:
+      params["last_knowledge_of_server"] = last_knowledge_of_server
+
+    parser = BudgetStreamParser()
+    async with self.client.stream("GET", f"/budgets/{budget_id}", params=params) as response:
+      if response.is_error:
+        await response.aread()
+        raise_for_status(response)
+
+      async for chunk in response.aiter_bytes():
+        for collection, entity in self._feed(parser, chunk):
+          yield collection, self._parse_entity(collection, entity, lean)
+
+    self._close_stream(parser)
+    yield "server_knowledge", parser.server_knowledge
+
   async def get_budget_settings(self, budget_id: str) -> BudgetSettings:
     """
     Asynchronously retrieves settings for a budget.
@@ -77,8 +169,7 @@ class BudgetsClient:
     if not self.async_mode:
       raise RuntimeError("Client is not in async mode; use 'get_budget_settings_sync' instead")
 
-    response = await self.client.get(f"/budgets/{budget_id}/settings")
-    data = parse_response(response, BudgetSettingsResponse)
+    data = await self._get("get_budget_settings", f"/budgets/{budget_id}/settings", BudgetSettingsResponse)
     return data.settings
 
   # --------------------
@@ -99,20 +190,22 @@ class BudgetsClient:
       raise RuntimeError("Client is in async mode; use 'get_budgets' instead")
 
     params = {"include_accounts": str(include_accounts).lower()}
-    response = self.client.get("/budgets", params=params)
-    data = parse_response(response, BudgetsResponse)
+    data = self._get_sync("get_budgets", "/budgets", BudgetsResponse, params=params)
     return data.budgets
 
-  def get_budget_sync(self, budget_id: str, last_knowledge_of_server: Optional[int] = None) -> BudgetDetail:
+  def get_budget_sync(
+    self, budget_id: str, last_knowledge_of_server: Optional[int] = None, lean: bool = False
+  ) -> Union[BudgetDetail, LeanBudgetDetail]:
     """
     Retrieves a single budget by ID.
 
     Args:
         budget_id (str): The ID of the budget.
         last_knowledge_of_server (Optional[int]): The starting server knowledge.
+        lean (bool): Whether to parse the budget into the lighter `LeanBudgetDetail` projection.
 
     Returns:
-        BudgetDetail: Detailed budget information.
+        BudgetDetail: Detailed budget information, or a `LeanBudgetDetail` when `lean` is set.
     """
     if self.async_mode:
       raise RuntimeError("Client is in async mode; use 'get_budget' instead")
@@ -121,10 +214,71 @@ class BudgetsClient:
     if last_knowledge_of_server is not None:
       params["last_knowledge_of_server"] = last_knowledge_of_server
 
-    response = self.client.get(f"/budgets/{budget_id}", params=params)
-    data = parse_response(response, BudgetResponse)
+    model = LeanBudgetResponse if lean else BudgetResponse
+    data = self._get_sync("get_budget", f"/budgets/{budget_id}", model, params=params)
     return data.budget
 
+  def get_budget_delta_sync(self, budget_id: str, last_knowledge_of_server: Optional[int] = None) -> BudgetResponseData:
+    """
+    Retrieves the entities of a budget that changed since a server knowledge.
+
+    Args:
+        budget_id (str): The ID of the budget.
+        last_knowledge_of_server (Optional[int]): The starting server knowledge. The full budget is returned when omitted.
+
+    Returns:
+        BudgetResponseData: The changed budget entities along with the current server knowledge.
+    """
+    if self.async_mode:
+      raise RuntimeError("Client is in async mode; use 'get_budget_delta' instead")
+
+    params = {}
+    if last_knowledge_of_server is not None:
+      params["last_knowledge_of_server"] = last_knowledge_of_server
+
+    return self._get_sync("get_budget", f"/budgets/{budget_id}", BudgetResponse, params=params)
+
+  def stream_budget_sync(
+    self,
+    budget_id: str,
+    on_entity: Callable[[str, BaseModel], None],
+    last_knowledge_of_server: Optional[int] = None,
+    lean: bool = False,
+  ) -> int:
+    """
+    Streams a budget, handing its entities by collection to a callback as the response is parsed.
+
+    Unlike `get_budget_sync`, the whole budget is never held in memory at once.
+
+    Args:
+        budget_id (str): The ID of the budget.
+        on_entity (Callable): Called with `(collection, entity)`, e.g. `("transactions", TransactionDetail(...))`.
+        last_knowledge_of_server (Optional[int]): The starting server knowledge.
+        lean (bool): Whether to parse entities into the lean projections, for the collections that have one.
+
+    Returns:
+        int: The server knowledge of the response.
+    """
+    if self.async_mode:
+      raise RuntimeError("Client is in async mode; use 'stream_budget' instead")
+
+    params = {}
+    if last_knowledge_of_server is not None:
+      params["last_knowledge_of_server"] = last_knowledge_of_server
+
+    parser = BudgetStreamParser()
+    with self.client.stream("GET", f"/budgets/{budget_id}", params=params) as response:
+      if response.is_error:
+        response.read()
+        raise_for_status(response)
+
+      for chunk in response.iter_bytes():
+        for collection, entity in self._feed(parser, chunk):
+          on_entity(collection, self._parse_entity(collection, entity, lean))
+
+    self._close_stream(parser)
+    return parser.server_knowledge
+
   def get_budget_settings_sync(self, budget_id: str) -> BudgetSettings:
     """
     Retrieves settings for a budget.
@@ -138,6 +292,27 @@ class BudgetsClient:
     if self.async_mode:
       raise RuntimeError("Client is in async mode; use 'get_budget_settings' instead")
 
-    response = self.client.get(f"/budgets/{budget_id}/settings")
-    data = parse_response(response, BudgetSettingsResponse)
+    data = self._get_sync("get_budget_settings", f"/budgets/{budget_id}/settings", BudgetSettingsResponse)
     return data.settings
+
+  # --------------------
+  # Streaming helpers
+  # --------------------
+
+  def _parse_entity(self, collection: str, entity: dict, lean: bool) -> BaseModel:
+    try:
+      return parse_entity(collection, entity, lean=lean)
+    except ValidationError as e:
+      raise YNABClientError(f"Data validation error: {e}") from e
+
+  def _feed(self, parser: BudgetStreamParser, chunk: bytes) -> List[Tuple[str, dict]]:
+    try:
+      return parser.feed(chunk)
+    except ValueError as e:
+      raise YNABClientError(str(e)) from e
+
+  def _close_stream(self, parser: BudgetStreamParser):
+    try:
+      parser.close()
+    except ValueError as e:
+      raise YNABClientError(str(e)) from e
@@ -1,29 +1,30 @@
-from typing import List, Optional
-
-import httpx
+from typing import List, Optional, Union
 
+from app.libs.serialization import dump_json
 from app.libs.ynab.utils import parse_response
 
 from ..models.transaction import (
   CreateTransaction,
   CreateTransactionResponse,
+  LeanTransaction,
+  LeanTransactionsResponse,
+  SaveTransactionsData,
+  SaveTransactionsResponse,
   Transaction,
   TransactionResponse,
   TransactionsResponse,
   UpdateTransaction,
   UpdateTransactionResponse,
+  UpdateTransactionWithId,
 )
+from .base_client import BaseClient
 
 
-class TransactionsClient:
+class TransactionsClient(BaseClient):
   """
   API methods related to Transactions.
   """
 
-  def __init__(self, client: httpx.Client, async_mode: bool = False):
-    self.client = client
-    self.async_mode = async_mode
-
   # --------------------
   # Asynchronous methods
   # --------------------
@@ -34,7 +35,8 @@ class TransactionsClient:
     since_id: Optional[str] = None,
     last_knowledge_of_server: Optional[int] = None,
     include_subtransactions: bool = False,
-  ) -> List[Transaction]:
+    lean: bool = False,
+  ) -> Union[List[Transaction], List[LeanTransaction]]:
     """
     Asynchronously retrieves a list of transactions for a given budget.
 
@@ -43,9 +45,10 @@ class TransactionsClient:
         since_id (Optional[str]): The ID of the last transaction that was retrieved.
         last_knowledge_of_server (Optional[int]): The knowledge of the server.
         include_subtransactions (bool): Whether to include subtransactions.
+        lean (bool): Whether to parse the transactions into the lighter `LeanTransaction` projection.
 
     Returns:
-        List[Transaction]: A list of transactions.
+        List[Transaction]: A list of transactions, or of `LeanTransaction` when `lean` is set.
     """
     if not self.async_mode:
       raise RuntimeError("Client is not in async mode; use 'get_transactions_sync' instead")
@@ -56,8 +59,8 @@ class TransactionsClient:
       "include_subtransactions": str(include_subtransactions).lower(),
     }
     url = f"/budgets/{budget_id}/transactions"
-    response = await self.client.get(url, params=params)
-    data = parse_response(response, TransactionsResponse)
+    model = LeanTransactionsResponse if lean else TransactionsResponse
+    data = await self._get("get_transactions", url, model, params=params)
     return data.transactions
 
   async def get_transaction(self, budget_id: str, transaction_id: str) -> Transaction:
@@ -75,8 +78,7 @@ class TransactionsClient:
       raise RuntimeError("Client is not in async mode; use 'get_transaction_sync' instead")
 
     url = f"/budgets/{budget_id}/transactions/{transaction_id}"
-    response = await self.client.get(url)
-    data = parse_response(response, TransactionResponse)
+    data = await self._get("get_transaction", url, TransactionResponse)
     return data.transaction
 
   async def create_transaction(self, budget_id: str, transaction: CreateTransaction) -> Transaction:
@@ -94,11 +96,33 @@ class TransactionsClient:
       raise RuntimeError("Client is not in async mode; use 'create_transaction_sync' instead")
 
     url = f"/budgets/{budget_id}/transactions"
-    payload = {"transaction": transaction.dict(exclude_unset=True)}
-    response = await self.client.post(url, json=payload)
+    payload = dump_json({"transaction": transaction}, exclude_unset=True)
+    response = await self.client.post(url, content=payload)
     data = parse_response(response, CreateTransactionResponse)
+    self._invalidate_budget(budget_id)
     return data.transaction
 
+  async def create_transactions(self, budget_id: str, transactions: List[CreateTransaction]) -> SaveTransactionsData:
+    """
+    Asynchronously creates several transactions in a single request.
+
+    Args:
+        budget_id (str): The ID of the budget.
+        transactions (List[CreateTransaction]): The transactions to create.
+
+    Returns:
+        SaveTransactionsData: The created transactions, and the import IDs skipped as duplicates.
+    """
+    if not self.async_mode:
+      raise RuntimeError("Client is not in async mode; use 'create_transactions_sync' instead")
+
+    url = f"/budgets/{budget_id}/transactions"
+    payload = dump_json({"transactions": transactions}, exclude_unset=True)
+    response = await self.client.post(url, content=payload)
+    data = parse_response(response, SaveTransactionsResponse)
+    self._invalidate_budget(budget_id)
+    return data
+
   async def update_transaction(
     self, budget_id: str, transaction_id: str, transaction: UpdateTransaction
   ) -> Transaction:
@@ -117,11 +141,35 @@ class TransactionsClient:
       raise RuntimeError("Client is not in async mode; use 'update_transaction_sync' instead")
 
     url = f"/budgets/{budget_id}/transactions/{transaction_id}"
-    payload = {"transaction": transaction.dict(exclude_unset=True)}
-    response = await self.client.patch(url, json=payload)
+    payload = dump_json({"transaction": transaction}, exclude_unset=True)
+    response = await self.client.patch(url, content=payload)
     data = parse_response(response, UpdateTransactionResponse)
+    self._invalidate_budget(budget_id)
     return data.transaction
 
+  async def update_transactions(
+    self, budget_id: str, transactions: List[UpdateTransactionWithId]
+  ) -> SaveTransactionsData:
+    """
+    Asynchronously updates several transactions in a single request.
+
+    Args:
+        budget_id (str): The ID of the budget.
+        transactions (List[UpdateTransactionWithId]): The updates, each identified by `id` or `import_id`.
+
+    Returns:
+        SaveTransactionsData: The updated transactions.
+    """
+    if not self.async_mode:
+      raise RuntimeError("Client is not in async mode; use 'update_transactions_sync' instead")
+
+    url = f"/budgets/{budget_id}/transactions"
+    payload = dump_json({"transactions": transactions}, exclude_unset=True)
+    response = await self.client.patch(url, content=payload)
+    data = parse_response(response, SaveTransactionsResponse)
+    self._invalidate_budget(budget_id)
+    return data
+
   async def delete_transaction(self, budget_id: str, transaction_id: str) -> None:
     """
     Asynchronously deletes a transaction.
@@ -139,6 +187,7 @@ class TransactionsClient:
     url = f"/budgets/{budget_id}/transactions/{transaction_id}"
     response = await self.client.delete(url)
     parse_response(response, TransactionResponse)
+    self._invalidate_budget(budget_id)
     return
 
   # --------------------
@@ -151,7 +200,8 @@ class TransactionsClient:
     since_id: Optional[str] = None,
     last_knowledge_of_server: Optional[int] = None,
     include_subtransactions: bool = False,
-  ) -> List[Transaction]:
+    lean: bool = False,
+  ) -> Union[List[Transaction], List[LeanTransaction]]:
     """
     Retrieves a list of transactions for a given budget.
 
@@ -160,9 +210,10 @@ class TransactionsClient:
         since_id (Optional[str]): The ID of the last transaction that was retrieved.
         last_knowledge_of_server (Optional[int]): The knowledge of the server.
         include_subtransactions (bool): Whether to include subtransactions.
+        lean (bool): Whether to parse the transactions into the lighter `LeanTransaction` projection.
 
     Returns:
-        List[Transaction]: A list of transactions.
+        List[Transaction]: A list of transactions, or of `LeanTransaction` when `lean` is set.
     """
     if self.async_mode:
       raise RuntimeError("Client is in async mode; use 'get_transactions' instead")
@@ -173,8 +224,8 @@ class TransactionsClient:
       "include_subtransactions": str(include_subtransactions).lower(),
     }
     url = f"/budgets/{budget_id}/transactions"
-    response = self.client.get(url, params=params)
-    data = parse_response(response, TransactionsResponse)
+    model = LeanTransactionsResponse if lean else TransactionsResponse
+    data = self._get_sync("get_transactions", url, model, params=params)
     return data.transactions
 
   def get_transaction_sync(self, budget_id: str, transaction_id: str) -> Transaction:
@@ -192,8 +243,7 @@ class TransactionsClient:
       raise RuntimeError("Client is in async mode; use 'get_transaction' instead")
 
     url = f"/budgets/{budget_id}/transactions/{transaction_id}"
-    response = self.client.get(url)
-    data = parse_response(response, TransactionResponse)
+    data = self._get_sync("get_transaction", url, TransactionResponse)
     return data.transaction
 
   def create_transaction_sync(self, budget_id: str, transaction: CreateTransaction) -> Transaction:
@@ -211,11 +261,33 @@ class TransactionsClient:
       raise RuntimeError("Client is in async mode; use 'create_transaction' instead")
 
     url = f"/budgets/{budget_id}/transactions"
-    payload = {"transaction": transaction.dict(exclude_unset=True)}
-    response = self.client.post(url, json=payload)
+    payload = dump_json({"transaction": transaction}, exclude_unset=True)
+    response = self.client.post(url, content=payload)
     data = parse_response(response, CreateTransactionResponse)
+    self._invalidate_budget(budget_id)
     return data.transaction
 
+  def create_transactions_sync(self, budget_id: str, transactions: List[CreateTransaction]) -> SaveTransactionsData:
+    """
+    Creates several transactions in a single request.
+
+    Args:
+        budget_id (str): The ID of the budget.
+        transactions (List[CreateTransaction]): The transactions to create.
+
+    Returns:
+        SaveTransactionsData: The created transactions, and the import IDs skipped as duplicates.
+    """
+    if self.async_mode:
+      raise RuntimeError("Client is in async mode; use 'create_transactions' instead")
+
+    url = f"/budgets/{budget_id}/transactions"
+    payload = dump_json({"transactions": transactions}, exclude_unset=True)
+    response = self.client.post(url, content=payload)
+    data = parse_response(response, SaveTransactionsResponse)
+    self._invalidate_budget(budget_id)
+    return data
+
   def update_transaction_sync(self, budget_id: str, transaction_id: str, transaction: UpdateTransaction) -> Transaction:
     """
     Updates an existing transaction.
@@ -232,11 +304,35 @@ class TransactionsClient:
       raise RuntimeError("Client is in async mode; use 'update_transaction' instead")
 
     url = f"/budgets/{budget_id}/transactions/{transaction_id}"
-    payload = {"transaction": transaction.dict(exclude_unset=True)}
-    response = self.client.patch(url, json=payload)
+    payload = dump_json({"transaction": transaction}, exclude_unset=True)
+    response = self.client.patch(url, content=payload)
     data = parse_response(response, UpdateTransactionResponse)
+    self._invalidate_budget(budget_id)
     return data.transaction
 
+  def update_transactions_sync(
+    self, budget_id: str, transactions: List[UpdateTransactionWithId]
+  ) -> SaveTransactionsData:
+    """
+    Updates several transactions in a single request.
+
+    Args:
+        budget_id (str): The ID of the budget.
+        transactions (List[UpdateTransactionWithId]): The updates, each identified by `id` or `import_id`.
+
+    Returns:
+        SaveTransactionsData: The updated transactions.
+    """
+    if self.async_mode:
+      raise RuntimeError("Client is in async mode; use 'update_transactions' instead")
+
+    url = f"/budgets/{budget_id}/transactions"
+    payload = dump_json({"transactions": transactions}, exclude_unset=True)
+    response = self.client.patch(url, content=payload)
+    data = parse_response(response, SaveTransactionsResponse)
+    self._invalidate_budget(budget_id)
+    return data
+
   def delete_transaction_sync(self, budget_id: str, transaction_id: str) -> None:
     """
     Deletes a transaction.
@@ -254,4 +350,5 @@ class TransactionsClient:
     url = f"/budgets/{budget_id}/transactions/{transaction_id}"
     response = self.client.delete(url)
     parse_response(response, TransactionResponse)
+    self._invalidate_budget(budget_id)
     return
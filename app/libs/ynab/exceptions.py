@@ -1,3 +1,6 @@
+from typing import Optional
+
+
 class YNABError(Exception):
   """Base class for YNAB exceptions."""
 
@@ -21,8 +24,12 @@ class BadRequestError(YNABError):
 class YNABClientError(Exception):
   """Base class for YNAB exceptions."""
 
-  def __init__(self, message: str):
+  status_code = None
+
+  def __init__(self, message: str, status_code: Optional[int] = None):
+    super().__init__(message)
     self.message = message
+    self.status_code = status_code
 
 
 class BudgetNotFoundError(YNABClientError):
@@ -68,6 +68,22 @@ class Account(BaseModel):
   )
 
 
+class LeanAccount(BaseModel):
+  """
+  Lean projection of an account for hot paths, with string IDs and only the fields sync needs.
+  """
+
+  id: str
+  name: str
+  type: str
+  on_budget: bool
+  closed: bool
+  balance: int
+  cleared_balance: int
+  transfer_payee_id: Optional[str] = None
+  deleted: bool
+
+
 class CreateAccount(BaseModel):
   """
   Represents the data required to create a new account.
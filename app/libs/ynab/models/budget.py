@@ -4,10 +4,11 @@ from uuid import UUID
 
 from pydantic import BaseModel, Field
 
-from .account import Account
-from .category import Category, CategoryGroup
-from .payee import Payee, PayeeLocation
+from .account import Account, LeanAccount
+from .category import Category, CategoryGroup, LeanCategory
+from .payee import LeanPayee, Payee, PayeeLocation
 from .transaction import (
+  LeanTransaction,
   MonthDetail,
   ScheduledSubTransaction,
   ScheduledTransactionDetail,
@@ -57,6 +58,19 @@ class BudgetDetail(BaseModel):
   )
 
 
+class LeanBudgetDetail(BaseModel):
+  """
+  Lean projection of a budget for hot paths: months, payee locations and scheduled transactions are skipped.
+  """
+
+  id: str
+  name: str
+  accounts: List[LeanAccount]
+  payees: List[LeanPayee]
+  categories: List[LeanCategory]
+  transactions: List[LeanTransaction]
+
+
 class BudgetSettings(BaseModel):
   """
   Represents the settings of a budget.
@@ -84,6 +98,15 @@ class BudgetResponse(BaseModel):
   data: BudgetResponseData
 
 
+class LeanBudgetResponseData(BaseModel):
+  budget: LeanBudgetDetail
+  server_knowledge: int
+
+
+class LeanBudgetResponse(BaseModel):
+  data: LeanBudgetResponseData
+
+
 class BudgetSettingsResponseData(BaseModel):
   settings: BudgetSettings
 
@@ -20,6 +20,18 @@ class Category(BaseModel):
   deleted: bool = Field(..., description="Whether the category has been deleted")
 
 
+class LeanCategory(BaseModel):
+  """
+  Lean projection of a category for hot paths, with string IDs and no monthly amounts.
+  """
+
+  id: str
+  category_group_id: str
+  name: str
+  hidden: bool
+  deleted: bool
+
+
 class CategoryGroup(BaseModel):
   """
   Represents a category group in a budget.
@@ -17,6 +17,17 @@ class Payee(BaseModel):
   deleted: bool = Field(..., description="Whether the payee has been deleted")
 
 
+class LeanPayee(BaseModel):
+  """
+  Lean projection of a payee for hot paths, with string IDs.
+  """
+
+  id: str
+  name: str
+  transfer_account_id: Optional[str] = None
+  deleted: bool
+
+
 class PayeeLocation(BaseModel):
   """
   Represents a payee location.
@@ -78,6 +78,14 @@ class UpdateTransaction(BaseModel):
   subtransactions: Optional[List["UpdateSubTransaction"]] = Field(None, description="List of subtransactions")
 
 
+class UpdateTransactionWithId(UpdateTransaction):
+  """
+  Represents an update in a bulk request, identifying the transaction by its ID or, failing that, its import ID.
+  """
+
+  id: Optional[str] = Field(None, description="The ID of the transaction")
+
+
 class SubTransaction(BaseModel):
   """
   Represents a subtransaction in YNAB.
@@ -111,6 +119,12 @@ class UpdateSubTransaction(BaseModel):
   category_id: Optional[UUID] = Field(None, description="The ID of the category")
 
 
+# Resolve the forward references to the subtransaction models, so instances serialise before any validation ran
+CreateTransaction.model_rebuild()
+UpdateTransaction.model_rebuild()
+UpdateTransactionWithId.model_rebuild()
+
+
 class ScheduledTransactionDetail(BaseModel):
   """
   Represents a scheduled transaction.
@@ -160,6 +174,8 @@ class TransactionDetail(BaseModel):
   account_id: UUID = Field(..., description="The ID of the account associated with the transaction")
   payee_id: Optional[UUID] = Field(None, description="The ID of the payee associated with the transaction")
   category_id: Optional[UUID] = Field(None, description="The ID of the category associated with the transaction")
+  transfer_account_id: Optional[UUID] = Field(None, description="The ID of the transfer account")
+  import_id: Optional[str] = Field(None, description="The import ID of the transaction")
   deleted: bool = Field(..., description="Whether the transaction has been deleted")
 
 
@@ -178,6 +194,24 @@ class MonthDetail(BaseModel):
   categories: List[Category] = Field(..., description="The list of categories in the month")
 
 
+class LeanTransaction(BaseModel):
+  """
+  Lean projection of a transaction for hot paths, with string IDs and only the fields sync needs.
+  """
+
+  id: str
+  date: str
+  amount: int
+  memo: Optional[str] = None
+  cleared: str
+  account_id: str
+  payee_id: Optional[str] = None
+  category_id: Optional[str] = None
+  transfer_account_id: Optional[str] = None
+  import_id: Optional[str] = None
+  deleted: bool
+
+
 class TransactionsData(BaseModel):
   transactions: List[Transaction]
   server_knowledge: int
@@ -201,3 +235,23 @@ class CreateTransactionResponse(BaseModel):
 
 class UpdateTransactionResponse(BaseModel):
   data: TransactionData
+
+
+class SaveTransactionsData(BaseModel):
+  transaction_ids: List[str]
+  transactions: List[Transaction] = []
+  duplicate_import_ids: List[str] = []
+  server_knowledge: int
+
+
+class SaveTransactionsResponse(BaseModel):
+  data: SaveTransactionsData
+
+
+class LeanTransactionsData(BaseModel):
+  transactions: List[LeanTransaction]
+  server_knowledge: int
+
+
+class LeanTransactionsResponse(BaseModel):
+  data: LeanTransactionsData
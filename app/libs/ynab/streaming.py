@@ -0,0 +1,239 @@
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.libs.serialization import validator_for
+
+from .models.account import Account, LeanAccount
+from .models.category import Category, CategoryGroup, LeanCategory
+from .models.payee import LeanPayee, Payee, PayeeLocation
+from .models.transaction import (
+  LeanTransaction,
+  MonthDetail,
+  ScheduledSubTransaction,
+  ScheduledTransactionDetail,
+  SubTransaction,
+  TransactionDetail,
+)
+
+# Model each budget collection entity is validated into
+COLLECTION_MODELS = {
+  "accounts": Account,
+  "payees": Payee,
+  "payee_locations": PayeeLocation,
+  "category_groups": CategoryGroup,
+  "categories": Category,
+  "months": MonthDetail,
+  "transactions": TransactionDetail,
+  "subtransactions": SubTransaction,
+  "scheduled_transactions": ScheduledTransactionDetail,
+  "scheduled_subtransactions": ScheduledSubTransaction,
+}
+
+LEAN_COLLECTION_MODELS = {
+  **COLLECTION_MODELS,
+  "accounts": LeanAccount,
+  "payees": LeanPayee,
+  "categories": LeanCategory,
+  "transactions": LeanTransaction,
+}
+
+_NEED_MORE = object()
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+# Characters that change the nesting of a value, inside and outside of its strings
+_STRUCTURAL = re.compile(r'["{}\[\]]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r"[,}\]\s]")
+
+
+def parse_entity(collection: str, entity: Dict[str, Any], lean: bool = False) -> BaseModel:
+  """
+  Validates a single budget collection entity.
+
+  Args:
+      collection (str): The budget collection the entity belongs to, e.g. `transactions`.
+      entity (dict): The decoded entity.
+      lean (bool): Whether to use the lean projection, for the collections that have one.
+
+  Returns:
+      BaseModel: The validated entity.
+  """
+  models = LEAN_COLLECTION_MODELS if lean else COLLECTION_MODELS
+  return validator_for(models[collection]).validate_python(entity)
+
+
+class BudgetStreamParser:
+  """
+  Incremental parser for the body of `GET /budgets/{budget_id}`.
+
+  Bytes are fed as they arrive and the entities of every budget collection come out one at a time, so memory
+  stays bounded by the largest single entity instead of growing with the budget. Scalar budget fields are
+  collected in `fields`, and the response server knowledge in `server_knowledge`.
+  """
+
+  def __init__(self):
+    self.fields: Dict[str, Any] = {}
+    self.server_knowledge: Optional[int] = None
+
+    self._text = ""
+    self._pos = 0
+    self._utf8 = codecs.getincrementaldecoder("utf-8")()
+    self._events = self._parse()
+    self._done = False
+
+  def feed(self, data: bytes) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Consumes a chunk of the response body.
+
+    Args:
+        data (bytes): The next chunk.
+
+    Returns:
+        list: The `(collection, entity)` pairs completed by this chunk.
+    """
+    self._text = self._text[self._pos :] + self._utf8.decode(data)
+    self._pos = 0
+
+    events = []
+    for event in self._events:
+      if event is _NEED_MORE:
+        return events
+      events.append(event)
+
+    self._done = True
+    return events
+
+  def close(self):
+    """
+    Checks that the whole body was consumed.
+
+    Raises:
+        ValueError: If the body ended before the budget was complete.
+    """
+    if not self._done:
+      raise ValueError("Budget response ended before it was complete")
+
+  def iter_entities(self, chunks: Iterator[bytes]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Feeds every chunk and yields the `(collection, entity)` pairs as they complete.
+    """
+    for chunk in chunks:
+      yield from self.feed(chunk)
+    self.close()
+
+  def _parse(self):
+    yield from self._expect("{")
+    while (key := (yield from self._next_key())) is not None:
+      if key != "data":
+        yield from self._value()
+        continue
+
+      yield from self._expect("{")
+      while (data_key := (yield from self._next_key())) is not None:
+        if data_key != "budget":
+          value = yield from self._value()
+          if data_key == "server_knowledge":
+            self.server_knowledge = value
+          continue
+
+        yield from self._expect("{")
+        while (budget_key := (yield from self._next_key())) is not None:
+          if budget_key not in COLLECTION_MODELS:
+            self.fields[budget_key] = yield from self._value()
+            continue
+
+          yield from self._expect("[")
+          while (yield from self._next_item()):
+            entity = yield from self._value()
+            yield budget_key, entity
+
+  def _peek(self):
+    # Returns the next significant character, without consuming it
+    while True:
+      text = self._text
+      while self._pos < len(text) and text[self._pos] in _WHITESPACE:
+        self._pos += 1
+      if self._pos < len(text):
+        return text[self._pos]
+      yield _NEED_MORE
+
+  def _expect(self, char: str):
+    found = yield from self._peek()
+    if found != char:
+      raise ValueError(f"Expected {char!r} at offset {self._pos} of the budget response, found {found!r}")
+    self._pos += 1
+
+  def _value(self):
+    char = yield from self._peek()
+    length = yield from (self._scan_nested() if char in '{["' else self._scan_scalar())
+    value, end = _decoder.raw_decode(self._text, self._pos)
+    if end != self._pos + length:
+      raise ValueError(f"Invalid value at offset {self._pos} of the budget response")
+    self._pos = end
+    return value
+
+  def _scan_nested(self):
+    # Returns the length of the object, array or string at `_pos`, each chunk being scanned once. Only quotes,
+    # escapes and brackets are looked at, the value is decoded once complete.
+    depth = 0
+    in_string = False
+    scanned = self._pos
+    while True:
+      text = self._text
+      while (match := (_STRING_SPECIAL if in_string else _STRUCTURAL).search(text, scanned)) is not None:
+        char = match.group()
+        if char == "\\" and match.end() == len(text):
+          # The escaped character is in the next chunk
+          break
+        scanned = match.end() + (char == "\\")
+        if in_string:
+          in_string = char != '"'
+        elif char == '"':
+          in_string = True
+        elif char in "{[":
+          depth += 1
+        else:
+          depth -= 1
+        if depth == 0 and not in_string:
+          return scanned - self._pos
+      else:
+        scanned = len(text)
+
+      offset = scanned - self._pos
+      yield _NEED_MORE
+      scanned = self._pos + offset
+
+  def _scan_scalar(self):
+    # A number cut by a chunk boundary still decodes, so it is only complete once something follows it
+    while (match := _SCALAR_END.search(self._text, self._pos)) is None:
+      yield _NEED_MORE
+    return match.start() - self._pos
+
+  def _next_key(self):
+    # Returns the next member key of the current object, or None once the object closes
+    char = yield from self._peek()
+    if char == ",":
+      self._pos += 1
+      char = yield from self._peek()
+    if char == "}":
+      self._pos += 1
+      return None
+
+    key = yield from self._value()
+    yield from self._expect(":")
+    return key
+
+  def _next_item(self):
+    # Returns whether the current array has another item
+    char = yield from self._peek()
+    if char == ",":
+      self._pos += 1
+      char = yield from self._peek()
+    if char == "]":
+      self._pos += 1
+      return False
+    return True
@@ -3,29 +3,25 @@
 import httpx
 from pydantic import ValidationError
 
+from app.libs.serialization import parse_json
+
 from .exceptions import BudgetNotFoundError, TransactionNotFoundError, YNABClientError
 
 
-def parse_response(response: httpx.Response, model):
+def raise_for_status(response: httpx.Response):
   """
-  Parses and validates the HTTP response using the provided Pydantic model.
+  Raises the YNAB exception matching an HTTP error response.
 
   Args:
-      response (httpx.Response): The HTTP response object.
-      model (BaseModel): The Pydantic model to parse the response data.
-
-  Returns:
-      Parsed data as per the Pydantic model.
+      response (httpx.Response): The HTTP response object, already read.
 
   Raises:
       BudgetNotFoundError: If a 404 status code is returned for budgets.
       TransactionNotFoundError: If a 404 status code is returned for transactions.
-      YNABClientError: For other HTTP errors or validation issues.
+      YNABClientError: For other HTTP errors.
   """
   try:
     response.raise_for_status()
-    json_data = response.json()
-    return model.parse_obj(json_data).data
   except httpx.HTTPStatusError as e:
     status_code = e.response.status_code
     if status_code == 404:
@@ -38,8 +34,41 @@ def parse_response(response: httpx.Response, model):
         budget_id = url.split("/")[-1] if url.split("/")[-1] != "budgets" else "unknown"
         raise BudgetNotFoundError(budget_id=budget_id) from e
     elif status_code == 400:
-      raise YNABClientError("Bad request.") from e
+      raise YNABClientError("Bad request.", status_code=status_code) from e
     else:
-      raise YNABClientError(f"HTTP error {status_code}.") from e
+      raise YNABClientError(f"HTTP error {status_code}.", status_code=status_code) from e
+
+
+def parse_response(response: httpx.Response, model):
+  """
+  Parses and validates the HTTP response using the provided Pydantic model.
+
+  The raw body is validated in a single pass, without decoding it into Python objects first.
+
+  Args:
+      response (httpx.Response): The HTTP response object.
+      model (BaseModel): The Pydantic model to parse the response data.
+
+  Returns:
+      Parsed data as per the Pydantic model.
+
+  Raises:
+      BudgetNotFoundError: If a 404 status code is returned for budgets.
+      TransactionNotFoundError: If a 404 status code is returned for transactions.
+      YNABClientError: For other HTTP errors or validation issues.
+  """
+  raise_for_status(response)
+  return parse_content(response.content, model)
+
+
+def parse_content(content: bytes, model):
+  """
+  Validates the raw body of a successful response, see `parse_response`.
+
+  Raises:
+      YNABClientError: For validation issues.
+  """
+  try:
+    return parse_json(content, model).data
   except ValidationError as e:
     raise YNABClientError(f"Data validation error: {e}") from e
@@ -3,6 +3,10 @@ from typing import Optional
 import httpx
 
 from app.config.settings import Settings
+from app.libs.cache import ResponseCache
+from app.libs.lanes import LaneLimiter, LaneTransport, SyncLaneTransport
+from app.libs.recorder import PayloadRecorder
+from app.libs.single_flight import SingleFlight
 
 from .clients.accounts_client import AccountsClient
 from .clients.budgets_client import BudgetsClient
@@ -16,13 +20,27 @@ class YNABClient:
 
   BASE_URL = "https://api.youneedabudget.com/v1"
 
-  def __init__(self, access_token: Optional[str] = None, async_mode: Optional[bool] = False):
+  def __init__(
+    self,
+    access_token: Optional[str] = None,
+    async_mode: Optional[bool] = False,
+    cache_size: Optional[int] = None,
+    recorder: Optional[PayloadRecorder] = None,
+    limiter: Optional[LaneLimiter] = None,
+  ):
     """
     Initializes the YNABClient with the provided access token.
 
     Args:
         access_token (str): Your personal access token for the YNAB API.
         async_mode (bool): If True, uses an asynchronous HTTP client.
+        cache_size (int, optional): Maximum number of cached reads. 0 disables the response cache.
+        recorder (PayloadRecorder, optional): Receives the raw body of every read, e.g. to archive it.
+        limiter (LaneLimiter, optional): Shares the connections and the hourly quota between interactive and
+            background calls. Defaults to one reserving `Settings.interactive_reserved_connections` and
+            `Settings.interactive_reserved_quota` of `Settings.ynab_hourly_quota` for interactive calls, counted in
+            this process only. Async clients of processes sharing the token pass `shared_ynab_limiter()` to count
+            it across them, sync clients refuse it.
     """
     self.access_token = access_token or Settings.ynab_access_token
     self.async_mode = async_mode or Settings.ynab_async_mode
@@ -33,30 +51,54 @@ class YNABClient:
     self.headers = {
       "Authorization": f"Bearer {self.access_token}",
       "Accept": "application/json",
+      "Content-Type": "application/json",
     }
 
     self.async_mode = async_mode
 
-    self.session = httpx.Client(headers=self.headers, base_url=self.BASE_URL)
-
-    # if self.async_mode:
-    #   self.session = httpx.AsyncClient(headers=self.headers, base_url=self.BASE_URL)
-    # else:
-    #   self.session = httpx.Client(headers=self.headers, base_url=self.BASE_URL)
+    self.limiter = limiter or LaneLimiter(
+      Settings.upstream_max_connections,
+      Settings.interactive_reserved_connections,
+      quota=Settings.ynab_hourly_quota,
+      reserved_quota=Settings.interactive_reserved_quota,
+    )
+
+    if self.async_mode:
+      self.session = httpx.AsyncClient(
+        headers=self.headers, base_url=self.BASE_URL, transport=LaneTransport(self.limiter)
+      )
+    else:
+      self.session = httpx.Client(
+        headers=self.headers, base_url=self.BASE_URL, transport=SyncLaneTransport(self.limiter)
+      )
+
+    cache_size = Settings.ynab_cache_size if cache_size is None else cache_size
+    self.cache = ResponseCache(max_size=cache_size) if cache_size else None
+    self.single_flight = SingleFlight()
 
     # API Contexts
-    self.budgets = BudgetsClient(self.session, async_mode=self.async_mode)
-    self.accounts = AccountsClient(self.session, async_mode=self.async_mode)
-    self.transactions = TransactionsClient(self.session, async_mode=self.async_mode)
+    context_options = {
+      "async_mode": self.async_mode,
+      "cache": self.cache,
+      "single_flight": self.single_flight,
+      "recorder": recorder,
+    }
+    self.budgets = BudgetsClient(self.session, **context_options)
+    self.accounts = AccountsClient(self.session, **context_options)
+    self.transactions = TransactionsClient(self.session, **context_options)
 
   def close(self):
     """
     Closes the HTTP session.
     """
-    self.session.close()
+    if not self.async_mode:
+      self.session.close()
 
   async def aclose(self):
     """
     Asynchronously closes the HTTP session.
     """
-    await self.session.aclose()
+    if self.async_mode:
+      await self.session.aclose()
+    else:
+      self.session.close()
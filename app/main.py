@@ -1,25 +1,72 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from app.config.database import async_session_maker
 from app.config.settings import Settings
+from app.libs.lanes import BACKGROUND, lane
+from app.libs.offload import CpuExecutor
 from app.libs.pluggy.pluggy_client import PluggyAIClient
 from app.libs.ynab.ynab_client import YNABClient
+from app.routers import refreshes, webhooks
+from app.services.budget_snapshot_service import BudgetSnapshotService
+from app.services.job_queue import JobQueue
+from app.services.payload_archive import PayloadArchive
+from app.services.quota_bucket import shared_ynab_limiter
+from app.services.refresh_orchestrator import RefreshOrchestrator
+from app.services.sync_cursor_service import SyncCursorService
+from app.services.webhook_service import WebhookService
+from app.services.ynab_outbox_service import YNABOutboxService
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-  app.state.ynab_client = YNABClient()
-  app.state.pluggy_client = PluggyAIClient()
+  # Raw API pages are archived for replay when enabled
+  app.state.payload_archive = PayloadArchive(async_session_maker) if Settings.payload_archive else None
+  recorder = app.state.payload_archive.record if app.state.payload_archive else None
+
+  app.state.ynab_client = YNABClient(
+    async_mode=True, recorder=recorder, limiter=shared_ynab_limiter(async_session_maker)
+  )
+  app.state.pluggy_client = PluggyAIClient(async_mode=True, recorder=recorder)
+
+  # Large budgets are validated and indexed in a process pool, keeping the event loop responsive
+  app.state.cpu_executor = CpuExecutor()
+
+  # Warm start from the budgets other workers already fetched
+  app.state.budget_snapshots = BudgetSnapshotService(
+    app.state.ynab_client, async_session_maker, executor=app.state.cpu_executor
+  )
+  await app.state.budget_snapshots.load_all()
+
+  # Drains the YNAB writes queued by syncs, every worker can run one
+  app.state.ynab_outbox = YNABOutboxService(app.state.ynab_client, async_session_maker)
+  with lane(BACKGROUND):
+    outbox_flusher = asyncio.create_task(app.state.ynab_outbox.run())
+
+  # Pluggy events enqueue syncs for the workers, and wake the refreshes started through `POST /refreshes`
+  queue = JobQueue(async_session_maker)
+  cursors = SyncCursorService(async_session_maker)
+  app.state.refreshes = RefreshOrchestrator(app.state.pluggy_client, queue, cursors, async_session_maker)
+  app.state.webhooks = WebhookService(queue, cursors, async_session_maker, refreshes=app.state.refreshes)
 
   try:
     yield
   finally:
+    outbox_flusher.cancel()
+    await asyncio.gather(outbox_flusher, return_exceptions=True)
+    await app.state.refreshes.close()
     await app.state.ynab_client.aclose()
     await app.state.pluggy_client.async_close()
+    if app.state.payload_archive:
+      await app.state.payload_archive.flush()
+    app.state.cpu_executor.shutdown()
 
 
 app = FastAPI(lifespan=lifespan, debug=Settings.debug)
+app.include_router(webhooks.router)
+app.include_router(refreshes.router)
 
 
 @app.get("/healthcheck")
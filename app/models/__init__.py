@@ -1,4 +1,21 @@
 from .account_reference import AccountReference
+from .api_quota import ApiQuota
+from .backfill_checkpoint import BackfillCheckpoint
+from .budget_snapshot import BudgetSnapshot
+from .job import Job
+from .raw_payload import RawPayload
+from .sync_cursor import SyncCursor
 from .user import User
+from .ynab_outbox_entry import YNABOutboxEntry
 
-__all__ = ["User", "AccountReference"]
+__all__ = [
+  "User",
+  "AccountReference",
+  "BudgetSnapshot",
+  "RawPayload",
+  "BackfillCheckpoint",
+  "SyncCursor",
+  "YNABOutboxEntry",
+  "Job",
+  "ApiQuota",
+]
@@ -0,0 +1,14 @@
+from datetime import datetime
+
+from sqlmodel import Field
+
+from app.models.base_sql_model import BaseSQLModel
+
+
+# Request quota of an upstream API shared by every process, as a token bucket
+class ApiQuota(BaseSQLModel, table=True):
+  __tablename__ = "api_quotas"
+
+  name: str = Field(default=None, nullable=False, unique=True, description="The upstream API, e.g. `ynab`")
+  tokens: float = Field(default=0, nullable=False, description="Requests that can be sent right away")
+  updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False, description="Last refill of the bucket")
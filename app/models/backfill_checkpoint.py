@@ -0,0 +1,18 @@
+from datetime import date, datetime
+
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Field
+
+from app.models.base_sql_model import BaseSQLModel
+
+
+# Month window of a backfill already imported into YNAB
+class BackfillCheckpoint(BaseSQLModel, table=True):
+  __tablename__ = "backfill_checkpoints"
+  __table_args__ = (UniqueConstraint("account_reference_id", "window_start"),)
+
+  account_reference_id: int = Field(default=None, foreign_key="account_references.id", index=True)
+  window_start: date = Field(default=None, nullable=False)
+  window_end: date = Field(default=None, nullable=False)
+  created: int = Field(default=0, nullable=False, description="Transactions created in YNAB for the window")
+  completed_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
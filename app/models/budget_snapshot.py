@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field
+
+from app.models.base_sql_model import BaseSQLModel
+
+
+# Last known state of a YNAB budget, shared by every worker
+class BudgetSnapshot(BaseSQLModel, table=True):
+  __tablename__ = "budget_snapshots"
+
+  budget_id: str = Field(default=None, nullable=False, unique=True, description="YNAB Budget ID")
+  server_knowledge: int = Field(
+    default=0, sa_column=Column(BigInteger, nullable=False), description="YNAB server knowledge of the payload"
+  )
+  payload: dict = Field(default_factory=dict, sa_column=Column(JSONB, nullable=False))
+  updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
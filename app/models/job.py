@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field
+
+from app.models.base_sql_model import BaseSQLModel
+
+
+# Unit of background work (sync, backfill, reconcile), picked up by `app.worker` processes
+class Job(BaseSQLModel, table=True):
+  __tablename__ = "jobs"
+  __table_args__ = (
+    Index("ix_jobs_status_priority_run_at", "status", "priority", "run_at"),
+    # At most one pending job per dedupe key, later triggers merge into it
+    Index("ix_jobs_pending_dedupe_key", "dedupe_key", unique=True, postgresql_where=text("status = 'pending'")),
+  )
+
+  kind: str = Field(default=None, nullable=False, description="`sync`, `backfill` or `reconcile`")
+  payload: dict = Field(default_factory=dict, sa_column=Column(JSONB, nullable=False))
+  priority: int = Field(default=0, nullable=False, description="Higher priorities are dequeued first")
+  dedupe_key: Optional[str] = Field(default=None, description="Pending jobs sharing it are coalesced")
+  user_id: Optional[int] = Field(default=None, index=True, description="Owner the workers are shared fairly between")
+
+  status: str = Field(default="pending", nullable=False, description="`pending`, `running`, `done` or `failed`")
+  attempts: int = Field(default=0, nullable=False)
+  max_attempts: int = Field(default=5, nullable=False)
+  run_at: datetime = Field(default_factory=datetime.utcnow, nullable=False, description="Not dequeued before")
+  locked_until: Optional[datetime] = Field(default=None, description="Visibility timeout of a running job")
+  locked_by: Optional[str] = Field(default=None, description="Worker running the job")
+  last_error: Optional[str] = Field(default=None)
+
+  created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+  updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
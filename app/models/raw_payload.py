@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, Index, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field
+
+from app.models.base_sql_model import BaseSQLModel
+
+
+# Compressed raw response body, as received from Pluggy or YNAB. Rows are only ever appended.
+class RawPayload(BaseSQLModel, table=True):
+  __tablename__ = "raw_payloads"
+  __table_args__ = (Index("ix_raw_payloads_account_id_fetched_at", "account_id", "fetched_at"),)
+
+  source: str = Field(default=None, nullable=False, description="API the payload came from, `pluggy` or `ynab`")
+  url: str = Field(default=None, nullable=False, description="Request path")
+  params: dict = Field(default_factory=dict, sa_column=Column(JSONB, nullable=False), description="Query parameters")
+  account_id: Optional[str] = Field(
+    default=None, description="Pluggy account or item ID, or YNAB account or budget ID the payload belongs to"
+  )
+  fetched_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+  encoding: str = Field(default=None, nullable=False, description="Compression of the payload, `zstd`")
+  size: int = Field(default=0, nullable=False, description="Uncompressed size in bytes")
+  payload: bytes = Field(default=None, sa_column=Column(LargeBinary, nullable=False))
@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Field
+
+from app.models.base_sql_model import BaseSQLModel
+
+
+# Progress of a sync run of a Pluggy account, committed after every page written to YNAB
+class SyncCursor(BaseSQLModel, table=True):
+  __tablename__ = "sync_cursors"
+  __table_args__ = (UniqueConstraint("account_reference_id", "account_id", "run_key"),)
+
+  account_reference_id: int = Field(default=None, foreign_key="account_references.id", index=True)
+  account_id: str = Field(default=None, nullable=False, description="Pluggy Account ID")
+  run_key: str = Field(default=None, nullable=False, description="Date range of the run, `<from>:<to>`")
+
+  page: int = Field(default=1, nullable=False, description="Next Pluggy page to fetch")
+  batches_flushed: int = Field(default=0, nullable=False, description="Write batches sent to YNAB by the run")
+  created: int = Field(default=0, nullable=False, description="Transactions created in YNAB by the run")
+
+  started_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+  updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+  completed_at: Optional[datetime] = Field(default=None, description="Set once every page was written")
+  last_synced_at: Optional[datetime] = Field(default=None, description="Start of the last completed run")
@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING, List
 
-from sqlmodel import Relationship
+from sqlmodel import Field, Relationship
 
 from app.models.base_sql_model import BaseSQLModel
 
@@ -12,4 +12,8 @@ if TYPE_CHECKING:
 class User(BaseSQLModel, table=True):
   __tablename__ = "users"
 
+  sync_weight: int = Field(
+    default=1, nullable=False, sa_column_kwargs={"server_default": "1"}, description="Share of the sync workers"
+  )
+
   account_references: List["AccountReference"] = Relationship(back_populates="user")
@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field
+
+from app.models.base_sql_model import BaseSQLModel
+
+
+# YNAB write planned by a sync, waiting to be flushed. Entries are deleted once YNAB accepted them.
+class YNABOutboxEntry(BaseSQLModel, table=True):
+  __tablename__ = "ynab_outbox"
+  __table_args__ = (Index("ix_ynab_outbox_status_next_attempt_at", "status", "next_attempt_at"),)
+
+  budget_id: str = Field(default=None, nullable=False, index=True, description="YNAB Budget ID")
+  operation: str = Field(default=None, nullable=False, description="`create` or `update`")
+  payload: dict = Field(default_factory=dict, sa_column=Column(JSONB, nullable=False), description="Transaction")
+  account_reference_id: Optional[int] = Field(default=None, foreign_key="account_references.id")
+
+  status: str = Field(default="pending", nullable=False, description="`pending`, or `dead` once out of attempts")
+  attempts: int = Field(default=0, nullable=False, description="Rejections of the entry, transient errors excluded")
+  next_attempt_at: datetime = Field(
+    default_factory=datetime.utcnow, nullable=False, description="Backoff of a failed entry, or lease of a claimed one"
+  )
+  last_error: Optional[str] = Field(default=None)
+  created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
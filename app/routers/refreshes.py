@@ -0,0 +1,47 @@
+import secrets
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from pydantic import BaseModel, Field
+
+from app.config.dependencies import get_refresh_orchestrator
+from app.config.settings import Settings
+from app.services.refresh_orchestrator import RefreshOrchestrator
+
+router = APIRouter(prefix="/refreshes", tags=["refreshes"])
+
+
+class RefreshRequest(BaseModel):
+  item_ids: List[str] = Field(..., min_length=1, description="The Pluggy items to refresh")
+
+
+@router.post("", status_code=status.HTTP_202_ACCEPTED)
+async def refresh_items(
+  request: RefreshRequest,
+  refreshes: RefreshOrchestrator = Depends(get_refresh_orchestrator),
+  authorization: Optional[str] = Header(default=None),
+):
+  """
+  Refreshes Pluggy items in the background, enqueuing the syncs of each as soon as its refresh succeeds.
+
+  Callers authenticate with `Authorization: Bearer <REFRESH_API_TOKEN>`, and the endpoint is disabled until the
+  token is set. Items no account reference syncs are rejected.
+
+  The item events Pluggy sends to this worker wake its refreshes right away. Those reaching another worker do not,
+  and the refresh notices at its next poll.
+  """
+  token = Settings.refresh_api_token
+  if not token:
+    raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="REFRESH_API_TOKEN is not set")
+  if not secrets.compare_digest(authorization or "", f"Bearer {token}"):
+    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API token")
+
+  item_ids = list(dict.fromkeys(request.item_ids))
+  unknown = await refreshes.unknown_items(item_ids)
+  if unknown:
+    raise HTTPException(
+      status_code=status.HTTP_404_NOT_FOUND, detail=f"No account reference syncs items: {', '.join(unknown)}"
+    )
+
+  refreshes.start(item_ids)
+  return {"item_ids": item_ids}
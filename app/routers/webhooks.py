@@ -0,0 +1,39 @@
+import logging
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+
+from app.config.dependencies import get_webhook_service
+from app.config.settings import Settings
+from app.libs.pluggy.models.webhook import WebhookEvent
+from app.services.webhook_service import WebhookService
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/webhooks", tags=["webhooks"])
+
+
+@router.post("/pluggy", status_code=status.HTTP_202_ACCEPTED)
+async def pluggy_webhook(
+  event: WebhookEvent,
+  webhooks: WebhookService = Depends(get_webhook_service),
+  x_webhook_secret: Optional[str] = Header(default=None),
+):
+  """
+  Receives Pluggy events. Syncs are enqueued before the delivery is acknowledged, so Pluggy retries a delivery
+  that could not be.
+  """
+  secret = Settings.pluggy_webhook_secret
+  if secret and not secrets.compare_digest(x_webhook_secret or "", secret):
+    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid webhook secret")
+
+  accepted = webhooks.accept(event)
+  if accepted:
+    try:
+      await webhooks.dispatch(event)
+    except Exception:
+      webhooks.forget(event)
+      logger.exception(f"Failed to dispatch Pluggy {event.event} for item {event.itemId}")
+      raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to enqueue the syncs")
+  return {"accepted": accepted}
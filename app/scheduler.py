@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import logging
+import signal
+
+from app.config.database import async_session_maker, engine
+from app.config.settings import Settings
+from app.libs import PluggyAIClient, YNABClient
+from app.libs.lanes import BACKGROUND, lane
+from app.libs.offload import CpuExecutor
+from app.services.advisory_lock import AdvisoryLock, lock_key
+from app.services.budget_snapshot_service import BudgetSnapshotService
+from app.services.job_queue import JobQueue
+from app.services.payload_archive import PayloadArchive
+from app.services.quota_bucket import shared_ynab_limiter
+from app.services.sync_cursor_service import SyncCursorService
+from app.services.sync_planner import SyncPlanner
+from app.services.sync_scheduler import SyncScheduler
+from app.services.transactions_service import TransactionsService
+from app.services.ynab_outbox_service import YNABOutboxService
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_LOCK = lock_key("nanami:scheduler")
+
+
+async def run(interval: int):
+  """
+  Schedules syncs every `interval` seconds while holding the scheduler lock, until SIGINT or SIGTERM.
+
+  Any number of schedulers can run: only the one holding the Postgres advisory lock schedules, and another takes
+  over within an interval if it goes away.
+  """
+  stopping = asyncio.Event()
+  loop = asyncio.get_running_loop()
+  for signum in (signal.SIGINT, signal.SIGTERM):
+    loop.add_signal_handler(signum, stopping.set)
+
+  # Pages the plans fetch are archived, so plans of the same item refresh read them back instead of calling Pluggy
+  archive = PayloadArchive(async_session_maker) if Settings.payload_archive else None
+  recorder = archive.record if archive else None
+  ynab = YNABClient(async_mode=True, recorder=recorder, limiter=shared_ynab_limiter(async_session_maker))
+  pluggy = PluggyAIClient(async_mode=True, recorder=recorder)
+
+  # Syncs are dry-run before being enqueued. The outbox is only there to plan its batches, nothing is written.
+  transactions = TransactionsService(ynab, pluggy, archive=archive, outbox=YNABOutboxService(ynab, async_session_maker))
+  budget_snapshots = BudgetSnapshotService(ynab, async_session_maker)
+  await budget_snapshots.load_all()
+  # Pairs the transfers of large plans in a process pool
+  executor = CpuExecutor()
+
+  scheduler = SyncScheduler(
+    pluggy,
+    JobQueue(async_session_maker),
+    SyncCursorService(async_session_maker),
+    async_session_maker,
+    planner=SyncPlanner(transactions, budget_snapshots, executor=executor),
+  )
+  lock = AdvisoryLock(engine, SCHEDULER_LOCK)
+
+  try:
+    while not stopping.is_set():
+      try:
+        leading = await lock.check() or await lock.acquire()
+        if leading:
+          await scheduler.tick()
+      except Exception:
+        logger.exception("Scheduling round failed")
+
+      try:
+        await asyncio.wait_for(stopping.wait(), timeout=interval)
+      except asyncio.TimeoutError:
+        pass
+  finally:
+    await lock.release()
+    if archive:
+      await archive.flush()
+    await ynab.aclose()
+    await pluggy.async_close()
+    executor.shutdown()
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Enqueues syncs for the items Pluggy refreshed.")
+  parser.add_argument("--interval", type=int, default=300, help="Seconds between two scheduling rounds")
+  args = parser.parse_args()
+
+  logging.basicConfig(level=logging.INFO)
+  # Nothing here is user-facing, the API processes keep the reserved upstream capacity
+  with lane(BACKGROUND):
+    asyncio.run(run(args.interval))
+
+
+if __name__ == "__main__":
+  main()
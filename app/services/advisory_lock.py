@@ -0,0 +1,113 @@
+from hashlib import blake2b
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+
+def lock_key(name: str) -> int:
+  """
+  Derives a stable signed 64-bit advisory lock key from a name.
+  """
+  return int.from_bytes(blake2b(name.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+class AdvisoryLock:
+  """
+  Session-level Postgres advisory lock, held on a dedicated connection until released.
+
+  The key is either a single 64-bit integer or a pair of 32-bit integers, matching the two forms of
+  `pg_try_advisory_lock`. Postgres releases the lock by itself if the connection drops, so a crashed holder
+  never keeps it.
+  """
+
+  def __init__(self, engine: AsyncEngine, *key: int):
+    if len(key) not in (1, 2):
+      raise ValueError("An advisory lock key is one 64-bit integer or two 32-bit integers")
+
+    self.engine = engine
+    self.key = key
+    self.connection: Optional[AsyncConnection] = None
+
+  @property
+  def held(self) -> bool:
+    return self.connection is not None
+
+  async def acquire(self) -> bool:
+    """
+    Tries to take the lock without waiting.
+
+    Returns:
+        bool: Whether the lock is held, including when it already was.
+    """
+    if self.connection is not None:
+      return True
+
+    connection = await self.engine.connect()
+    try:
+      acquired = (await connection.execute(*self._call("pg_try_advisory_lock"))).scalar()
+      # Autobegun transaction is closed, the lock itself lives on the session
+      await connection.commit()
+    except Exception:
+      await connection.close()
+      raise
+
+    if not acquired:
+      await connection.close()
+      return False
+
+    self.connection = connection
+    return True
+
+  async def check(self) -> bool:
+    """
+    Checks the connection holding the lock is still alive, dropping the lock if it is not.
+
+    Returns:
+        bool: Whether the lock is still held.
+    """
+    if self.connection is None:
+      return False
+
+    try:
+      await self.connection.execute(text("SELECT 1"))
+      await self.connection.commit()
+      return True
+    except Exception:
+      await self._discard(invalidate=True)
+      return False
+
+  async def release(self):
+    """
+    Releases the lock, if held.
+    """
+    if self.connection is None:
+      return
+
+    try:
+      await self.connection.execute(*self._call("pg_advisory_unlock"))
+      await self.connection.commit()
+    except Exception:
+      # Never hand a connection that may still hold the lock back to the pool
+      await self._discard(invalidate=True)
+      raise
+    await self._discard()
+
+  async def __aenter__(self) -> bool:
+    return await self.acquire()
+
+  async def __aexit__(self, *exc_info):
+    await self.release()
+
+  def _call(self, function: str):
+    params = {f"key{index}": value for index, value in enumerate(self.key)}
+    return text(f"SELECT {function}({', '.join(f':{name}' for name in params)})"), params
+
+  async def _discard(self, invalidate: bool = False):
+    connection, self.connection = self.connection, None
+    try:
+      if invalidate:
+        await connection.invalidate()
+      await connection.close()
+    except Exception:
+      pass
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+from datetime import date, datetime, time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models import AccountReference, BackfillCheckpoint
+from app.services.transactions_service import TransactionsService
+
+logger = logging.getLogger(__name__)
+
+
+def month_windows(start: date, end: date) -> List[Tuple[date, date]]:
+  """
+  Splits a date range into calendar month windows. The first and last windows are clipped to the range.
+
+  Returns:
+      list: The `(first_day, last_day)` of every window, oldest first.
+  """
+  windows = []
+  window_start = start
+  while window_start <= end:
+    next_month = date(window_start.year + window_start.month // 12, window_start.month % 12 + 1, 1)
+    window_end = min(next_month.toordinal() - 1, end.toordinal())
+    windows.append((window_start, date.fromordinal(window_end)))
+    window_start = next_month
+  return windows
+
+
+class BackfillService:
+  """
+  Imports the history of an account reference one month window at a time.
+
+  A few windows are synced concurrently, each streamed page by page through `TransactionsService.sync`, so
+  memory stays bounded by the pages in flight whatever the length of the history. Every finished window is
+  checkpointed in `backfill_checkpoints`, and a backfill restarted after a crash or redeploy skips them.
+  """
+
+  def __init__(
+    self, transactions_service: TransactionsService, session_maker: async_sessionmaker, concurrency: int = 3
+  ):
+    """
+    Args:
+        transactions_service (TransactionsService): The sync pipeline windows are imported with.
+        session_maker (async_sessionmaker): Session factory of the database holding the checkpoints.
+        concurrency (int): Windows synced at the same time.
+    """
+    self.transactions = transactions_service
+    self.session_maker = session_maker
+    self.concurrency = concurrency
+
+  async def backfill(self, account_reference: AccountReference, start: date, end: Optional[date] = None) -> int:
+    """
+    Imports every transaction of an account reference between two dates, resuming from the last checkpoint.
+
+    Windows are all attempted even if some fail, so a retry only has the failed ones left.
+
+    Args:
+        account_reference (AccountReference): The accounts to backfill.
+        start (date): The first day of the history to import.
+        end (date, optional): The last day of the history to import. Defaults to today.
+
+    Returns:
+        int: The number of transactions created in YNAB.
+
+    Raises:
+        Exception: The first error of a failed window, once every window was attempted.
+    """
+    windows = month_windows(start, end or date.today())
+    completed = await self.completed_windows(account_reference)
+    # A window checkpointed before its month was over (e.g. the current one) is only synced for the rest
+    pending = [window for window in windows if completed.get(window[0], date.min) < window[1]]
+
+    logger.info(
+      f"Backfilling account reference {account_reference.id}: {len(pending)} of {len(windows)} windows pending"
+    )
+
+    semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def run(window: Tuple[date, date]) -> int:
+      async with semaphore:
+        return await self.sync_window(account_reference, *window, resume_from=completed.get(window[0]))
+
+    results = await asyncio.gather(*(run(window) for window in pending), return_exceptions=True)
+
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+      logger.error(f"Backfill of account reference {account_reference.id}: {len(errors)} windows failed")
+      raise errors[0]
+
+    return sum(results)
+
+  async def sync_window(
+    self,
+    account_reference: AccountReference,
+    window_start: date,
+    window_end: date,
+    resume_from: Optional[date] = None,
+  ) -> int:
+    """
+    Imports a single window and checkpoints it.
+
+    Args:
+        account_reference (AccountReference): The accounts to backfill.
+        window_start (date): The first day of the window.
+        window_end (date): The last day of the window.
+        resume_from (date, optional): The last day of a previous checkpoint of the window. The sync starts from it
+            instead of the start of the window, that day included as it may not have been over.
+
+    Returns:
+        int: The number of transactions created in YNAB.
+    """
+    created = await self.transactions.sync(
+      account_reference,
+      from_date=datetime.combine(max(window_start, resume_from or window_start), time.min),
+      to_date=datetime.combine(window_end, time.min),
+    )
+
+    statement = insert(BackfillCheckpoint).values(
+      account_reference_id=account_reference.id,
+      window_start=window_start,
+      window_end=window_end,
+      created=created,
+      completed_at=datetime.utcnow(),
+    )
+    # Windows are idempotent, only a checkpoint covering fewer days is extended
+    statement = statement.on_conflict_do_update(
+      index_elements=[BackfillCheckpoint.account_reference_id, BackfillCheckpoint.window_start],
+      set_={
+        "window_end": statement.excluded.window_end,
+        "created": BackfillCheckpoint.created + statement.excluded.created,
+        "completed_at": statement.excluded.completed_at,
+      },
+      where=BackfillCheckpoint.window_end < statement.excluded.window_end,
+    )
+
+    async with self.session_maker() as session:
+      async with session.begin():
+        await session.execute(statement)
+
+    return created
+
+  async def completed_windows(self, account_reference: AccountReference) -> Dict[date, date]:
+    """
+    Returns the windows already imported for an account reference, as their last day by their first day.
+    """
+    async with self.session_maker() as session:
+      result = await session.execute(
+        select(BackfillCheckpoint.window_start, BackfillCheckpoint.window_end).where(
+          BackfillCheckpoint.account_reference_id == account_reference.id
+        )
+      )
+      return dict(result.all())
@@ -0,0 +1,276 @@
+import json
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar, Union
+
+from sqlalchemy import Text, cast, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.libs import YNABClient
+from app.libs.lanes import current_lane
+from app.libs.offload import CpuExecutor
+from app.libs.single_flight import SingleFlight
+from app.libs.ynab.models.budget import BudgetResponse
+from app.libs.ynab.transaction_table import TransactionTable
+from app.libs.ynab.utils import parse_content
+from app.models import BudgetSnapshot
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Budget collections merged entity by entity when a delta comes in
+COLLECTIONS = (
+  "accounts",
+  "payees",
+  "payee_locations",
+  "category_groups",
+  "categories",
+  "months",
+  "transactions",
+  "subtransactions",
+  "scheduled_transactions",
+  "scheduled_subtransactions",
+)
+
+
+class BudgetIndex:
+  """
+  In-memory copy of a YNAB budget, with its entities keyed by ID and the lookups used while mapping transactions.
+
+  Transactions are also kept in a `TransactionTable` for matching, built on first use and then kept up to date.
+  """
+
+  def __init__(self, budget_id: str, payload: Dict[str, Any], server_knowledge: int):
+    self.budget_id = budget_id
+    self.server_knowledge = server_knowledge
+    self.fields: Dict[str, Any] = {}
+    self.entities: Dict[str, Dict[str, dict]] = {name: {} for name in COLLECTIONS}
+    self._transaction_table: Optional[TransactionTable] = None
+    self._merge(payload)
+
+  def apply_delta(self, delta: Dict[str, Any], server_knowledge: int):
+    """
+    Merges the entities of a delta response, dropping the ones flagged as deleted.
+
+    Args:
+        delta (dict): The budget returned for `last_knowledge_of_server`.
+        server_knowledge (int): The server knowledge returned with the delta.
+    """
+    self._merge(delta)
+    self.server_knowledge = server_knowledge
+
+  def to_payload(self) -> Dict[str, Any]:
+    """
+    Serialises the budget back to the shape of the YNAB budget response.
+    """
+    return {**self.fields, **{name: list(entities.values()) for name, entities in self.entities.items()}}
+
+  @property
+  def transaction_table(self) -> TransactionTable:
+    if self._transaction_table is None:
+      self._transaction_table = TransactionTable.from_transactions(self.entities["transactions"].values())
+    return self._transaction_table
+
+  @property
+  def payees_by_name(self) -> Dict[str, dict]:
+    if self._payees_by_name is None:
+      self._payees_by_name = {payee["name"].casefold(): payee for payee in self.entities["payees"].values()}
+    return self._payees_by_name
+
+  @property
+  def categories_by_name(self) -> Dict[str, dict]:
+    if self._categories_by_name is None:
+      self._categories_by_name = {
+        category["name"].casefold(): category for category in self.entities["categories"].values()
+      }
+    return self._categories_by_name
+
+  def _merge(self, payload: Dict[str, Any]):
+    self.fields.update({key: value for key, value in payload.items() if key not in COLLECTIONS})
+
+    for name in COLLECTIONS:
+      entities = self.entities[name]
+      for entity in payload.get(name) or []:
+        # Months have no ID, they are keyed by the month itself
+        key = entity.get("id") or entity.get("month")
+        if entity.get("deleted"):
+          entities.pop(key, None)
+        else:
+          entities[key] = entity
+
+    # The table takes deltas as they come, deletions included
+    if self._transaction_table is not None:
+      self._transaction_table.apply(payload.get("transactions") or [])
+
+    # Lookups are rebuilt lazily on next access
+    self._payees_by_name: Optional[Dict[str, dict]] = None
+    self._categories_by_name: Optional[Dict[str, dict]] = None
+
+
+def parse_budget(content: bytes) -> Tuple[Dict[str, Any], int]:
+  """
+  Validates a raw budget response, e.g. in a `CpuExecutor` process.
+
+  Returns:
+      Tuple[dict, int]: The budget as plain dicts, which pickle back far faster than models, and the server
+          knowledge.
+  """
+  data = parse_content(content, BudgetResponse)
+  return data.budget.model_dump(mode="json"), data.server_knowledge
+
+
+def build_index(content: Union[bytes, str], budget_id: str, server_knowledge: Optional[int] = None) -> BudgetIndex:
+  """
+  Builds a budget index along with its transaction table and lookups, e.g. in a `CpuExecutor` process.
+
+  Args:
+      content (bytes): A raw budget response, or the JSON of a stored snapshot payload.
+      budget_id (str): The ID of the YNAB budget.
+      server_knowledge (int, optional): The knowledge of a stored snapshot. None for a budget response.
+  """
+  if server_knowledge is None:
+    payload, server_knowledge = parse_budget(content)
+  else:
+    payload = json.loads(content)
+
+  index = BudgetIndex(budget_id, payload, server_knowledge)
+  index.transaction_table
+  index.payees_by_name
+  index.categories_by_name
+  return index
+
+
+class BudgetSnapshotService:
+  """
+  Keeps YNAB budgets in memory, shared across workers through the `budget_snapshots` table.
+
+  A worker loads the stored snapshots at startup and, from then on, only asks YNAB for what changed since
+  the snapshot server knowledge. Whichever worker moves a budget forward persists it for the others.
+
+  Responses and snapshots are parsed from their raw JSON, in the executor's process pool when one is given. Only
+  plain dicts and the transaction table arrays come back to the event loop.
+  """
+
+  def __init__(
+    self, ynab_client: YNABClient, session_maker: async_sessionmaker, executor: Optional[CpuExecutor] = None
+  ):
+    """
+    Args:
+        ynab_client (YNABClient): The client budgets are fetched with.
+        session_maker (async_sessionmaker): Session factory of the database holding the snapshots.
+        executor (CpuExecutor, optional): Validates large budgets and builds their indexes off the event loop.
+    """
+    self.ynab = ynab_client
+    self.session_maker = session_maker
+    self.executor = executor
+    self.budgets: Dict[str, BudgetIndex] = {}
+    self.single_flight = SingleFlight()
+
+  async def load_all(self) -> int:
+    """
+    Loads every stored snapshot, without calling YNAB.
+
+    Returns:
+        int: The number of budgets loaded.
+    """
+    async with self.session_maker() as session:
+      result = await session.execute(
+        select(BudgetSnapshot.budget_id, BudgetSnapshot.server_knowledge, cast(BudgetSnapshot.payload, Text))
+      )
+      snapshots = result.all()
+
+    for budget_id, server_knowledge, payload in snapshots:
+      self.budgets[budget_id] = await self._parse(build_index, payload, budget_id, server_knowledge)
+
+    logger.info(f"Loaded {len(self.budgets)} budget snapshots")
+    return len(self.budgets)
+
+  async def get(self, budget_id: str) -> BudgetIndex:
+    """
+    Returns the in-memory budget, fetching it if this worker has never seen it.
+    """
+    index = self.budgets.get(budget_id)
+    if index is None:
+      index = await self.refresh(budget_id)
+    return index
+
+  async def refresh(self, budget_id: str) -> BudgetIndex:
+    """
+    Brings a budget up to date, picking up newer snapshots stored by other workers first.
+
+    Concurrent refreshes of a budget in the same lane share one delta fetch, rather than each fetching and parsing
+    the same delta.
+
+    Args:
+        budget_id (str): The ID of the YNAB budget.
+
+    Returns:
+        BudgetIndex: The up-to-date budget.
+    """
+    return await self.single_flight.do(("budget", budget_id, current_lane.get()), lambda: self._refresh(budget_id))
+
+  async def _refresh(self, budget_id: str) -> BudgetIndex:
+    index = self.budgets.get(budget_id)
+
+    stored_knowledge = await self._stored_knowledge(budget_id)
+    if stored_knowledge is not None and (index is None or stored_knowledge > index.server_knowledge):
+      index = await self._load(budget_id)
+
+    knowledge = index.server_knowledge if index is not None else None
+    content = await self.ynab.budgets.get_budget_delta_content(budget_id, last_knowledge_of_server=knowledge)
+
+    if index is None:
+      index = await self._parse(build_index, content, budget_id)
+    else:
+      payload, server_knowledge = await self._parse(parse_budget, content)
+      if server_knowledge <= index.server_knowledge:
+        self.budgets[budget_id] = index
+        return index
+      index.apply_delta(payload, server_knowledge)
+
+    self.budgets[budget_id] = index
+    await self._save(index)
+    return index
+
+  async def _stored_knowledge(self, budget_id: str) -> Optional[int]:
+    async with self.session_maker() as session:
+      result = await session.execute(
+        select(BudgetSnapshot.server_knowledge).where(BudgetSnapshot.budget_id == budget_id)
+      )
+      return result.scalar_one_or_none()
+
+  async def _load(self, budget_id: str) -> BudgetIndex:
+    async with self.session_maker() as session:
+      result = await session.execute(
+        select(BudgetSnapshot.server_knowledge, cast(BudgetSnapshot.payload, Text)).where(
+          BudgetSnapshot.budget_id == budget_id
+        )
+      )
+      server_knowledge, payload = result.one()
+    return await self._parse(build_index, payload, budget_id, server_knowledge)
+
+  async def _parse(self, fn: Callable[..., T], content: Union[bytes, str], *args: Any) -> T:
+    if self.executor is None:
+      return fn(content, *args)
+    return await self.executor.parse(fn, content, *args)
+
+  async def _save(self, index: BudgetIndex):
+    values = {
+      "budget_id": index.budget_id,
+      "server_knowledge": index.server_knowledge,
+      "payload": index.to_payload(),
+      "updated_at": datetime.utcnow(),
+    }
+    statement = insert(BudgetSnapshot).values(**values)
+    # Never overwrite a snapshot another worker already moved further
+    statement = statement.on_conflict_do_update(
+      index_elements=[BudgetSnapshot.budget_id],
+      set_={key: statement.excluded[key] for key in ("server_knowledge", "payload", "updated_at")},
+      where=BudgetSnapshot.server_knowledge < statement.excluded.server_knowledge,
+    )
+
+    async with self.session_maker() as session:
+      async with session.begin():
+        await session.execute(statement)
@@ -0,0 +1,375 @@
+import heapq
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Float, and_, func, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config.settings import Settings
+from app.models import AccountReference, Job, User
+
+JOB_KINDS = ("sync", "backfill", "reconcile")
+
+
+def merge_ranges(current: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+  """
+  Merges the payloads of two coalesced jobs, covering the union of their `from_date` to `to_date` ranges.
+
+  A missing bound is open, and stays open once merged. Other keys take their newest value.
+  """
+  merged = {**current, **new}
+  for key, pick in (("from_date", min), ("to_date", max)):
+    if current.get(key) and new.get(key):
+      # ISO 8601 dates sort like the dates themselves
+      merged[key] = pick(current[key], new[key])
+    else:
+      merged.pop(key, None)
+  return merged
+
+
+class JobQueue:
+  """
+  Durable job queue on the `jobs` table.
+
+  Workers dequeue with `FOR UPDATE SKIP LOCKED`, so any number of them share the queue without handing the same
+  job out twice. A dequeued job stays invisible for the visibility timeout, extended by `heartbeat` while it runs.
+  If its worker dies, the job becomes visible again once the timeout expires. Failed jobs are retried with
+  exponential backoff, up to their `max_attempts`.
+  """
+
+  # Seconds before the first retry, doubled on every further attempt
+  RETRY_DELAY = 30
+  MAX_RETRY_DELAY = 3600
+  # Candidates fetched per job to claim, to share the claimed jobs fairly between users
+  CANDIDATES = 4
+
+  def __init__(self, session_maker: async_sessionmaker, visibility_timeout: Optional[int] = None):
+    """
+    Args:
+        session_maker (async_sessionmaker): Session factory of the database holding the queue.
+        visibility_timeout (int, optional): Seconds a dequeued job stays invisible to other workers.
+            Defaults to `Settings.job_visibility_timeout`.
+    """
+    self.session_maker = session_maker
+    self.visibility_timeout = timedelta(seconds=visibility_timeout or Settings.job_visibility_timeout)
+
+  async def enqueue(
+    self,
+    kind: str,
+    payload: Dict[str, Any],
+    priority: int = 0,
+    run_at: Optional[datetime] = None,
+    max_attempts: int = 5,
+    dedupe_key: Optional[str] = None,
+  ) -> Job:
+    """
+    Adds a job to the queue.
+
+    A job with a dedupe key is coalesced with the pending job of the same key, if any: their date ranges are
+    merged, and the merged job keeps the earliest `run_at` and the highest priority. Jobs already running are
+    left alone, so a trigger arriving during a run still gets a run of its own afterwards.
+
+    Args:
+        kind (str): `sync`, `backfill` or `reconcile`.
+        payload (dict): The JSON arguments of the job.
+        priority (int): Higher priorities are dequeued first.
+        run_at (datetime, optional): When the job becomes due. Defaults to now.
+        max_attempts (int): Attempts before the job is given up as failed.
+        dedupe_key (str, optional): Identifies the jobs doing the same work, e.g. syncs of an account reference.
+
+    Returns:
+        Job: The queued job, or the pending one it was merged into.
+
+    Raises:
+        ValueError: If the kind is unknown.
+    """
+    if kind not in JOB_KINDS:
+      raise ValueError(f"Unknown job kind: {kind}")
+
+    job = Job(
+      kind=kind,
+      payload=payload,
+      priority=priority,
+      run_at=run_at or datetime.utcnow(),
+      max_attempts=max_attempts,
+      dedupe_key=dedupe_key,
+    )
+
+    async with self.session_maker() as session:
+      async with session.begin():
+        account_reference_id = payload.get("account_reference_id")
+        if account_reference_id is not None:
+          job.user_id = await session.scalar(
+            select(AccountReference.user_id).where(AccountReference.id == account_reference_id)
+          )
+
+        if dedupe_key is None:
+          session.add(job)
+        else:
+          job = await self._coalesce(session, job)
+    return job
+
+  async def enqueue_sync(
+    self,
+    account_reference_id: int,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    priority: int = 0,
+    debounce: Optional[int] = None,
+  ) -> Job:
+    """
+    Enqueues a sync of an account reference, debounced: the sync only becomes due after the debounce window,
+    and every trigger of the account reference arriving meanwhile merges into it.
+
+    Args:
+        account_reference_id (int): The account reference to sync.
+        from_date (str, optional): ISO 8601 date the sync starts from. Defaults to the whole history.
+        to_date (str, optional): ISO 8601 date the sync ends at. Defaults to today.
+        priority (int): Higher priorities are dequeued first.
+        debounce (int, optional): Seconds triggers are merged for. Defaults to `Settings.sync_debounce_window`.
+
+    Returns:
+        Job: The pending sync of the account reference.
+    """
+    payload: Dict[str, Any] = {"account_reference_id": account_reference_id}
+    if from_date:
+      payload["from_date"] = from_date
+    if to_date:
+      payload["to_date"] = to_date
+
+    debounce = Settings.sync_debounce_window if debounce is None else debounce
+    return await self.enqueue(
+      "sync",
+      payload,
+      priority=priority,
+      run_at=datetime.utcnow() + timedelta(seconds=debounce),
+      dedupe_key=f"sync:{account_reference_id}",
+    )
+
+  async def dequeue(self, worker_id: str, limit: int = 1) -> List[Job]:
+    """
+    Claims due jobs, along with running jobs whose visibility timeout expired.
+
+    Higher priorities are claimed first. Within a priority, workers are shared fairly between users: the next
+    job goes to the user with the fewest running jobs for their `sync_weight`, so a user importing years of
+    history does not hold back the syncs of the others. Ties go to the job due first.
+
+    Args:
+        worker_id (str): The worker claiming the jobs.
+        limit (int): Maximum number of jobs to claim.
+
+    Returns:
+        List[Job]: The claimed jobs, now running.
+    """
+    now = datetime.utcnow()
+    running = (
+      select(Job.user_id, func.count().label("running"))
+      .where(Job.status == "running", Job.locked_until >= now)
+      .group_by(Job.user_id)
+      .subquery()
+    )
+    weight = func.greatest(func.coalesce(User.sync_weight, 1), 1).label("weight")
+    load = func.coalesce(running.c.running, 0) / weight.cast(Float)
+
+    statement = (
+      select(Job, weight)
+      .outerjoin(running, running.c.user_id == Job.user_id)
+      .outerjoin(User, User.id == Job.user_id)
+      .where(
+        or_(
+          and_(Job.status == "pending", Job.run_at <= now),
+          and_(Job.status == "running", Job.locked_until < now),
+        )
+      )
+      .order_by(Job.priority.desc(), load, Job.run_at, Job.id)
+      # Claiming one job changes the load of its user, so a few more candidates are fetched to choose from
+      .limit(limit * self.CANDIDATES)
+      .with_for_update(of=Job, skip_locked=True)
+    )
+
+    claimed = []
+    async with self.session_maker() as session:
+      async with session.begin():
+        candidates = (await session.execute(statement)).all()
+        loads: Dict[Optional[int], int] = {
+          user_id: count for user_id, count in await session.execute(select(running.c.user_id, running.c.running))
+        }
+
+        for job, weight in _fair_order(candidates, loads):
+          if len(claimed) == limit:
+            break
+
+          job.updated_at = now
+          # A job whose worker died on its last attempt is not run again
+          if job.attempts >= job.max_attempts:
+            job.status = "failed"
+            job.locked_until = None
+            job.last_error = job.last_error or "Visibility timeout expired"
+            continue
+
+          job.status = "running"
+          job.attempts += 1
+          job.locked_until = now + self.visibility_timeout
+          job.locked_by = worker_id
+          claimed.append(job)
+
+    return claimed
+
+  async def heartbeat(self, job: Job):
+    """
+    Extends the visibility timeout of a running job.
+    """
+    job.locked_until = datetime.utcnow() + self.visibility_timeout
+    await self._update(job, locked_until=job.locked_until)
+
+  async def complete(self, job: Job):
+    """
+    Marks a running job as done.
+    """
+    job.status = "done"
+    job.locked_until = None
+    await self._update(job, status=job.status, locked_until=None, last_error=None)
+
+  async def fail(self, job: Job, error: BaseException):
+    """
+    Schedules a failed job for a retry, or marks it as failed once it ran out of attempts.
+    """
+    job.locked_until = None
+    job.last_error = f"{type(error).__name__}: {error}"
+
+    if job.attempts >= job.max_attempts:
+      job.status = "failed"
+      await self._update(job, status=job.status, locked_until=None, last_error=job.last_error)
+      return
+
+    delay = min(self.RETRY_DELAY * 2 ** (job.attempts - 1), self.MAX_RETRY_DELAY)
+    job.status = "pending"
+    job.run_at = datetime.utcnow() + timedelta(seconds=delay)
+    await self._requeue(job, run_at=job.run_at, last_error=job.last_error)
+
+  async def postpone(self, job: Job, delay: int):
+    """
+    Puts a running job back in the queue for later, without counting the attempt, e.g. while another process
+    is syncing its account reference.
+
+    Args:
+        job (Job): The running job.
+        delay (int): Seconds before the job is due again.
+    """
+    attempts = job.attempts
+    job.status = "pending"
+    job.run_at = datetime.utcnow() + timedelta(seconds=delay)
+    job.locked_until = None
+    await self._requeue(job, run_at=job.run_at, attempts=attempts - 1)
+    if job.status == "pending":
+      job.attempts = attempts - 1
+
+  async def _coalesce(self, session: AsyncSession, job: Job) -> Job:
+    values = job.model_dump(exclude={"id"})
+    while True:
+      statement = (
+        insert(Job)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=[Job.dedupe_key], index_where=text("status = 'pending'"))
+        .returning(Job.id)
+      )
+      job_id = (await session.execute(statement)).scalar_one_or_none()
+      if job_id is not None:
+        job.id = job_id
+        return job
+
+      result = await session.execute(
+        select(Job).where(Job.dedupe_key == job.dedupe_key, Job.status == "pending").with_for_update()
+      )
+      pending = result.scalar_one_or_none()
+      # Dequeued in between, the conflict is gone
+      if pending is None:
+        continue
+
+      _merge(pending, job, pending.payload, job.payload)
+      return pending
+
+  async def _requeue(self, job: Job, **values: Any):
+    # Puts a running job back to pending. A job with a dedupe key cannot be while another pending job has the key,
+    # e.g. one enqueued during the run: it is merged into that job instead, and done.
+    async with self.session_maker() as session:
+      async with session.begin():
+        while True:
+          pending = None
+          if job.dedupe_key is not None:
+            result = await session.execute(
+              select(Job).where(Job.dedupe_key == job.dedupe_key, Job.status == "pending").with_for_update()
+            )
+            pending = result.scalar_one_or_none()
+
+          if pending is not None:
+            merged = await session.execute(
+              update(Job)
+              .where(Job.id == job.id, Job.attempts == job.attempts)
+              .values(status="done", locked_until=None, last_error=job.last_error, updated_at=datetime.utcnow())
+              .returning(Job.id)
+            )
+            # Still ours, its range now runs with the pending job
+            if merged.scalar_one_or_none() is not None:
+              _merge(pending, job, job.payload, pending.payload)
+              job.status = "done"
+            return
+
+          try:
+            async with session.begin_nested():
+              await session.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.attempts == job.attempts)
+                .values(**values, status="pending", locked_until=None, updated_at=datetime.utcnow())
+              )
+            return
+          except IntegrityError:
+            # A pending job of the key was enqueued in between, it is merged into on the next round
+            continue
+
+  async def _update(self, job: Job, **values: Any):
+    # Only the attempt that claimed the job may change it, a later one may have taken over since
+    async with self.session_maker() as session:
+      async with session.begin():
+        await session.execute(
+          update(Job)
+          .where(Job.id == job.id, Job.attempts == job.attempts)
+          .values(**values, updated_at=datetime.utcnow())
+        )
+
+
+def _merge(pending: Job, job: Job, older: Dict[str, Any], newer: Dict[str, Any]):
+  # Folds a job into the pending job of its dedupe key, the newer payload winning outside of the ranges
+  pending.payload = merge_ranges(older, newer)
+  pending.priority = max(pending.priority, job.priority)
+  pending.run_at = min(pending.run_at, job.run_at)
+  pending.max_attempts = max(pending.max_attempts, job.max_attempts)
+  pending.updated_at = datetime.utcnow()
+
+
+def _fair_order(candidates: List[Tuple[Job, int]], loads: Dict[Optional[int], int]) -> Iterator[Tuple[Job, int]]:
+  # Hands out candidates one at a time, each to the least loaded user for their weight, counting the ones handed
+  heap = []
+  queues: Dict[Optional[int], List[Tuple[Job, int]]] = defaultdict(list)
+  for job, weight in candidates:
+    queues[job.user_id].append((job, weight))
+
+  for user_id, jobs in queues.items():
+    job, weight = jobs[0]
+    heapq.heappush(heap, (-job.priority, loads.get(user_id, 0) / weight, job.run_at, job.id, user_id))
+
+  positions: Dict[Optional[int], int] = defaultdict(int)
+  while heap:
+    *_, user_id = heapq.heappop(heap)
+    jobs = queues[user_id]
+    job, weight = jobs[positions[user_id]]
+    yield job, weight
+
+    loads[user_id] = loads.get(user_id, 0) + 1
+    positions[user_id] += 1
+    if positions[user_id] < len(jobs):
+      job, weight = jobs[positions[user_id]]
+      heapq.heappush(heap, (-job.priority, loads[user_id] / weight, job.run_at, job.id, user_id))
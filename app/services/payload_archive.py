@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import zstandard
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models import RawPayload
+
+logger = logging.getLogger(__name__)
+
+ZSTD_LEVEL = 3
+
+
+def compress(content: bytes) -> Tuple[str, bytes]:
+  """
+  Compresses a payload with zstd.
+
+  Returns:
+      tuple: The encoding used and the compressed payload.
+  """
+  return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(content)
+
+
+def decompress(encoding: str, payload: bytes) -> bytes:
+  """
+  Restores a payload compressed by `compress`.
+
+  Raises:
+      ValueError: If the encoding is unknown.
+  """
+  if encoding == "zstd":
+    return zstandard.ZstdDecompressor().decompress(payload)
+  raise ValueError(f"Unknown payload encoding: {encoding}")
+
+
+def payload_owner(url: str, params: Optional[Dict[str, Any]]) -> Optional[str]:
+  """
+  Finds the account a payload belongs to: the Pluggy account or item it was listed for, or the YNAB account
+  or budget in its path.
+  """
+  params = params or {}
+  for key in ("accountId", "itemId"):
+    if params.get(key):
+      return str(params[key])
+
+  segments = url.strip("/").split("/")
+  for name in ("accounts", "budgets"):
+    if name in segments:
+      index = segments.index(name) + 1
+      if index < len(segments):
+        return segments[index]
+  return None
+
+
+class PayloadArchive:
+  """
+  Append-only archive of the raw pages received from Pluggy and YNAB, stored compressed in `raw_payloads`.
+
+  `record` is the `PayloadRecorder` handed to the API clients: it only compresses and buffers the page, and the
+  buffer is written in bulk by `flush`. Archived pages are read back by `pages` and `latest`, so the sync can
+  be replayed without calling the APIs again.
+  """
+
+  def __init__(self, session_maker: async_sessionmaker, flush_threshold: int = 100, max_pending: int = 1000):
+    """
+    Args:
+        session_maker (async_sessionmaker): Session factory of the database holding the archive.
+        flush_threshold (int): Buffered pages that trigger a background flush, when an event loop is running.
+        max_pending (int): Buffered pages kept while flushes fail, the oldest ones are dropped past it.
+    """
+    self.session_maker = session_maker
+    self.flush_threshold = flush_threshold
+    self.max_pending = max_pending
+    self.dropped = 0
+    self.pending: List[Dict[str, Any]] = []
+    self._lock = threading.Lock()
+    self._flushing: Optional[asyncio.Task] = None
+
+  def record(self, source: str, url: str, params: Optional[Dict[str, Any]], content: bytes):
+    """
+    Compresses a raw page and buffers it until the next flush.
+
+    Args:
+        source (str): The API the page came from, `pluggy` or `ynab`.
+        url (str): The request path.
+        params (dict, optional): The query parameters.
+        content (bytes): The raw response body.
+    """
+    encoding, payload = compress(content)
+    row = {
+      "source": source,
+      "url": url,
+      "params": dict(params or {}),
+      "account_id": payload_owner(url, params),
+      "fetched_at": datetime.utcnow(),
+      "encoding": encoding,
+      "size": len(content),
+      "payload": payload,
+    }
+
+    with self._lock:
+      self.pending.append(row)
+      self._trim()
+      pending = len(self.pending)
+
+    if pending >= self.flush_threshold:
+      self._flush_in_background()
+
+  async def flush(self) -> int:
+    """
+    Writes the buffered pages in a single insert. Pages are kept buffered if the insert fails, up to `max_pending`.
+
+    Returns:
+        int: The number of pages written.
+    """
+    with self._lock:
+      rows, self.pending = self.pending, []
+    if not rows:
+      return 0
+
+    try:
+      async with self.session_maker() as session:
+        async with session.begin():
+          await session.execute(insert(RawPayload), rows)
+    except Exception:
+      with self._lock:
+        self.pending[:0] = rows
+        self._trim()
+      raise
+
+    return len(rows)
+
+  async def pages(
+    self,
+    source: str,
+    url: str,
+    account_id: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+  ) -> AsyncIterator[bytes]:
+    """
+    Streams the archived pages of an account, decompressed, the most recently fetched first. Pages fetched more
+    than once (same parameters) are read from their latest fetch only.
+
+    Args:
+        source (str): The API the pages came from, `pluggy` or `ynab`.
+        url (str): The request path, e.g. `/transactions`.
+        account_id (str): The account the pages belong to.
+        since (datetime, optional): Only pages fetched on or after this time.
+        until (datetime, optional): Only pages fetched on or before this time.
+
+    Yields:
+        bytes: The raw response bodies, as originally received.
+    """
+    latest = (
+      select(RawPayload.encoding, RawPayload.payload, RawPayload.fetched_at)
+      .where(RawPayload.account_id == account_id, RawPayload.source == source, RawPayload.url == url)
+      .distinct(RawPayload.params)
+      .order_by(RawPayload.params, RawPayload.fetched_at.desc())
+    )
+    if since is not None:
+      latest = latest.where(RawPayload.fetched_at >= since)
+    if until is not None:
+      latest = latest.where(RawPayload.fetched_at <= until)
+    latest = latest.subquery()
+    statement = select(latest.c.encoding, latest.c.payload).order_by(latest.c.fetched_at.desc())
+
+    async with self.session_maker() as session:
+      result = await session.stream(statement.execution_options(yield_per=100))
+      async for encoding, payload in result:
+        yield decompress(encoding, payload)
+
+  async def latest(self, source: str, url: str, account_id: str, since: Optional[datetime] = None) -> Optional[bytes]:
+    """
+    Returns the most recently archived page of an account for a request path, decompressed. With `since`, only
+    a page fetched on or after it.
+    """
+    statement = (
+      select(RawPayload.encoding, RawPayload.payload)
+      .where(RawPayload.account_id == account_id, RawPayload.source == source, RawPayload.url == url)
+      .order_by(RawPayload.fetched_at.desc())
+      .limit(1)
+    )
+    if since is not None:
+      statement = statement.where(RawPayload.fetched_at >= since)
+
+    async with self.session_maker() as session:
+      row = (await session.execute(statement)).first()
+    return decompress(*row) if row is not None else None
+
+  def _flush_in_background(self):
+    try:
+      loop = asyncio.get_running_loop()
+    except RuntimeError:
+      return
+
+    if self._flushing is None or self._flushing.done():
+      self._flushing = loop.create_task(self.flush())
+      self._flushing.add_done_callback(self._log_flush_error)
+
+  def _trim(self):
+    # Called with the lock held. The newest pages are kept, the archive of the oldest ones is given up on.
+    overflow = len(self.pending) - self.max_pending
+    if overflow > 0:
+      del self.pending[:overflow]
+      self.dropped += overflow
+
+  def _log_flush_error(self, task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+      logger.error(
+        f"Failed to archive raw payloads: {task.exception()} "
+        f"({len(self.pending)} pages buffered, {self.dropped} dropped so far)"
+      )
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config.settings import Settings
+from app.libs.lanes import LaneLimiter
+from app.models import ApiQuota
+
+
+class _Lease:
+  # Tokens reserved from the bucket by this process, usable until they expire
+  def __init__(self):
+    self.tokens = 0
+    self.expires_at = 0.0
+
+
+class QuotaBucket:
+  """
+  Request quota of an upstream API shared by every process calling it with the same token, kept as a token bucket
+  row in `api_quotas`.
+
+  The bucket holds up to `quota` tokens and refills at `quota` per `period`. Processes reserve up to `BATCH` tokens
+  per round trip and spend them locally for `LEASE` seconds, so web workers, job workers, the scheduler and CLI
+  processes stay within the quota together without a query per request. Tokens left when a lease lapses go back
+  to the bucket with the next reservation. Background calls never take the last `reserved_quota` share of the
+  bucket.
+  """
+
+  # Tokens reserved per round trip to the database
+  BATCH = 5
+  # Seconds reserved tokens stay usable by this process
+  LEASE = 10
+
+  def __init__(
+    self, session_maker: async_sessionmaker, name: str, quota: int, period: float = 3600, reserved_quota: float = 0
+  ):
+    """
+    Args:
+        session_maker (async_sessionmaker): Session factory of the database holding the bucket.
+        name (str): The upstream API, e.g. `ynab`.
+        quota (int): Requests allowed per period, over every process and lane.
+        period (float): Seconds the quota refills over.
+        reserved_quota (float): Share of the quota only interactive calls can use, between 0 and 1.
+    """
+    self.session_maker = session_maker
+    self.name = name
+    self.quota = quota
+    self.period = period
+    self.reserved_quota = reserved_quota
+    self._created = False
+    # Interactive reservations may come out of the reserved share, so each lane keeps its own
+    self._leases = {True: _Lease(), False: _Lease()}
+    self._lock = asyncio.Lock()
+
+  async def take(self, interactive: bool) -> Optional[float]:
+    """
+    Takes a token for a request, or returns the seconds to wait before trying again.
+
+    Args:
+        interactive (bool): Whether the request is user-facing, and may use the reserved share.
+    """
+    if self._spend(interactive):
+      return None
+
+    async with self._lock:
+      # Another call may have reserved tokens meanwhile
+      if self._spend(interactive):
+        return None
+      return await self._reserve(interactive)
+
+  def _spend(self, interactive: bool) -> bool:
+    now = time.monotonic()
+    # Interactive calls may also spend the background lane's tokens
+    for lane in (interactive, False) if interactive else (False,):
+      lease = self._leases[lane]
+      if lease.tokens and lease.expires_at > now:
+        lease.tokens -= 1
+        return True
+    return False
+
+  async def _reserve(self, interactive: bool) -> Optional[float]:
+    lease = self._leases[interactive]
+    returned, lease.tokens = lease.tokens, 0
+
+    rate = self.quota / self.period
+    floor = 0 if interactive else self.quota * self.reserved_quota
+    now = func.timezone("utc", func.now())
+    level = func.least(self.quota, ApiQuota.tokens + returned + func.extract("epoch", now - ApiQuota.updated_at) * rate)
+
+    async with self.session_maker() as session:
+      async with session.begin():
+        if not self._created:
+          await session.execute(
+            insert(ApiQuota)
+            .values(name=self.name, tokens=self.quota, updated_at=datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=[ApiQuota.name])
+          )
+          self._created = True
+
+        available = (
+          await session.execute(select(level).where(ApiQuota.name == self.name).with_for_update())
+        ).scalar_one()
+        taken = max(0, min(self.BATCH, int(available - floor)))
+        if taken or returned:
+          # `now()` is the start of the transaction, the update sees the level just selected
+          await session.execute(
+            update(ApiQuota).where(ApiQuota.name == self.name).values(tokens=level - taken, updated_at=now)
+          )
+
+    if not taken:
+      return max((floor + 1 - available) / rate, LaneLimiter.POLL_INTERVAL)
+
+    # One token goes to this call, the others to the next calls of the lane
+    lease.tokens = taken - 1
+    lease.expires_at = time.monotonic() + self.LEASE
+    return None
+
+
+def shared_ynab_limiter(session_maker: async_sessionmaker) -> LaneLimiter:
+  """
+  Builds the YNAB limiter of a process: connections are limited per process, and the hourly quota is shared with
+  every other process through a `QuotaBucket`. Only async clients accept it.
+  """
+  bucket = QuotaBucket(
+    session_maker, "ynab", Settings.ynab_hourly_quota, reserved_quota=Settings.interactive_reserved_quota
+  )
+  return LaneLimiter(
+    Settings.upstream_max_connections, Settings.interactive_reserved_connections, shared_quota=bucket.take
+  )
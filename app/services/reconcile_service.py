@@ -0,0 +1,147 @@
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from itertools import compress
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.libs import PluggyAIClient, YNABClient
+from app.libs.offload import CpuExecutor
+from app.libs.pluggy.models.account import Account
+from app.models import AccountReference
+from app.services.budget_snapshot_service import BudgetSnapshotService
+from app.services.transaction_converter import TransactionBatchConverter
+from app.services.transactions_service import TransactionsService
+
+logger = logging.getLogger(__name__)
+
+# Days of Pluggy transactions matched against YNAB when the balances differ
+MATCH_DAYS = 30
+# Days apart a Pluggy transaction and its YNAB counterpart may be dated
+MATCH_WINDOW_DAYS = 3
+
+
+class BalanceCheck(BaseModel):
+  """
+  Pluggy and YNAB balances of an account reference, in milliunits.
+
+  `unmatched` counts the recent Pluggy transactions with no YNAB transaction of the same amount around the same
+  date, when the balances differ and the service can match them.
+  """
+
+  account_reference_id: int
+  pluggy_balance: int
+  ynab_balance: int
+  unmatched: Optional[int] = None
+
+  @property
+  def difference(self) -> int:
+    return self.pluggy_balance - self.ynab_balance
+
+
+class ReconcileService:
+  """
+  Compares the balance of the Pluggy accounts behind an account reference with the balance of its YNAB account.
+
+  When they differ, the Pluggy transactions of the last `MATCH_DAYS` are matched against the YNAB ledger of the
+  budget snapshot by amount and date, to tell how many never made it to YNAB.
+  """
+
+  def __init__(
+    self,
+    ynab_client: YNABClient,
+    pluggy_client: PluggyAIClient,
+    transactions_service: Optional[TransactionsService] = None,
+    budget_snapshots: Optional[BudgetSnapshotService] = None,
+    executor: Optional[CpuExecutor] = None,
+  ):
+    """
+    Args:
+        ynab_client (YNABClient): The client YNAB balances are read with.
+        pluggy_client (PluggyAIClient): The client Pluggy balances are read with.
+        transactions_service (TransactionsService, optional): Fetches the Pluggy transactions to match.
+        budget_snapshots (BudgetSnapshotService, optional): The YNAB ledgers transactions are matched against.
+            Balances are only compared without both.
+        executor (CpuExecutor, optional): Matches large ledgers off the event loop.
+    """
+    self.ynab = ynab_client
+    self.pluggy = pluggy_client
+    self.transactions = transactions_service
+    self.budget_snapshots = budget_snapshots
+    self.executor = executor
+
+  async def reconcile(self, account_reference: AccountReference) -> BalanceCheck:
+    """
+    Checks an account reference, logging a warning when the balances differ.
+
+    Credit card balances are what is owed in Pluggy, and are negated to compare them with YNAB.
+
+    Returns:
+        BalanceCheck: Both balances.
+    """
+    accounts = await self.pluggy.accounts.async_list_accounts(account_reference.external_source_id)
+    pluggy_balance = sum(
+      round(account.balance * 1000) * (-1 if account.type == "CREDIT" else 1) for account in accounts.results
+    )
+
+    account = await self.ynab.accounts.get_account(
+      account_reference.external_destination_budget_id, account_reference.external_destination_id
+    )
+
+    check = BalanceCheck(
+      account_reference_id=account_reference.id, pluggy_balance=pluggy_balance, ynab_balance=account.balance
+    )
+    if check.difference:
+      if self.transactions is not None and self.budget_snapshots is not None:
+        check.unmatched = await self._match(account_reference, accounts.results)
+      logger.warning(
+        f"Account reference {account_reference.id} is off by {check.difference} milliunits: "
+        f"Pluggy {check.pluggy_balance}, YNAB {check.ynab_balance}, "
+        f"{check.unmatched if check.unmatched is not None else 'unknown'} recent transactions missing from YNAB"
+      )
+    return check
+
+  async def _match(self, account_reference: AccountReference, accounts: List[Account]) -> int:
+    since = datetime.utcnow() - timedelta(days=MATCH_DAYS)
+    converter = TransactionBatchConverter(account_id=account_reference.external_destination_id)
+
+    # `(amount, date)` of both sides, which pickle cheaply when matching in the pool
+    pluggy: List[Tuple[int, str]] = []
+    for account in accounts:
+      async for page in self.transactions.iter_pages(account.id, from_date=since):
+        if page.results:
+          columns = converter.columns(page.results)
+          pluggy.extend(zip(columns["amount"], columns["date"]))
+
+    budget = await self.budget_snapshots.refresh(account_reference.external_destination_budget_id)
+    table = budget.transaction_table
+    selected = table.mask(
+      account_id=account_reference.external_destination_id,
+      since=since.date() - timedelta(days=MATCH_WINDOW_DAYS),
+    )
+    ynab = list(zip(compress(table.amounts, selected), compress(table.dates, selected)))
+
+    if self.executor is None:
+      return _count_unmatched(pluggy, ynab)
+    return await self.executor.run(_count_unmatched, pluggy, ynab, items=len(pluggy) + len(ynab))
+
+
+def _count_unmatched(pluggy: List[Tuple[int, str]], ynab: List[Tuple[int, int]]) -> int:
+  # Greedily pairs every Pluggy transaction with a YNAB one of the same amount, dated within the window
+  ledger: Dict[int, List[int]] = defaultdict(list)
+  for amount, ordinal in ynab:
+    ledger[amount].append(ordinal)
+
+  unmatched = 0
+  for amount, day in pluggy:
+    ordinal = date.fromisoformat(day).toordinal()
+    candidates = ledger.get(amount, [])
+    for index, candidate in enumerate(candidates):
+      if abs(candidate - ordinal) <= MATCH_WINDOW_DAYS:
+        del candidates[index]
+        break
+    else:
+      unmatched += 1
+
+  return unmatched
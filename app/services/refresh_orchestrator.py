@@ -0,0 +1,243 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Union
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.libs import PluggyAIClient
+from app.libs.pluggy.models.item import Item, ItemStatus
+from app.models import AccountReference
+from app.services.job_queue import JobQueue
+from app.services.sync_cursor_service import SyncCursorService
+from app.services.sync_scheduler import enqueue_item_syncs
+
+logger = logging.getLogger(__name__)
+
+# Pluggy execution statuses after which the item data can be synced
+SYNCABLE_EXECUTION_STATUSES = ("SUCCESS", "PARTIAL_SUCCESS")
+
+
+class RefreshResult(BaseModel):
+  """
+  Outcome of the refresh of an item.
+  """
+
+  item_id: str
+  status: Optional[str] = None
+  execution_status: Optional[str] = None
+  syncs: int = 0
+  error: Optional[str] = None
+
+
+class RefreshOrchestrator:
+  """
+  Asks Pluggy to refresh items, and enqueues the syncs of each item as soon as its refresh finishes.
+
+  Refreshes run concurrently. Each item is polled with exponential backoff while it is `UPDATING`, and `notify`
+  checks it right away, e.g. when a webhook reports it was updated.
+  """
+
+  # Seconds before the first status check, doubled after every check still updating
+  INITIAL_DELAY = 2
+  MAX_DELAY = 30
+  # Seconds an item may stay updating before it is given up on
+  TIMEOUT = 600
+  # Syncs of items refreshed on demand go ahead of the scheduled ones
+  PRIORITY = 1
+
+  def __init__(
+    self,
+    pluggy_client: PluggyAIClient,
+    queue: JobQueue,
+    cursors: SyncCursorService,
+    session_maker: async_sessionmaker,
+    concurrency: int = 5,
+  ):
+    """
+    Args:
+        pluggy_client (PluggyAIClient): The client items are refreshed with, in async mode.
+        queue (JobQueue): The queue the syncs are enqueued in.
+        cursors (SyncCursorService): Where the syncs start from, see `SyncCursorService.last_synced_at`.
+        session_maker (async_sessionmaker): Session factory of the database holding the account references.
+        concurrency (int): Refreshes triggered at the same time.
+    """
+    self.pluggy = pluggy_client
+    self.queue = queue
+    self.cursors = cursors
+    self.session_maker = session_maker
+    self.concurrency = concurrency
+    # Events of every wait in progress per item, each refresh of an item waiting on its own
+    self.waiters: Dict[str, Set[asyncio.Event]] = {}
+    self.tasks: Set[asyncio.Task] = set()
+
+  def notify(self, item_id: str):
+    """
+    Checks a refreshing item right away instead of at its next poll.
+    """
+    for event in self.waiters.get(item_id, ()):
+      event.set()
+
+  async def refresh(self, item_ids: List[str]) -> List[RefreshResult]:
+    """
+    Refreshes items and syncs each of them once its refresh succeeded.
+
+    Args:
+        item_ids (List[str]): The Pluggy items to refresh.
+
+    Returns:
+        List[RefreshResult]: The outcome of every distinct item, in order.
+    """
+    semaphore = asyncio.Semaphore(self.concurrency)
+    return await asyncio.gather(*(self._refresh(item_id, semaphore) for item_id in dict.fromkeys(item_ids)))
+
+  async def unknown_items(self, item_ids: List[str]) -> List[str]:
+    """
+    Returns the items no account reference syncs, which there is no point in refreshing.
+    """
+    async with self.session_maker() as session:
+      result = await session.execute(
+        select(AccountReference.external_source_id).where(AccountReference.external_source_id.in_(item_ids))
+      )
+      known = set(result.scalars().all())
+    return [item_id for item_id in item_ids if item_id not in known]
+
+  def start(self, item_ids: List[str]) -> asyncio.Task:
+    """
+    Refreshes items in the background, see `refresh`. The outcomes are logged once every item is done.
+
+    Args:
+        item_ids (List[str]): The Pluggy items to refresh.
+
+    Returns:
+        asyncio.Task: The task of the refreshes, also cancelled by `close`.
+    """
+    task = asyncio.create_task(self.refresh(item_ids))
+    self.tasks.add(task)
+    task.add_done_callback(self._finished)
+    return task
+
+  async def close(self):
+    """
+    Cancels the refreshes still running in the background.
+    """
+    for task in list(self.tasks):
+      task.cancel()
+    await asyncio.gather(*self.tasks, return_exceptions=True)
+
+  async def wait(
+    self, item_id: str, timeout: Optional[float] = None, previous: Optional[Union[Item, ItemStatus]] = None
+  ) -> Optional[ItemStatus]:
+    """
+    Waits until an item is no longer updating.
+
+    Pluggy may only mark the item `UPDATING` a moment after a refresh is triggered. Given the item as it was then,
+    statuses still showing the same `lastUpdatedAt` and `executionStatus` are taken for the previous run, and
+    waited past until the item is seen updating or either changes.
+
+    Args:
+        item_id (str): The Pluggy item.
+        timeout (float, optional): Seconds to wait at most. Defaults to `TIMEOUT`.
+        previous (Item, optional): The item when its refresh was triggered, e.g. as returned by the update.
+
+    Returns:
+        ItemStatus: The status the item ended in, or None if it was still updating by the timeout.
+    """
+    event = self._register(item_id)
+    try:
+      return await self._wait(item_id, event, timeout, previous)
+    finally:
+      self._unregister(item_id, event)
+
+  def _register(self, item_id: str) -> asyncio.Event:
+    event = asyncio.Event()
+    self.waiters.setdefault(item_id, set()).add(event)
+    return event
+
+  def _unregister(self, item_id: str, event: asyncio.Event):
+    events = self.waiters.get(item_id)
+    if events is not None:
+      events.discard(event)
+      if not events:
+        del self.waiters[item_id]
+
+  async def _wait(
+    self,
+    item_id: str,
+    event: asyncio.Event,
+    timeout: Optional[float],
+    previous: Optional[Union[Item, ItemStatus]],
+  ) -> Optional[ItemStatus]:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (self.TIMEOUT if timeout is None else timeout)
+    delay = self.INITIAL_DELAY
+    # The run the item was on when refreshed, ignored until the item is seen updating
+    stale = None
+    if previous is not None and previous.status != "UPDATING":
+      stale = (previous.lastUpdatedAt, previous.executionStatus)
+
+    while (remaining := deadline - loop.time()) > 0:
+      try:
+        await asyncio.wait_for(event.wait(), timeout=min(delay, remaining))
+      except asyncio.TimeoutError:
+        pass
+      event.clear()
+
+      try:
+        status = await self.pluggy.items.async_get_item_status(item_id)
+      except Exception as error:
+        logger.error(f"Failed to get the status of item {item_id}: {error}")
+      else:
+        if status.status == "UPDATING":
+          stale = None
+        elif (status.lastUpdatedAt, status.executionStatus) != stale:
+          return status
+      delay = min(delay * 2, self.MAX_DELAY)
+    return None
+
+  def _finished(self, task: asyncio.Task):
+    self.tasks.discard(task)
+    if task.cancelled():
+      return
+    if task.exception() is not None:
+      logger.error("Background refresh failed", exc_info=task.exception())
+      return
+
+    for result in task.result():
+      outcome = result.error or f"{result.execution_status}, {result.syncs} syncs enqueued"
+      logger.info(f"Refresh of item {result.item_id}: {outcome}")
+
+  async def _refresh(self, item_id: str, semaphore: asyncio.Semaphore) -> RefreshResult:
+    result = RefreshResult(item_id=item_id)
+    # Registered before the refresh starts, so an early webhook is not missed
+    event = self._register(item_id)
+    try:
+      try:
+        async with semaphore:
+          item = await self.pluggy.items.async_update_item(item_id)
+      except Exception as error:
+        logger.error(f"Failed to refresh item {item_id}: {error}")
+        result.error = str(error)
+        return result
+
+      status = await self._wait(item_id, event, None, item)
+    finally:
+      self._unregister(item_id, event)
+
+    if status is None:
+      result.error = "Timed out waiting for the refresh"
+      return result
+
+    result.status = status.status
+    result.execution_status = status.executionStatus
+    if status.executionStatus not in SYNCABLE_EXECUTION_STATUSES:
+      logger.warning(f"Refresh of item {item_id} ended in {status.executionStatus}, not syncing it")
+      return result
+
+    # The item is ready now, the syncs are not debounced
+    result.syncs = await enqueue_item_syncs(
+      item_id, self.queue, self.cursors, self.session_maker, priority=self.PRIORITY, debounce=0
+    )
+    logger.info(f"Item {item_id} refreshed: enqueued {result.syncs} syncs")
+    return result
@@ -0,0 +1,198 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, delete, func, not_, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import SyncCursor
+
+
+def run_key(from_date: Optional[datetime], to_date: Optional[datetime]) -> str:
+  """
+  Identifies the sync runs of a date range, so a resumed run continues the cursor of the same range.
+  """
+  return f"{from_date.date().isoformat() if from_date else ''}:{to_date.date().isoformat() if to_date else ''}"
+
+
+class SyncCursorService:
+  """
+  Persists the progress of sync runs in `sync_cursors`, one cursor per Pluggy account and date range.
+
+  The cursor moves forward after every page written to YNAB. A run interrupted midway, e.g. by a recycled
+  worker, leaves its cursor open and the next run of the same range continues from the next page instead of
+  starting over.
+
+  Every run of an incremental sync has its own range, as it starts from the previous watermark, so completing a
+  run prunes the cursors of the Pluggy account nothing reads anymore: completed incremental runs older than it,
+  completed runs of a bounded range, and open runs left alone for `ABANDONED_AFTER`.
+  """
+
+  # Time after which an open run is not expected to be resumed anymore
+  ABANDONED_AFTER = timedelta(days=7)
+
+  def __init__(self, session_maker: async_sessionmaker):
+    self.session_maker = session_maker
+
+  async def start(self, account_reference_id: int, account_id: str, key: str) -> SyncCursor:
+    """
+    Opens a run, resuming the open cursor of the same range or starting a new one from the first page.
+
+    Args:
+        account_reference_id (int): The account reference being synced.
+        account_id (str): The Pluggy account being synced.
+        key (str): The `run_key` of the date range.
+
+    Returns:
+        SyncCursor: The cursor of the run.
+    """
+    now = datetime.utcnow()
+    # The cursor is created first if missing, so concurrent runs of the range all lock the same row
+    statement = (
+      insert(SyncCursor)
+      .values(
+        account_reference_id=account_reference_id,
+        account_id=account_id,
+        run_key=key,
+        page=1,
+        batches_flushed=0,
+        created=0,
+        started_at=now,
+        updated_at=now,
+      )
+      .on_conflict_do_nothing(
+        index_elements=[SyncCursor.account_reference_id, SyncCursor.account_id, SyncCursor.run_key]
+      )
+    )
+
+    async with self.session_maker() as session:
+      async with session.begin():
+        await session.execute(statement)
+        result = await session.execute(
+          select(SyncCursor)
+          .where(
+            SyncCursor.account_reference_id == account_reference_id,
+            SyncCursor.account_id == account_id,
+            SyncCursor.run_key == key,
+          )
+          .with_for_update()
+        )
+        cursor = result.scalar_one()
+
+        if cursor.completed_at is not None:
+          cursor.page = 1
+          cursor.batches_flushed = 0
+          cursor.created = 0
+          cursor.started_at = now
+          cursor.completed_at = None
+        cursor.updated_at = now
+
+    return cursor
+
+  async def advance(
+    self,
+    cursor: SyncCursor,
+    page: int,
+    created: int,
+    flushed: bool = True,
+    session: Optional[AsyncSession] = None,
+  ):
+    """
+    Commits a page as done, so a resumed run starts after it.
+
+    Args:
+        cursor (SyncCursor): The cursor of the run.
+        page (int): The page just done.
+        created (int): Transactions the page created in YNAB, or queued for it.
+        flushed (bool): Whether a write batch was sent to YNAB, or queued for it, for the page.
+        session (AsyncSession, optional): A session whose transaction the update joins, e.g. the one enqueuing
+            the page writes. The update is committed on its own otherwise.
+    """
+    cursor.page = page + 1
+    cursor.batches_flushed += int(flushed)
+    cursor.created += created
+    cursor.updated_at = datetime.utcnow()
+
+    statement = (
+      update(SyncCursor)
+      .where(SyncCursor.id == cursor.id)
+      .values(
+        page=cursor.page,
+        batches_flushed=cursor.batches_flushed,
+        created=cursor.created,
+        updated_at=cursor.updated_at,
+      )
+    )
+
+    if session is not None:
+      await session.execute(statement)
+      return
+
+    async with self.session_maker() as session:
+      async with session.begin():
+        await session.execute(statement)
+
+  async def complete(self, cursor: SyncCursor):
+    """
+    Closes a run once every page was done, and prunes the cursors it supersedes. The start of an incremental run
+    becomes the account `last_synced_at` watermark.
+    """
+    cursor.completed_at = datetime.utcnow()
+    cursor.last_synced_at = cursor.started_at
+    cursor.updated_at = cursor.completed_at
+
+    async with self.session_maker() as session:
+      async with session.begin():
+        await session.execute(
+          update(SyncCursor)
+          .where(SyncCursor.id == cursor.id)
+          .values(
+            completed_at=cursor.completed_at,
+            last_synced_at=cursor.last_synced_at,
+            updated_at=cursor.updated_at,
+          )
+        )
+        await session.execute(self._superseded(cursor))
+
+  async def last_synced_at(self, account_reference_id: int) -> Optional[datetime]:
+    """
+    Returns the watermark of an account reference: the start of its latest completed incremental run, i.e. one
+    with no end date, for the Pluggy account synced the least recently.
+
+    Runs of a bounded range, e.g. backfill windows, say nothing of the recent transactions and are ignored. None
+    if any Pluggy account of the reference never completed an incremental run.
+    """
+    async with self.session_maker() as session:
+      result = await session.execute(
+        select(
+          SyncCursor.account_id,
+          # Run keys of the ranges without an end date end with the separator
+          func.max(SyncCursor.last_synced_at).filter(SyncCursor.run_key.endswith(":")),
+        )
+        .where(SyncCursor.account_reference_id == account_reference_id)
+        .group_by(SyncCursor.account_id)
+      )
+      watermarks = [synced_at for _, synced_at in result.all()]
+
+    if not watermarks or None in watermarks:
+      return None
+    return min(watermarks)
+
+  def _superseded(self, cursor: SyncCursor):
+    # The latest completed incremental run of the account is always kept, it holds the watermark
+    incremental = SyncCursor.run_key.endswith(":")
+    stale = [
+      and_(SyncCursor.completed_at.is_not(None), not_(incremental)),
+      and_(SyncCursor.completed_at.is_(None), SyncCursor.updated_at < cursor.completed_at - self.ABANDONED_AFTER),
+    ]
+    if cursor.run_key.endswith(":"):
+      stale.append(
+        and_(SyncCursor.completed_at.is_not(None), incremental, SyncCursor.last_synced_at <= cursor.last_synced_at)
+      )
+
+    return delete(SyncCursor).where(
+      SyncCursor.account_reference_id == cursor.account_reference_id,
+      SyncCursor.account_id == cursor.account_id,
+      SyncCursor.id != cursor.id,
+      or_(*stale),
+    )
@@ -0,0 +1,235 @@
+import logging
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.libs import PluggyAIClient
+from app.libs.pluggy.models.item import ItemStatus
+from app.models import AccountReference
+from app.services.budget_snapshot_service import BudgetIndex
+from app.services.job_queue import JobQueue
+from app.services.sync_cursor_service import SyncCursorService
+from app.services.sync_planner import SyncPlanner
+
+logger = logging.getLogger(__name__)
+
+# Days before the watermark a scheduled sync starts from, so pending transactions settling late are picked up
+SYNC_OVERLAP = timedelta(days=7)
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+  """
+  Parses a Pluggy ISO 8601 timestamp into a naive UTC datetime, comparable with the watermarks.
+  """
+  if not value:
+    return None
+  parsed = datetime.fromisoformat(value)
+  if parsed.tzinfo is not None:
+    parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+  return parsed
+
+
+def has_new_data(status: ItemStatus, watermark: Optional[datetime]) -> bool:
+  """
+  Whether Pluggy refreshed an item since the last completed sync started.
+
+  The transactions refresh time is preferred over the item one, which also moves for accounts or identity.
+  Items still updating are left for the next round.
+  """
+  if status.status == "UPDATING":
+    return False
+  if watermark is None:
+    return True
+
+  updated_at = refreshed_at(status)
+  return updated_at is None or updated_at > watermark
+
+
+def refreshed_at(status: ItemStatus) -> Optional[datetime]:
+  """
+  When Pluggy last refreshed the transactions of an item, or the item itself if it does not tell.
+  """
+  transactions = status.statusDetail.transactions if status.statusDetail else None
+  return parse_timestamp(transactions.lastUpdatedAt if transactions else None) or parse_timestamp(status.lastUpdatedAt)
+
+
+async def enqueue_item_syncs(
+  item_id: str,
+  queue: JobQueue,
+  cursors: SyncCursorService,
+  session_maker: async_sessionmaker,
+  priority: int = 0,
+  debounce: Optional[int] = None,
+) -> int:
+  """
+  Enqueues a sync for every account reference of a Pluggy item, merged into the pending one if any.
+
+  Syncs start from the last completed sync minus the `SYNC_OVERLAP`, for transactions booked late.
+
+  Args:
+      item_id (str): The Pluggy item.
+      queue (JobQueue): The queue the syncs are enqueued in.
+      cursors (SyncCursorService): Where the syncs start from, see `SyncCursorService.last_synced_at`.
+      session_maker (async_sessionmaker): Session factory of the database holding the account references.
+      priority (int): Higher priorities are dequeued first.
+      debounce (int, optional): Seconds triggers are merged for. Defaults to `Settings.sync_debounce_window`.
+
+  Returns:
+      int: The number of syncs enqueued.
+  """
+  async with session_maker() as session:
+    result = await session.execute(select(AccountReference).where(AccountReference.external_source_id == item_id))
+    account_references: List[AccountReference] = result.scalars().all()
+
+  for account_reference in account_references:
+    watermark = await cursors.last_synced_at(account_reference.id)
+    from_date = (watermark - SYNC_OVERLAP).date().isoformat() if watermark is not None else None
+    await queue.enqueue_sync(account_reference.id, from_date=from_date, priority=priority, debounce=debounce)
+
+  return len(account_references)
+
+
+class SyncScheduler:
+  """
+  Enqueues syncs only for the items Pluggy refreshed since their account was last synced.
+
+  Items are not checked again before their `nextAutoSyncAt`, unless a sync was enqueued for them, saving
+  Pluggy calls between the automatic refreshes.
+
+  With a planner, every sync is dry-run first: syncs with nothing to create are skipped, and those whose YNAB
+  calls would not fit in what is left of the hourly quota are deferred to a later round. A round refreshes every
+  budget once, and the calls planning takes are counted against the quota too. Plans read the Pluggy pages
+  archived since the item was refreshed, e.g. by the plan of a deferred sync, when the planner has an archive.
+  """
+
+  # Seconds the YNAB calls of an enqueued sync, or of planning, are counted against the quota
+  QUOTA_PERIOD = 3600
+
+  def __init__(
+    self,
+    pluggy_client: PluggyAIClient,
+    queue: JobQueue,
+    cursors: SyncCursorService,
+    session_maker: async_sessionmaker,
+    planner: Optional[SyncPlanner] = None,
+    quota: Optional[int] = None,
+  ):
+    """
+    Args:
+        pluggy_client (PluggyAIClient): The client item statuses are checked with, in async mode.
+        queue (JobQueue): The queue the syncs are enqueued in.
+        cursors (SyncCursorService): Where the syncs start from, see `SyncCursorService.last_synced_at`.
+        session_maker (async_sessionmaker): Session factory of the database holding the account references.
+        planner (SyncPlanner, optional): Dry-runs the syncs before they are enqueued.
+        quota (int, optional): YNAB calls the scheduled syncs may take per hour. Defaults to
+            `Settings.ynab_hourly_quota`.
+    """
+    self.pluggy = pluggy_client
+    self.queue = queue
+    self.cursors = cursors
+    self.session_maker = session_maker
+    self.planner = planner
+    self.quota = quota
+    self.next_check: Dict[str, datetime] = {}
+    # When account references were last planned with nothing to create, as good as a sync to `has_new_data`
+    self.up_to_date: Dict[int, datetime] = {}
+    # When each enqueued sync was planned and the YNAB calls planned for it, along with the calls of planning
+    self.planned: Deque[Tuple[float, int]] = deque()
+
+  async def tick(self) -> int:
+    """
+    Checks every account reference once.
+
+    Returns:
+        int: The number of syncs enqueued.
+    """
+    async with self.session_maker() as session:
+      account_references = (await session.execute(select(AccountReference))).scalars().all()
+
+    now = datetime.utcnow()
+    statuses: Dict[str, ItemStatus] = {}
+    # Budgets the plans of the round brought up to date
+    budgets: Dict[str, BudgetIndex] = {}
+    enqueued = 0
+
+    for account_reference in account_references:
+      item_id = account_reference.external_source_id
+      if self.next_check.get(item_id, now) > now:
+        continue
+
+      try:
+        if item_id not in statuses:
+          statuses[item_id] = await self.pluggy.items.async_get_item_status(item_id)
+      except Exception as error:
+        logger.error(f"Failed to get the status of item {item_id}: {error}")
+        continue
+      status = statuses[item_id]
+      if status.status == "UPDATING":
+        # Checked again next round, the refresh may be over by then
+        continue
+
+      watermark = await self.cursors.last_synced_at(account_reference.id)
+      checked_at = max(filter(None, (watermark, self.up_to_date.get(account_reference.id))), default=None)
+      if not has_new_data(status, checked_at):
+        next_sync = parse_timestamp(status.nextAutoSyncAt)
+        if next_sync is not None:
+          self.next_check[item_id] = next_sync
+        continue
+
+      self.next_check.pop(item_id, None)
+      from_date = watermark - SYNC_OVERLAP if watermark is not None else None
+      if self.planner is not None and not await self._fits(account_reference, from_date, refreshed_at(status), budgets):
+        continue
+
+      await self.queue.enqueue_sync(
+        account_reference.id, from_date=from_date.date().isoformat() if from_date is not None else None
+      )
+      enqueued += 1
+
+    logger.info(f"Scheduled {enqueued} syncs out of {len(account_references)} account references")
+    return enqueued
+
+  async def _fits(
+    self,
+    account_reference: AccountReference,
+    from_date: Optional[datetime],
+    fetched_since: Optional[datetime],
+    budgets: Dict[str, BudgetIndex],
+  ) -> bool:
+    # Plans the sync of an account reference, and counts its YNAB calls if it is worth enqueuing
+    planned_at = datetime.utcnow()
+    try:
+      plan = await self.planner.plan(
+        [account_reference], from_date=from_date, fetched_since=fetched_since, budgets=budgets
+      )
+    except Exception as error:
+      # The sync is enqueued anyway, the plan only saves calls
+      logger.error(f"Failed to plan the sync of account reference {account_reference.id}: {error}")
+      return True
+
+    now = time.monotonic()
+    # The calls of planning are made whatever comes of the plan
+    if plan.planning_ynab_calls:
+      self.planned.append((now, plan.planning_ynab_calls))
+
+    if not plan.creates:
+      logger.info(f"Account reference {account_reference.id} has nothing to create, not syncing it")
+      self.up_to_date[account_reference.id] = planned_at
+      return False
+
+    while self.planned and self.planned[0][0] <= now - self.QUOTA_PERIOD:
+      self.planned.popleft()
+    calls_used = sum(calls for _, calls in self.planned)
+    if not plan.fits_quota(calls_used, self.quota):
+      logger.warning(
+        f"Deferring the sync of account reference {account_reference.id}: {plan.ynab_calls} YNAB calls would "
+        f"exceed the hourly quota, {calls_used} already planned"
+      )
+      return False
+
+    self.planned.append((now, plan.ynab_calls))
+    return True
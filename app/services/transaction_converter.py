@@ -0,0 +1,103 @@
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.libs.serialization import validator_for
+from app.libs.ynab.models.transaction import CreateTransaction
+
+# YNAB limits
+MEMO_MAX_LENGTH = 200
+IMPORT_ID_MAX_LENGTH = 36
+
+
+class TransactionBatchConverter:
+  """
+  Converts whole pages of Pluggy transactions into YNAB `CreateTransaction` payloads.
+
+  Each field is converted as a column over the page, and the payloads are validated in one bulk call
+  instead of one model at a time.
+
+  Pluggy reports credit card purchases as positive amounts and bank debits as negative ones, so the sign is
+  taken from `type` (DEBIT is an outflow, CREDIT an inflow) rather than from the amount. Amounts are read
+  from `amountInAccountCurrency` when present, which is what foreign currency card purchases cost.
+  """
+
+  def __init__(self, account_id: str, payee_id: Optional[str] = None, approved: bool = False):
+    """
+    Args:
+        account_id (str): The YNAB account the transactions are created in.
+        payee_id (str, optional): The YNAB payee assigned to every transaction.
+        approved (bool): Whether transactions are created already approved.
+    """
+    self.account_id = account_id
+    self.payee_id = payee_id
+    self.approved = approved
+
+  def columns(self, transactions: Iterable[Any]) -> Dict[str, List[Any]]:
+    """
+    Converts a page of Pluggy transactions (full or lean) into YNAB columns.
+
+    Args:
+        transactions (Iterable): The `results` of a Pluggy transactions page.
+
+    Returns:
+        dict: One list per `CreateTransaction` field, all aligned with the input.
+    """
+    page = list(transactions)
+
+    units = [
+      transaction.amount if transaction.amountInAccountCurrency is None else transaction.amountInAccountCurrency
+      for transaction in page
+    ]
+    signs = [-1 if transaction.type == "DEBIT" else 1 for transaction in page]
+
+    return {
+      "amount": to_milliunits(units, signs),
+      "date": format_dates(transaction.date for transaction in page),
+      "memo": [(transaction.description or "")[:MEMO_MAX_LENGTH] or None for transaction in page],
+      "cleared": ["cleared" if transaction.status == "POSTED" else "uncleared" for transaction in page],
+      "import_id": [transaction.id[:IMPORT_ID_MAX_LENGTH] for transaction in page],
+    }
+
+  def convert(self, transactions: Iterable[Any]) -> List[CreateTransaction]:
+    """
+    Converts a page of Pluggy transactions (full or lean) into YNAB payloads.
+
+    Args:
+        transactions (Iterable): The `results` of a Pluggy transactions page.
+
+    Returns:
+        List[CreateTransaction]: The payloads, in the order of the input.
+    """
+    columns = self.columns(transactions)
+    constants = {"account_id": self.account_id, "approved": self.approved}
+    if self.payee_id:
+      constants["payee_id"] = self.payee_id
+
+    names = list(columns)
+    rows = [{**constants, **dict(zip(names, values))} for values in zip(*columns.values())]
+    return validator_for(List[CreateTransaction]).validate_python(rows)
+
+
+def to_milliunits(units: List[float], signs: List[int]) -> List[int]:
+  """
+  Converts currency amounts to signed YNAB milliunits.
+
+  Amounts are rounded to the nearest milliunit after scaling, so float artefacts such as
+  `19.99 * 1000 == 19989.999999999996` never lose a milliunit.
+  """
+  return [sign * round(abs(value) * 1000) for value, sign in zip(units, signs)]
+
+
+def format_dates(values: Iterable[datetime]) -> List[str]:
+  """
+  Formats Pluggy datetimes as YNAB `YYYY-MM-DD` dates, formatting each distinct day once.
+  """
+  formatted: Dict[date, str] = {}
+  dates = []
+  for value in values:
+    day = value.date()
+    text = formatted.get(day)
+    if text is None:
+      text = formatted[day] = day.isoformat()
+    dates.append(text)
+  return dates
@@ -1,10 +1,291 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
 from app.libs import PluggyAIClient, YNABClient
+from app.libs.pluggy.models.account import Account, ListAccountsResponse
+from app.libs.pluggy.models.transaction import LeanListTransactionsResponse
+from app.libs.serialization import parse_json
+from app.libs.single_flight import SingleFlight
+from app.libs.ynab.models.transaction import CreateTransaction
+from app.models import AccountReference, SyncCursor
+from app.services.advisory_lock import AdvisoryLock, lock_key
+from app.services.payload_archive import PayloadArchive
+from app.services.sync_cursor_service import SyncCursorService, run_key
+from app.services.transaction_converter import TransactionBatchConverter
+from app.services.ynab_outbox_service import YNABOutboxService
+
+# First half of the per-account reference advisory lock keys, the second one is the account reference ID
+SYNC_LOCK_NAMESPACE = lock_key("nanami:sync") >> 32
+
+
+class SyncInProgress(RuntimeError):
+  """
+  Raised when another process is already syncing an account reference.
+  """
 
 
 class TransactionsService:
-  def __init__(self, ynab_client: YNABClient, pluggy_client: PluggyAIClient):
+  # Largest page Pluggy accepts when listing transactions
+  PAGE_SIZE = 500
+
+  def __init__(
+    self,
+    ynab_client: YNABClient,
+    pluggy_client: PluggyAIClient,
+    archive: Optional[PayloadArchive] = None,
+    cursors: Optional[SyncCursorService] = None,
+    outbox: Optional[YNABOutboxService] = None,
+    engine: Optional[AsyncEngine] = None,
+  ):
     self.pluggy = pluggy_client
     self.ynab = ynab_client
+    self.archive = archive
+    self.cursors = cursors
+    self.outbox = outbox
+    self.engine = engine
+
+    # Syncs running in this process, joined by identical triggers
+    self.single_flight = SingleFlight()
+    # Account reference locks this process holds, with the number of syncs using them
+    self._locks: Dict[int, AdvisoryLock] = {}
+    self._lock_users: Dict[int, int] = {}
+    self._locking = asyncio.Lock()
+
+  async def resolve_accounts(self, account_reference: AccountReference) -> List[Account]:
+    """
+    Resolves the Pluggy accounts behind an account reference, whose source is a Pluggy item.
+    """
+    accounts = await self.pluggy.accounts.async_list_accounts(account_reference.external_source_id)
+    return accounts.results
+
+  async def iter_pages(
+    self,
+    account_id: str,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    start_page: int = 1,
+  ) -> AsyncIterator[LeanListTransactionsResponse]:
+    """
+    Iterates over every transactions page of a Pluggy account, parsed into lean transactions.
+    """
+    page = start_page
+    while True:
+      response = await self.pluggy.transactions.async_list_transactions(
+        account_id=account_id,
+        from_date=from_date,
+        to_date=to_date,
+        page_size=self.PAGE_SIZE,
+        page=page,
+        lean=True,
+      )
+      yield response
+
+      if page >= response.totalPages:
+        return
+      page += 1
+
+  async def resolve_archived_accounts(
+    self, account_reference: AccountReference, fetched_since: Optional[datetime] = None
+  ) -> List[Account]:
+    """
+    Resolves the Pluggy accounts behind an account reference from the latest archived accounts page, fetched on
+    or after `fetched_since` if given.
+    """
+    content = await self.archive.latest(
+      "pluggy", "/accounts", account_reference.external_source_id, since=fetched_since
+    )
+    if content is None:
+      return []
+    return parse_json(content, ListAccountsResponse).results
+
+  async def iter_archived_pages(
+    self,
+    account_id: str,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    fetched_since: Optional[datetime] = None,
+  ) -> AsyncIterator[LeanListTransactionsResponse]:
+    """
+    Iterates over the archived transactions pages of a Pluggy account, without calling Pluggy. With
+    `fetched_since`, only pages fetched on or after it are read, e.g. since Pluggy last refreshed the item.
+
+    Archived pages may have been fetched for other date ranges, so transactions outside the range are dropped.
+    Pages come the most recently fetched first, and a transaction archived more than once is only read from its
+    latest version, e.g. once it is no longer pending.
+    """
+    seen = set()
+    async for content in self.archive.pages("pluggy", "/transactions", account_id, since=fetched_since):
+      page = parse_json(content, LeanListTransactionsResponse)
+      page.results = [
+        transaction
+        for transaction in page.results
+        if transaction.id not in seen
+        and (from_date is None or transaction.date.date() >= from_date.date())
+        and (to_date is None or transaction.date.date() <= to_date.date())
+      ]
+      seen.update(transaction.id for transaction in page.results)
+      yield page
+
+  async def sync(
+    self,
+    account_reference: AccountReference,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    replay: bool = False,
+  ) -> int:
+    """
+    Imports the Pluggy transactions of an account reference into its YNAB account, one page per request.
+
+    Transactions are imported with their Pluggy ID as `import_id`, so YNAB skips the ones already imported.
+    With a cursor service, progress is committed after every page and an interrupted run of the same range
+    resumes from the next page. A page written right before an interruption is sent again, and skipped by YNAB.
+
+    With an outbox, pages are not sent to YNAB inline: their transactions are enqueued in the same database
+    transaction that moves the cursor, and the outbox flusher writes them in bulk.
+
+    With an engine, the sync holds a Postgres advisory lock on the account reference, so overlapping triggers
+    never process it twice. An identical sync already running in this process is joined and its result shared,
+    while a sync of the account reference running in another process fails this one with `SyncInProgress`.
+    Syncs of other ranges in this process, e.g. backfill windows, share the lock and run side by side.
+
+    Args:
+        account_reference (AccountReference): The accounts to sync.
+        from_date (datetime, optional): Only transactions on or after this date.
+        to_date (datetime, optional): Only transactions on or before this date.
+        replay (bool): Whether to read the Pluggy accounts and transactions from the payload archive instead of
+            calling Pluggy, e.g. to re-process them after the mapping changed.
+
+    Returns:
+        int: The number of transactions created in YNAB, or queued for it when writing through the outbox.
+
+    Raises:
+        ValueError: If replaying without a payload archive.
+        SyncInProgress: If another process is syncing the account reference.
+    """
+    if replay and self.archive is None:
+      raise ValueError("Replaying a sync requires a payload archive")
+
+    if account_reference.id is None:
+      return await self._sync(account_reference, from_date, to_date, replay)
+
+    async def locked_sync() -> int:
+      async with self._account_lock(account_reference.id):
+        return await self._sync(account_reference, from_date, to_date, replay)
+
+    key = (account_reference.id, run_key(from_date, to_date), replay)
+    return await self.single_flight.do(key, locked_sync)
+
+  async def _sync(
+    self,
+    account_reference: AccountReference,
+    from_date: Optional[datetime],
+    to_date: Optional[datetime],
+    replay: bool,
+  ) -> int:
+    converter = TransactionBatchConverter(
+      account_id=account_reference.external_destination_id,
+      payee_id=account_reference.external_destination_payee_id,
+    )
+
+    if replay:
+      accounts = await self.resolve_archived_accounts(account_reference)
+    else:
+      accounts = await self.resolve_accounts(account_reference)
+
+    created = 0
+    for account in accounts:
+      created += await self._sync_account(account_reference, account.id, converter, from_date, to_date, replay)
+
+      # Pages fetched for this account are archived before moving on
+      if self.archive is not None and not replay:
+        await self.archive.flush()
+
+    return created
+
+  @asynccontextmanager
+  async def _account_lock(self, account_reference_id: int):
+    if self.engine is None:
+      yield
+      return
+
+    # Taken once per process, concurrent attempts on separate connections would lock each other out
+    async with self._locking:
+      if account_reference_id not in self._locks:
+        lock = AdvisoryLock(self.engine, SYNC_LOCK_NAMESPACE, account_reference_id)
+        if not await lock.acquire():
+          raise SyncInProgress(f"Account reference {account_reference_id} is being synced by another process")
+        self._locks[account_reference_id] = lock
+      self._lock_users[account_reference_id] = self._lock_users.get(account_reference_id, 0) + 1
+
+    try:
+      yield
+    finally:
+      async with self._locking:
+        self._lock_users[account_reference_id] -= 1
+        if not self._lock_users[account_reference_id]:
+          del self._lock_users[account_reference_id]
+          await self._locks.pop(account_reference_id).release()
+
+  async def _sync_account(
+    self,
+    account_reference: AccountReference,
+    account_id: str,
+    converter: TransactionBatchConverter,
+    from_date: Optional[datetime],
+    to_date: Optional[datetime],
+    replay: bool,
+  ) -> int:
+    if replay:
+      pages = self.iter_archived_pages(account_id, from_date=from_date, to_date=to_date)
+      cursor = None
+    elif self.cursors is not None and account_reference.id is not None:
+      cursor = await self.cursors.start(account_reference.id, account_id, run_key(from_date, to_date))
+      pages = self.iter_pages(account_id, from_date=from_date, to_date=to_date, start_page=cursor.page)
+    else:
+      pages = self.iter_pages(account_id, from_date=from_date, to_date=to_date)
+      cursor = None
+
+    created = 0
+    async for page in pages:
+      transactions = converter.convert(page.results) if page.results else []
+
+      if self.outbox is not None:
+        created += await self._enqueue_page(account_reference, cursor, page.page, transactions)
+        continue
+
+      page_created = 0
+      if transactions:
+        result = await self.ynab.transactions.create_transactions(
+          account_reference.external_destination_budget_id, transactions
+        )
+        page_created = len(result.transaction_ids)
+        created += page_created
+
+      if cursor is not None:
+        await self.cursors.advance(cursor, page.page, page_created, flushed=bool(transactions))
+
+    if cursor is not None:
+      await self.cursors.complete(cursor)
+
+    return created
 
-  async def sync(self):
-    pluggy_transactions = self.pluggy.transactions.list_transactions(account_id="987b4345-5fc2-4460-9b7c-6e3633b62410")
+  async def _enqueue_page(
+    self,
+    account_reference: AccountReference,
+    cursor: Optional[SyncCursor],
+    page: int,
+    transactions: List[CreateTransaction],
+  ) -> int:
+    # Writes and cursor are committed together, a page is either fully queued or not at all
+    async with self.outbox.session_maker() as session:
+      async with session.begin():
+        queued = await self.outbox.enqueue(
+          session, account_reference.external_destination_budget_id, "create", transactions, account_reference.id
+        )
+        if cursor is not None:
+          await self.cursors.advance(cursor, page, queued, flushed=bool(queued), session=session)
+    return queued
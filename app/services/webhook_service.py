@@ -0,0 +1,102 @@
+import logging
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.libs.cache import ResponseCache
+from app.libs.pluggy.models.webhook import WebhookEvent
+from app.services.job_queue import JobQueue
+from app.services.refresh_orchestrator import RefreshOrchestrator
+from app.services.sync_cursor_service import SyncCursorService
+from app.services.sync_scheduler import enqueue_item_syncs
+
+logger = logging.getLogger(__name__)
+
+# Pluggy events that mean an item has new transactions to sync
+SYNC_EVENTS = ("item/updated", "transactions/created")
+
+
+class WebhookService:
+  """
+  Turns Pluggy webhook events into syncs of the account references of the affected item.
+
+  Pluggy retries deliveries and often sends bursts of events for a single refresh, so an event is ignored when
+  the same one was accepted within the dedupe window.
+  """
+
+  # Seconds an accepted event is remembered
+  DEDUPE_WINDOW = 60
+
+  def __init__(
+    self,
+    queue: JobQueue,
+    cursors: SyncCursorService,
+    session_maker: async_sessionmaker,
+    dedupe_window: Optional[float] = None,
+    refreshes: Optional[RefreshOrchestrator] = None,
+  ):
+    """
+    Args:
+        queue (JobQueue): The queue the syncs are enqueued in.
+        cursors (SyncCursorService): Where item updates sync from, see `SyncCursorService.last_synced_at`.
+        session_maker (async_sessionmaker): Session factory of the database holding the account references.
+        dedupe_window (float, optional): Seconds an accepted event is remembered. Defaults to `DEDUPE_WINDOW`.
+        refreshes (RefreshOrchestrator, optional): Notified of every item event, to check its refreshes right away.
+    """
+    self.queue = queue
+    self.cursors = cursors
+    self.session_maker = session_maker
+    self.refreshes = refreshes
+    self.seen = ResponseCache(max_size=4096, default_ttl=dedupe_window or self.DEDUPE_WINDOW)
+
+  def accept(self, event: WebhookEvent) -> bool:
+    """
+    Checks an event calls for a sync, and was not accepted already within the dedupe window.
+
+    The event is remembered right away, so concurrent deliveries are dropped while it is dispatched. Call
+    `forget` if its dispatch fails, for the retry of the delivery to be accepted.
+
+    Returns:
+        bool: Whether the event should be dispatched.
+    """
+    if self.refreshes is not None and event.itemId and event.event.startswith("item/"):
+      self.refreshes.notify(event.itemId)
+
+    if event.event not in SYNC_EVENTS or not event.itemId:
+      return False
+
+    if (event.eventId and self.seen.get(event.eventId)) or self.seen.get(_dedupe_key(event)):
+      return False
+
+    if event.eventId:
+      self.seen.set(event.eventId, True)
+    self.seen.set(_dedupe_key(event), True)
+    return True
+
+  def forget(self, event: WebhookEvent):
+    """
+    Lets a redelivery of an event through, e.g. after its dispatch failed.
+    """
+    if event.eventId:
+      self.seen.discard(event.eventId)
+    self.seen.discard(_dedupe_key(event))
+
+  async def dispatch(self, event: WebhookEvent) -> int:
+    """
+    Enqueues a sync for every account reference of the event item, merged into the pending one if any.
+
+    Syncs start from the last completed sync minus the `SYNC_OVERLAP`, for transactions booked late. The
+    `transactionsCreatedAtFrom` of `transactions/created` events is when Pluggy created the transactions, not their
+    date, so it does not bound the sync: a transaction created today may be dated weeks ago.
+
+    Returns:
+        int: The number of syncs enqueued.
+    """
+    enqueued = await enqueue_item_syncs(event.itemId, self.queue, self.cursors, self.session_maker)
+    logger.info(f"Pluggy {event.event} for item {event.itemId}: enqueued {enqueued} syncs")
+    return enqueued
+
+
+def _dedupe_key(event: WebhookEvent) -> tuple:
+  # Retries share the event ID, bursts of a refresh share the item and the range
+  return event.event, event.itemId, event.accountId, event.transactionsCreatedAtFrom
@@ -0,0 +1,285 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+
+import httpx
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.libs import YNABClient
+from app.libs.serialization import validator_for
+from app.libs.ynab.models.transaction import CreateTransaction, UpdateTransactionWithId
+from app.models import YNABOutboxEntry
+
+logger = logging.getLogger(__name__)
+
+# Payload model of every outbox operation
+OPERATION_MODELS = {
+  "create": CreateTransaction,
+  "update": UpdateTransactionWithId,
+}
+
+
+def is_transient(error: Exception) -> bool:
+  """
+  Whether a YNAB write failed for reasons unrelated to its payload, e.g. rate limiting or an outage.
+  """
+  if isinstance(error, httpx.TransportError):
+    return True
+  status_code = getattr(error, "status_code", None)
+  return status_code is not None and (status_code == 429 or status_code >= 500)
+
+
+def is_rejected(error: Exception) -> bool:
+  """
+  Whether a YNAB write failed because of the payload of one of its transactions.
+  """
+  return isinstance(error, ValidationError) or getattr(error, "status_code", None) == 400
+
+
+class YNABOutboxService:
+  """
+  Transactional outbox for YNAB writes.
+
+  Syncs enqueue the transactions they plan to create or update in the same database transaction that moves their
+  cursor, so a crash never leaves a page half written. `flush` drains the outbox separately, in large bulk
+  requests per budget. Entries are claimed with `FOR UPDATE SKIP LOCKED` and leased before YNAB is called, so any
+  number of flushers can run and no database transaction waits on YNAB. The lease is renewed for as long as a
+  request is pending, however long it waits on the connection limiter or the shared quota.
+
+  A rejected request is split in halves until the entries at fault are isolated, and only those are charged an
+  attempt. Charged entries are retried with exponential backoff, and become dead letters after `MAX_ATTEMPTS`.
+  Rate limiting and server errors charge nothing, the entries are only retried later.
+  """
+
+  # Entries sent per flush, grouped into one bulk request per budget and operation
+  BATCH_SIZE = 1000
+  # Rejections after which an entry is set aside as a dead letter
+  MAX_ATTEMPTS = 5
+  # Seconds between two drains of `run`
+  POLL_INTERVAL = 5
+  # Seconds before retrying after a first failure, doubled after every further one
+  RETRY_DELAY = 30
+  MAX_RETRY_DELAY = 3600
+  # Seconds claimed entries are hidden from other flushers, until a crashed flusher's entries come back
+  LEASE = 300
+  # Seconds between two renewals of the lease of entries being sent
+  LEASE_RENEWAL = 60
+
+  def __init__(self, ynab_client: YNABClient, session_maker: async_sessionmaker, batch_size: Optional[int] = None):
+    self.ynab = ynab_client
+    self.session_maker = session_maker
+    self.batch_size = batch_size or self.BATCH_SIZE
+    # Consecutive transient failures, backing off every entry while YNAB is unavailable
+    self.transient_failures = 0
+
+  async def enqueue(
+    self,
+    session: AsyncSession,
+    budget_id: str,
+    operation: str,
+    transactions: List[Union[CreateTransaction, UpdateTransactionWithId]],
+    account_reference_id: Optional[int] = None,
+  ) -> int:
+    """
+    Adds writes to the outbox, within the caller's transaction.
+
+    Args:
+        session (AsyncSession): The session of the transaction the writes are committed with.
+        budget_id (str): The ID of the YNAB budget.
+        operation (str): `create` or `update`.
+        transactions (list): The `CreateTransaction` or `UpdateTransactionWithId` payloads.
+        account_reference_id (int, optional): The account reference the writes come from.
+
+    Returns:
+        int: The number of entries added.
+
+    Raises:
+        ValueError: If the operation is unknown.
+    """
+    if operation not in OPERATION_MODELS:
+      raise ValueError(f"Unknown outbox operation: {operation}")
+    if not transactions:
+      return 0
+
+    now = datetime.utcnow()
+    rows = [
+      {
+        "budget_id": budget_id,
+        "operation": operation,
+        "payload": transaction.model_dump(mode="json", exclude_unset=True),
+        "account_reference_id": account_reference_id,
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now,
+      }
+      for transaction in transactions
+    ]
+    await session.execute(insert(YNABOutboxEntry), rows)
+    return len(rows)
+
+  async def flush(self) -> int:
+    """
+    Sends one batch of due entries to YNAB and removes the accepted ones.
+
+    Rejected entries stay in the outbox with their attempt count, error and next attempt time.
+
+    Returns:
+        int: The number of entries YNAB accepted.
+    """
+    now = datetime.utcnow()
+    async with self.session_maker() as session:
+      async with session.begin():
+        result = await session.execute(
+          select(YNABOutboxEntry)
+          .where(YNABOutboxEntry.status == "pending", YNABOutboxEntry.next_attempt_at <= now)
+          .order_by(YNABOutboxEntry.id)
+          .limit(self.batch_size)
+          .with_for_update(skip_locked=True)
+        )
+        entries: List[YNABOutboxEntry] = result.scalars().all()
+        if not entries:
+          return 0
+
+        # The claim is committed before YNAB is called
+        await session.execute(
+          update(YNABOutboxEntry)
+          .where(YNABOutboxEntry.id.in_([entry.id for entry in entries]))
+          .values(next_attempt_at=now + timedelta(seconds=self.LEASE))
+        )
+
+    groups: Dict[Tuple[str, str], List[YNABOutboxEntry]] = defaultdict(list)
+    for entry in entries:
+      groups[(entry.budget_id, entry.operation)].append(entry)
+
+    flushed = 0
+    for (budget_id, operation), group in groups.items():
+      flushed += await self._deliver(budget_id, operation, group)
+    return flushed
+
+  async def drain(self) -> int:
+    """
+    Flushes batches until no entry is accepted anymore.
+
+    Returns:
+        int: The number of entries YNAB accepted.
+    """
+    total = 0
+    while flushed := await self.flush():
+      total += flushed
+    return total
+
+  async def run(self):
+    """
+    Drains the outbox every `POLL_INTERVAL` seconds, until cancelled.
+    """
+    while True:
+      try:
+        flushed = await self.drain()
+        if flushed:
+          logger.info(f"Flushed {flushed} YNAB writes")
+      except Exception as error:
+        logger.error(f"Failed to drain the YNAB outbox: {error}")
+      await asyncio.sleep(self.POLL_INTERVAL)
+
+  async def _deliver(self, budget_id: str, operation: str, entries: List[YNABOutboxEntry]) -> int:
+    # Sends the entries, bisecting a rejected request down to the entries at fault. Returns the accepted entries.
+    try:
+      await self._send_leased(budget_id, operation, entries)
+    except Exception as error:
+      if is_transient(error):
+        self.transient_failures += 1
+        delay = self._delay(self.transient_failures - 1)
+        logger.warning(f"YNAB unavailable for {len(entries)} {operation}s of budget {budget_id}: {error}")
+        await self._reschedule(entries, error, delay)
+        return 0
+
+      if is_rejected(error) and len(entries) > 1:
+        middle = len(entries) // 2
+        return await self._deliver(budget_id, operation, entries[:middle]) + await self._deliver(
+          budget_id, operation, entries[middle:]
+        )
+
+      logger.error(f"Failed to flush {len(entries)} YNAB {operation}s of budget {budget_id}: {error}")
+      await self._charge(entries, error)
+      return 0
+
+    self.transient_failures = 0
+    async with self.session_maker() as session:
+      async with session.begin():
+        await session.execute(delete(YNABOutboxEntry).where(YNABOutboxEntry.id.in_([entry.id for entry in entries])))
+    return len(entries)
+
+  async def _send_leased(self, budget_id: str, operation: str, entries: List[YNABOutboxEntry]):
+    # Sends the entries, renewing their lease until YNAB answers. The renewal is over before their outcome is written.
+    renewal = asyncio.create_task(self._renew(entries))
+    try:
+      await self._send(budget_id, operation, entries)
+    finally:
+      renewal.cancel()
+      await asyncio.gather(renewal, return_exceptions=True)
+
+  async def _renew(self, entries: List[YNABOutboxEntry]):
+    # Extends the lease of entries being sent every `LEASE_RENEWAL` seconds, until cancelled
+    ids = [entry.id for entry in entries]
+    while True:
+      try:
+        async with self.session_maker() as session:
+          async with session.begin():
+            await session.execute(
+              update(YNABOutboxEntry)
+              .where(YNABOutboxEntry.id.in_(ids), YNABOutboxEntry.status == "pending")
+              .values(next_attempt_at=datetime.utcnow() + timedelta(seconds=self.LEASE))
+            )
+      except Exception as error:
+        logger.warning(f"Failed to renew the lease of {len(ids)} YNAB outbox entries: {error}")
+      await asyncio.sleep(self.LEASE_RENEWAL)
+
+  async def _reschedule(self, entries: List[YNABOutboxEntry], error: Exception, delay: float):
+    async with self.session_maker() as session:
+      async with session.begin():
+        await session.execute(
+          update(YNABOutboxEntry)
+          .where(YNABOutboxEntry.id.in_([entry.id for entry in entries]))
+          .values(next_attempt_at=datetime.utcnow() + timedelta(seconds=delay), last_error=str(error))
+        )
+
+  async def _charge(self, entries: List[YNABOutboxEntry], error: Exception):
+    # Counts an attempt against every entry, backing off by their attempts so far
+    now = datetime.utcnow()
+    async with self.session_maker() as session:
+      async with session.begin():
+        for entry in entries:
+          entry.attempts += 1
+          dead = entry.attempts >= self.MAX_ATTEMPTS
+          await session.execute(
+            update(YNABOutboxEntry)
+            .where(YNABOutboxEntry.id == entry.id)
+            .values(
+              attempts=entry.attempts,
+              status="dead" if dead else "pending",
+              next_attempt_at=now + timedelta(seconds=self._delay(entry.attempts - 1)),
+              last_error=str(error),
+            )
+          )
+          if dead:
+            logger.error(
+              f"YNAB outbox entry {entry.id} ({entry.operation} in budget {entry.budget_id}) failed "
+              f"{entry.attempts} times and was set aside as a dead letter: {error}"
+            )
+
+  def _delay(self, failures: int) -> float:
+    return min(self.RETRY_DELAY * 2 ** min(failures, 16), self.MAX_RETRY_DELAY)
+
+  async def _send(self, budget_id: str, operation: str, entries: List[YNABOutboxEntry]):
+    transactions = validator_for(List[OPERATION_MODELS[operation]]).validate_python(
+      [entry.payload for entry in entries]
+    )
+    if operation == "create":
+      await self.ynab.transactions.create_transactions(budget_id, transactions)
+    else:
+      await self.ynab.transactions.update_transactions(budget_id, transactions)
@@ -0,0 +1,197 @@
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from app.config.database import async_session_maker, engine
+from app.config.settings import Settings
+from app.libs import PluggyAIClient, YNABClient
+from app.libs.lanes import BACKGROUND, lane
+from app.libs.offload import CpuExecutor
+from app.models import AccountReference, Job
+from app.services.backfill_service import BackfillService
+from app.services.budget_snapshot_service import BudgetSnapshotService
+from app.services.job_queue import JobQueue
+from app.services.payload_archive import PayloadArchive
+from app.services.quota_bucket import shared_ynab_limiter
+from app.services.reconcile_service import ReconcileService
+from app.services.sync_cursor_service import SyncCursorService
+from app.services.transactions_service import SyncInProgress, TransactionsService
+from app.services.ynab_outbox_service import YNABOutboxService
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+  """
+  Processes the sync, backfill and reconcile jobs of the queue, outside of the API processes.
+
+  Up to `concurrency` jobs run at once. Throughput scales by starting more worker processes, which share the
+  queue through `FOR UPDATE SKIP LOCKED`. Every worker also drains the YNAB outbox the syncs write to.
+  """
+
+  # Seconds between two polls of an empty queue
+  POLL_INTERVAL = 2
+  # Seconds a job waits for the sync of its account reference in another process
+  BUSY_DELAY = 60
+
+  def __init__(self, concurrency: Optional[int] = None):
+    self.concurrency = concurrency or Settings.worker_concurrency
+    self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    self.queue = JobQueue(async_session_maker)
+    self.running: Set[asyncio.Task] = set()
+
+    self.handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {
+      "sync": self.sync,
+      "backfill": self.backfill,
+      "reconcile": self.reconcile,
+    }
+
+  async def run(self):
+    """
+    Processes jobs until SIGINT or SIGTERM, then waits for the running ones to finish.
+    """
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+      loop.add_signal_handler(signum, stopping.set)
+
+    self.payload_archive = PayloadArchive(async_session_maker) if Settings.payload_archive else None
+    recorder = self.payload_archive.record if self.payload_archive else None
+    self.ynab = YNABClient(async_mode=True, recorder=recorder, limiter=shared_ynab_limiter(async_session_maker))
+    self.pluggy = PluggyAIClient(async_mode=True, recorder=recorder)
+
+    self.outbox = YNABOutboxService(self.ynab, async_session_maker)
+    self.transactions = TransactionsService(
+      self.ynab,
+      self.pluggy,
+      archive=self.payload_archive,
+      cursors=SyncCursorService(async_session_maker),
+      outbox=self.outbox,
+      engine=engine,
+    )
+    self.backfills = BackfillService(self.transactions, async_session_maker)
+    # Reconciles match large ledgers, and validate the budgets they refresh, in a process pool
+    self.executor = CpuExecutor()
+    self.reconciler = ReconcileService(
+      self.ynab,
+      self.pluggy,
+      transactions_service=self.transactions,
+      budget_snapshots=BudgetSnapshotService(self.ynab, async_session_maker, executor=self.executor),
+      executor=self.executor,
+    )
+
+    outbox_flusher = asyncio.create_task(self.outbox.run())
+    logger.info(f"Worker {self.worker_id} started with concurrency {self.concurrency}")
+
+    try:
+      while not stopping.is_set():
+        free = self.concurrency - len(self.running)
+        jobs = await self.queue.dequeue(self.worker_id, free) if free else []
+
+        for job in jobs:
+          task = asyncio.create_task(self.process(job))
+          self.running.add(task)
+          task.add_done_callback(self.running.discard)
+
+        if not jobs:
+          waiters = [asyncio.create_task(stopping.wait()), *self.running]
+          await asyncio.wait(waiters, timeout=self.POLL_INTERVAL, return_when=asyncio.FIRST_COMPLETED)
+          waiters[0].cancel()
+    finally:
+      logger.info(f"Worker {self.worker_id} stopping, waiting for {len(self.running)} jobs")
+      await asyncio.gather(*self.running, return_exceptions=True)
+
+      outbox_flusher.cancel()
+      await asyncio.gather(outbox_flusher, return_exceptions=True)
+      await self.outbox.drain()
+      if self.payload_archive:
+        await self.payload_archive.flush()
+      await self.ynab.aclose()
+      await self.pluggy.async_close()
+      self.executor.shutdown()
+
+  async def process(self, job: Job):
+    """
+    Runs a claimed job, keeping it invisible to other workers while it runs.
+    """
+    heartbeat = asyncio.create_task(self._heartbeat(job))
+    try:
+      handler = self.handlers.get(job.kind)
+      if handler is None:
+        raise ValueError(f"Unknown job kind: {job.kind}")
+
+      await handler(job.payload)
+      await self.queue.complete(job)
+      logger.info(f"Job {job.id} ({job.kind}) done")
+    except SyncInProgress as error:
+      logger.info(f"Job {job.id} ({job.kind}) postponed: {error}")
+      await self.queue.postpone(job, self.BUSY_DELAY)
+    except Exception as error:
+      logger.exception(f"Job {job.id} ({job.kind}) failed on attempt {job.attempts}")
+      await self.queue.fail(job, error)
+    finally:
+      heartbeat.cancel()
+
+  # --------------------
+  # Handlers
+  # --------------------
+
+  async def sync(self, payload: Dict[str, Any]) -> int:
+    account_reference = await self._account_reference(payload["account_reference_id"])
+    return await self.transactions.sync(
+      account_reference,
+      from_date=_parse_datetime(payload.get("from_date")),
+      to_date=_parse_datetime(payload.get("to_date")),
+      replay=payload.get("replay", False),
+    )
+
+  async def backfill(self, payload: Dict[str, Any]) -> int:
+    account_reference = await self._account_reference(payload["account_reference_id"])
+    end = payload.get("end")
+    return await self.backfills.backfill(
+      account_reference, date.fromisoformat(payload["start"]), date.fromisoformat(end) if end else None
+    )
+
+  async def reconcile(self, payload: Dict[str, Any]):
+    account_reference = await self._account_reference(payload["account_reference_id"])
+    return await self.reconciler.reconcile(account_reference)
+
+  async def _account_reference(self, account_reference_id: int) -> AccountReference:
+    async with async_session_maker() as session:
+      account_reference = await session.get(AccountReference, account_reference_id)
+    if account_reference is None:
+      raise ValueError(f"Account reference {account_reference_id} does not exist")
+    return account_reference
+
+  async def _heartbeat(self, job: Job):
+    interval = self.queue.visibility_timeout.total_seconds() / 3
+    while True:
+      await asyncio.sleep(interval)
+      try:
+        await self.queue.heartbeat(job)
+      except Exception as error:
+        logger.error(f"Failed to extend job {job.id}: {error}")
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+  return datetime.fromisoformat(value) if value else None
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Processes the sync, backfill and reconcile jobs of the queue.")
+  parser.add_argument("--concurrency", type=int, default=None, help="Jobs run at once by this process")
+  args = parser.parse_args()
+
+  logging.basicConfig(level=logging.INFO)
+  # Nothing here is user-facing, the API processes keep the reserved upstream capacity
+  with lane(BACKGROUND):
+    asyncio.run(Worker(concurrency=args.concurrency).run())
+
+
+if __name__ == "__main__":
+  main()